@@ -18,6 +18,36 @@ REDIS_DECODE_RESPONSES = True
 
 # Cache settings
 CACHE_TTL = 300  # 5 minutes
+TRENDING_CACHE_TTL = int(os.getenv("TRENDING_CACHE_TTL", 60))  # seconds; trending windows move with the clock
+
+# Notification dispatch (see src/patterns/observer.py)
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", 2))  # 0 delivers synchronously
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", 10000))
+NOTIFY_BATCH_SIZE = int(os.getenv("NOTIFY_BATCH_SIZE", 100))
+NOTIFY_OVERFLOW = os.getenv("NOTIFY_OVERFLOW", "drop_oldest")  # block | drop_newest | drop_oldest
+NOTIFY_PUT_TIMEOUT = float(os.getenv("NOTIFY_PUT_TIMEOUT", 0.1))  # seconds 'block' waits for room
+NOTIFY_COALESCE_WINDOW = float(os.getenv("NOTIFY_COALESCE_WINDOW", 5.0))  # seconds reviews are batched into digests; 0 disables
+
+# Persistent notification outbox / inbox
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", 30))  # delivered events older than this are compacted
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 1000))  # events fanned out per delivery transaction
+
+# HTTP API (see src/api/server.py)
+API_HOST = os.getenv("API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("API_PORT", 8000))
+API_WORKERS = int(os.getenv("API_WORKERS", 8))  # threads running blocking service calls
+API_REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", 10))  # seconds before a request gets 504
+API_KEEPALIVE_TIMEOUT = float(os.getenv("API_KEEPALIVE_TIMEOUT", 15))  # idle seconds before closing a connection
+API_MAX_BODY = int(os.getenv("API_MAX_BODY", 1024 * 1024))  # bytes
+
+# SQL profiling (see src/database/profiling.py); also toggled at runtime
+SQL_PROFILE = os.getenv("SQL_PROFILE", "0") == "1"  # profile from startup
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", 100))  # statements at least this slow go to the slow-query log
+SQL_SLOW_LOG_SIZE = int(os.getenv("SQL_SLOW_LOG_SIZE", 100))  # slow queries kept
+SQL_EXPLAIN_SLOW = os.getenv("SQL_EXPLAIN_SLOW", "1") == "1"  # capture the query plan of slow SELECTs
+
+# Analytics snapshot (see src/analytics/snapshot.py)
+ANALYTICS_REFRESH_INTERVAL = float(os.getenv("ANALYTICS_REFRESH_INTERVAL", 30))  # seconds before the API pulls new reviews into the snapshot
 
 # Dataset paths (FIXED - pointing to 'datasets' folder)
 DATASETS_DIR = BASE_DIR / "datasets"  # Changed from 'databases' to 'datasets'
@@ -31,7 +61,39 @@ SONG_MODEL = PICKLES_DIR / "song_model.pkl"
 MOVIE_MODEL = PICKLES_DIR / "movie_model.pkl"
 SERIES_MODEL = PICKLES_DIR / "series_model.pkl"
 
+# Memory-mapped model artifacts (see src/recommender/artifact.py)
+MODELS_DIR = BASE_DIR / "models"
+SONG_ARTIFACT = MODELS_DIR / "song"
+MOVIE_ARTIFACT = MODELS_DIR / "movie"
+SERIES_ARTIFACT = MODELS_DIR / "series"
+MODEL_DTYPE = os.getenv("MODEL_DTYPE", "float16")
+RECOMMENDATION_PRELOAD = os.getenv("RECOMMENDATION_PRELOAD", "0") == "1"  # load models in a background thread at startup
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 0))  # seconds between checks for new model versions; 0 disables
+NEIGHBOR_K = int(os.getenv("NEIGHBOR_K", 50))  # neighbours kept per item in the sparse graph
+
+# Song ANN index (random-hyperplane LSH over audio features).
+# More tables/probes -> higher recall; more bits -> smaller buckets, faster queries.
+SONG_ANN = os.getenv("SONG_ANN", "1") == "1"
+ANN_TABLES = int(os.getenv("ANN_TABLES", 12))
+ANN_BITS = int(os.getenv("ANN_BITS", 0))  # hyperplanes per table; 0 sizes buckets to the catalog
+ANN_PROBES = int(os.getenv("ANN_PROBES", 0))  # 1 also checks buckets one bit away
+
+# Collaborative filtering / hybrid blending
+CF_SHRINKAGE = float(os.getenv("CF_SHRINKAGE", 10))  # damp item pairs with few co-raters
+CF_REFRESH_INTERVAL = float(os.getenv("CF_REFRESH_INTERVAL", 5))  # seconds between checks for new reviews; 0 checks on every request
+HYBRID_CONTENT_WEIGHT = float(os.getenv("HYBRID_CONTENT_WEIGHT", 0.7))  # content share of a hybrid score
+
+# Recommendation result cache. Keys include the model version, so entries never
+# go stale; the Redis TTL only reclaims entries of retired versions.
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 10000))  # in-process LRU entries; 0 disables
+RESULT_CACHE_REDIS = os.getenv("RESULT_CACHE_REDIS", "0") == "1"  # also share results through Redis
+RESULT_CACHE_REDIS_TTL = int(os.getenv("RESULT_CACHE_REDIS_TTL", 86400))
+
+# Fuzzy title matching (trigram index) when an exact title lookup fails
+FUZZY_MIN_SCORE = float(os.getenv("FUZZY_MIN_SCORE", 0.5))  # 0..1; weaker matches are not used
+
 # Ensure directories exist
 DB_DIR.mkdir(parents=True, exist_ok=True)
 DATASETS_DIR.mkdir(parents=True, exist_ok=True)
-PICKLES_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
+PICKLES_DIR.mkdir(parents=True, exist_ok=True)
+MODELS_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
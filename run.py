@@ -1,5 +1,14 @@
-"""Main entry point for the application"""
-from src.cli.main import run_cli
+"""Main entry point for the application.
+
+Without arguments this starts the interactive menu; with arguments it runs
+a scripted command (see src/cli/commands.py, or `python run.py --help`).
+"""
+import sys
 
 if __name__ == "__main__":
-    run_cli()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        from src.cli.commands import main
+        sys.exit(main())
+    
+    from src.cli.main import run_cli
+    run_cli()
@@ -0,0 +1,32 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.manager import DatabaseManager
+
+
+def backfill_rollups(days=None):
+    """Rebuild the hourly rating rollups from reviews, all of them or the last `days` days"""
+    db = DatabaseManager()
+    db.create_tables()
+
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    start = time.time()
+    try:
+        counted = db.rebuild_rating_rollups(since)
+    finally:
+        db.close_session()
+
+    window = f"since {since:%Y-%m-%d %H:00} UTC" if since else "all time"
+    print(f"[OK] Rebuilt rating rollups ({window}) from {counted} reviews in {time.time() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild hourly rating rollups from the reviews table")
+    parser.add_argument('--days', type=float, help="only rebuild the last N days (default: everything)")
+    args = parser.parse_args()
+    backfill_rollups(args.days)
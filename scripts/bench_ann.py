@@ -0,0 +1,60 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.recommender.ann import LSHIndex
+from src.recommender.topk import top_k
+
+
+# (tables, bits, probes) settings to compare; None bits sizes them to the catalog
+CONFIGS = [(4, 12, 0), (8, 12, 0), (8, 14, 0), (12, 14, 0), (12, 16, 0), (8, 16, 1), (12, None, 0)]
+
+
+def synthetic_features(size, dim, seed=0):
+    """Clustered, standardized and L2-normalized vectors like the song features"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, size // 500), dim))
+    vectors = centers[rng.integers(0, len(centers), size)] + 0.35 * rng.standard_normal((size, dim))
+    vectors = (vectors - vectors.mean(axis=0)) / vectors.std(axis=0)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def bench_ann(size, dim, queries, k):
+    vectors = synthetic_features(size, dim)
+    rng = np.random.default_rng(1)
+    query_ids = rng.choice(size, queries, replace=False)
+    
+    start = time.perf_counter()
+    exact = [set(top_k(vectors @ vectors[q], k, exclude=[q])[0].tolist()) for q in query_ids]
+    exact_ms = (time.perf_counter() - start) / queries * 1000
+    
+    print(f"{size:,} items x {dim} features, top {k}: exact scan {exact_ms:.3f}ms/query")
+    print(f"{'Tables':>6} {'Bits':>5} {'Probes':>6} | {'Build':>8} | {'Query':>9} | {'Recall':>6}")
+    print("-" * 52)
+    
+    for tables, bits, probes in CONFIGS:
+        start = time.perf_counter()
+        index = LSHIndex.build(vectors, tables, bits, probes)
+        build_s = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        found = [set(index.query(vectors[q], k, exclude=[q])[0].tolist()) for q in query_ids]
+        query_ms = (time.perf_counter() - start) / queries * 1000
+        
+        recall = np.mean([len(f & e) / k for f, e in zip(found, exact)])
+        print(f"{tables:>6} {index.n_bits:>5} {probes:>6} | {build_s:>7.2f}s | {query_ms:>7.3f}ms | {recall:>6.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LSH recall/latency trade-off")
+    parser.add_argument('--size', type=int, default=1_000_000)
+    parser.add_argument('--dim', type=int, default=9)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+    bench_ann(args.size, args.dim, args.queries, args.k)
@@ -0,0 +1,55 @@
+import sys
+import time
+import pickle
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.recommender.artifact import load_artifact, load_legacy_pickle, save_artifact
+
+
+SIZES = [2_000, 5_000, 10_000]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def bench_model_load():
+    rng = np.random.default_rng(7)
+    
+    print(f"{'Items':>8} | {'Pickle MB':>9} | {'Pickle load':>11} | "
+          f"{'Mmap MB':>8} | {'Mmap load':>9} | {'First query':>11}")
+    print("-" * 72)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        for size in SIZES:
+            titles = [f"Movie {i}" for i in range(size)]
+            similarity = rng.random((size, size))
+            
+            pickle_path = tmp / f"movie_{size}.pkl"
+            with open(pickle_path, 'wb') as f:
+                pickle.dump({'movies': pd.DataFrame({'title': titles}),
+                             'similarity': similarity}, f)
+            artifact_path = save_artifact(tmp / f"movie_{size}", titles, similarity=similarity)
+            del similarity
+            
+            _, pickle_time = timed(lambda: load_legacy_pickle(pickle_path, 'movies', 'title'))
+            model, mmap_time = timed(lambda: load_artifact(artifact_path))
+            _, query_time = timed(lambda: model.similar(model.lookup("Movie 42"), 5))
+            
+            pickle_mb = pickle_path.stat().st_size / 1e6
+            mmap_mb = sum(p.stat().st_size for p in artifact_path.iterdir()) / 1e6
+            print(f"{size:>8,} | {pickle_mb:>9.1f} | {pickle_time * 1000:>9.1f}ms | "
+                  f"{mmap_mb:>8.1f} | {mmap_time * 1000:>7.1f}ms | {query_time * 1000:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    bench_model_load()
@@ -0,0 +1,73 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.recommender.model import RecommendationModel
+from src.recommender.title_index import TitleIndex
+from src.services.recommendation_service import READY, RecommendationService
+
+
+CACHE_SIZES = [0, 100, 1000, 10000]
+
+
+def synthetic_service(size, dim, cache_size):
+    """Service serving one in-memory song model of random embeddings"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    titles = [f"Song {i}" for i in range(size)]
+
+    model = RecommendationModel(titles, TitleIndex.build(titles, strip_spaces=True), embeddings=vectors)
+    model.version = 'bench'
+    service = RecommendationService(cache_size=cache_size, use_redis=False)
+    service.models['song'] = model
+    service._states['song'] = READY
+    return service, titles
+
+
+def zipf_log(titles, requests, exponent, seed=1):
+    """Request log where the i-th most popular title has weight 1 / i^exponent"""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(titles) + 1) ** exponent
+    popularity = rng.permutation(len(titles))
+    picks = rng.choice(len(titles), requests, p=weights / weights.sum())
+    return [titles[popularity[p]] for p in picks]
+
+
+def bench_result_cache(size, dim, requests, exponent, top_n):
+    print(f"{size:,} items, {requests:,} requests, Zipf s={exponent}, top {top_n}")
+    print(f"{'Cache':>7} | {'Hit rate':>8} | {'Mean':>9} | {'p99':>9} | {'Total':>8}")
+    print("-" * 54)
+
+    for cache_size in CACHE_SIZES:
+        service, titles = synthetic_service(size, dim, cache_size)
+        log = zipf_log(titles, requests, exponent)
+
+        latencies = np.empty(len(log))
+        start = time.perf_counter()
+        for i, title in enumerate(log):
+            t = time.perf_counter()
+            service.recommend('song', title, top_n)
+            latencies[i] = time.perf_counter() - t
+        total = time.perf_counter() - start
+
+        stats = service.cache_stats()
+        print(f"{cache_size:>7} | {stats['hit_rate']:>8.1%} | "
+              f"{latencies.mean() * 1000:>7.3f}ms | {np.percentile(latencies, 99) * 1000:>7.3f}ms | "
+              f"{total:>7.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recommendation result cache on a Zipfian request log")
+    parser.add_argument('--size', type=int, default=100_000)
+    parser.add_argument('--dim', type=int, default=9)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--zipf', type=float, default=1.1, help="popularity skew exponent")
+    parser.add_argument('--top-n', type=int, default=5)
+    args = parser.parse_args()
+    bench_result_cache(args.size, args.dim, args.requests, args.zipf, args.top_n)
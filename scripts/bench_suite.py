@@ -0,0 +1,260 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import platform
+import sqlite3
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.synthetic_data import DEFAULT_DB, MEDIA_TYPES, load_or_generate, media_titles, open_db
+from src.cache.redis_cache import cache
+from src.patterns.observer import notification_subject
+from src.services.review_service import ReviewService
+
+
+def summarize(latencies, total=None):
+    """Timing stats in milliseconds for a list of per-call latencies in seconds"""
+    latencies = np.asarray(latencies)
+    total = latencies.sum() if total is None else total
+    return {
+        'ops': len(latencies),
+        'total_s': round(float(total), 4),
+        'ops_per_s': round(len(latencies) / total, 1) if total else None,
+        'mean_ms': round(float(latencies.mean()) * 1000, 4),
+        'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 4),
+        'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 4),
+    }
+
+
+def timed(fn, calls):
+    """Call fn(*args) for each args tuple, returning the latency stats"""
+    latencies = []
+    for args in calls:
+        start = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+class BenchSuite:
+    """The timed paths, run against a synthetic database"""
+
+    def __init__(self, path, params, ops, seed=0):
+        self.path = path
+        self.params = params
+        self.ops = ops
+        self.rng = random.Random(seed)
+        self.db = open_db(path)
+        self.service = ReviewService(self.db)
+        self.titles = {t: media_titles(t, params['media_per_type']) for t in MEDIA_TYPES}
+
+    def _random_media(self, n):
+        return [(t, self.rng.choice(self.titles[t])) for t in self.rng.choices(MEDIA_TYPES, k=n)]
+
+    def _random_user(self):
+        return f"user{self.rng.randrange(self.params['users'])}"
+
+    def bench_add_review(self):
+        calls = [(self._random_user(), title, media_type, float(self.rng.randint(2, 10)) / 2, 'bench')
+                 for media_type, title in self._random_media(self.ops)]
+        return timed(self.service.add_review_threaded, calls)
+
+    def bench_bulk_import(self):
+        reviews = [{'username': self._random_user(), 'title': title, 'media_type': media_type,
+                    'rating': float(self.rng.randint(2, 10)) / 2, 'review_text': 'bench'}
+                   for media_type, title in self._random_media(self.ops * 5)]
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(reviews, f)
+        try:
+            start = time.perf_counter()
+            results = self.service.bulk_import_reviews(f.name)
+            total = time.perf_counter() - start
+        finally:
+            os.unlink(f.name)
+        return {'ops': results['total'], 'failed': results['failed'], 'total_s': round(total, 4),
+                'ops_per_s': round(results['total'] / total, 1)}
+
+    def bench_top_rated_cold(self):
+        """First query on a fresh connection, with the result cache cleared"""
+        latencies = []
+        for media_type in MEDIA_TYPES * max(1, self.ops // 30):
+            cache.clear_pattern("top_rated:*")
+            db = open_db(self.path)
+            start = time.perf_counter()
+            ReviewService(db).get_top_rated_cached(media_type, 10)
+            latencies.append(time.perf_counter() - start)
+            db.close_session()
+            db.engine.dispose()
+        return summarize(latencies)
+
+    def bench_top_rated_warm(self):
+        """Repeated queries; served from Redis when it is running"""
+        for media_type in MEDIA_TYPES:
+            self.service.get_top_rated_cached(media_type, 10)
+        result = timed(self.service.get_top_rated_cached,
+                       [(self.rng.choice(MEDIA_TYPES), 10) for _ in range(self.ops)])
+        result['cache'] = 'redis' if cache.available else 'none'
+        return result
+
+    def bench_search_by_title(self):
+        calls = [(title.split()[self.rng.randrange(2)], media_type)
+                 for media_type, title in self._random_media(self.ops // 10 or 1)]
+        return timed(self.db.search_by_title, [(word, media_type) for word, media_type in calls])
+
+    def bench_get_media_stats(self):
+        media = [self.db.get_media_by_title(title, media_type) for media_type, title in self._random_media(self.ops)]
+        return timed(self.db.get_media_stats, [(m,) for m in media])
+
+    def bench_favorites_fanout(self):
+        """Follower lookup per review: reverse index against the SQL query"""
+        start = time.perf_counter()
+        notification_subject.load_favorites(self.db.iter_favorites())
+        load = time.perf_counter() - start
+
+        media = [(title, media_type) for media_type, title in self._random_media(self.ops)]
+        result = timed(notification_subject.favorites.followers, media)
+        result['index_load_s'] = round(load, 4)
+        result['sql'] = timed(self.db.get_users_who_favorited, media)
+
+        # End to end: queue one event per review and wait for delivery
+        start = time.perf_counter()
+        for title, media_type in media:
+            notification_subject.notify_followers(
+                lambda title=title, media_type=media_type: notification_subject.favorites.followers(title, media_type),
+                f"New review for '{title}'",
+                {'title': title, 'media_type': media_type, 'rating': 4.0, 'username': self._random_user()}
+            )
+        notification_subject.flush()
+        result['dispatch_s'] = round(time.perf_counter() - start, 4)
+        return result
+
+    def bench_recommend(self):
+        """Collaborative recommendations learned from the suite's reviews.
+        Queried titles are those of randomly drawn reviews, so requests
+        follow the dataset's popularity. The synthetic data has no content
+        features, so the content models are not exercised here."""
+        from src.models.db_models import Media, Review
+        from src.recommender.collaborative import CollaborativeFilter
+        from src.services.recommendation_service import RecommendationService
+
+        collaborative = CollaborativeFilter(self.db)
+        start = time.perf_counter()
+        collaborative.rebuild()
+        build = time.perf_counter() - start
+
+        review_ids = [self.rng.randint(1, self.params['reviews']) for _ in range(self.ops)]
+        rows = self.db.get_session().query(Review.review_id, Media.media_type, Media.title).join(
+            Media, Media.media_id == Review.media_id
+        ).filter(Review.review_id.in_(set(review_ids))).all()
+        media = {review_id: (media_type, title) for review_id, media_type, title in rows}
+
+        service = RecommendationService(collaborative=collaborative, watch_interval=0,
+                                        cache_size=0, use_redis=False)
+        result = timed(service.recommend, [(*media[i], 5, 'collaborative') for i in review_ids])
+        result['build_s'] = round(build, 4)
+        result['items'] = len(collaborative)
+        return result
+
+    def run(self, only=None):
+        results = {}
+        for name in sorted(n[len('bench_'):] for n in dir(self) if n.startswith('bench_')):
+            if only and name not in only:
+                continue
+            print(f"[INFO] {name}...", file=sys.stderr)
+            results[name] = getattr(self, f"bench_{name}")()
+            self.db.close_session()
+        return results
+
+
+def compare(results, baseline, tolerance):
+    """Per-benchmark ratio against the baseline; a regression when the
+    primary metric is more than tolerance slower"""
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous:
+            continue
+        metric = 'p50_ms' if 'p50_ms' in current else 'total_s'
+        if not previous.get(metric):
+            continue
+        ratio = current[metric] / previous[metric]
+        comparison[name] = {'metric': metric, 'baseline': previous[metric], 'current': current[metric],
+                            'ratio': round(ratio, 3), 'regression': ratio > 1 + tolerance}
+    return comparison
+
+
+def bench_suite(db_path, params, ops, only, baseline_path, tolerance, output):
+    start = time.perf_counter()
+    params = load_or_generate(db_path, **params)
+    generated = time.perf_counter() - start
+
+    # Writes go to a copy, so the generated database stays reusable
+    work_path = f"{db_path}.work"
+    shutil.copyfile(db_path, work_path)
+    try:
+        # Service chatter ([CACHE MISS] ...) would interleave with the JSON
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            results = BenchSuite(work_path, params, ops).run(only)
+            notification_subject.shutdown()
+    finally:
+        os.unlink(work_path)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'machine': platform.machine(),
+            'dataset': params,
+            'ops': ops,
+            'setup_s': round(generated, 2),
+        },
+        'results': results,
+    }
+
+    ok = True
+    if baseline_path and Path(baseline_path).exists():
+        report['comparison'] = compare(results, json.loads(Path(baseline_path).read_text()), tolerance)
+        for name, row in report['comparison'].items():
+            flag = "[ERROR] regression" if row['regression'] else "[OK]"
+            print(f"{flag} {name}: {row['current']} vs {row['baseline']} {row['metric']} "
+                  f"(x{row['ratio']})", file=sys.stderr)
+        ok = not any(row['regression'] for row in report['comparison'].values())
+
+    text = json.dumps(report, indent=2)
+    if output:
+        Path(output).write_text(text + '\n')
+    else:
+        print(text)
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the main read/write paths on synthetic data")
+    parser.add_argument('--db', default=str(DEFAULT_DB), help="synthetic SQLite file, reused when its "
+                        "generator arguments match")
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--media', type=int, default=20_000, help="titles per media type")
+    parser.add_argument('--reviews', type=int, default=200_000, help="up to millions")
+    parser.add_argument('--zipf', type=float, default=1.1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--ops', type=int, default=500, help="calls per benchmark")
+    parser.add_argument('--only', nargs='+', help="benchmark names to run")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', help="JSON report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    params = {'users': args.users, 'media_per_type': args.media, 'reviews': args.reviews,
+              'zipf': args.zipf, 'seed': args.seed}
+    ok = bench_suite(args.db, params, args.ops, args.only, args.baseline, args.tolerance, args.output)
+    sys.exit(0 if ok else 1)
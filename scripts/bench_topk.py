@@ -0,0 +1,53 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.recommender.topk import top_k
+
+
+SIZES = [10_000, 100_000, 1_000_000]
+TOP_N = 5
+
+
+def sorted_top_n(row, idx, top_n):
+    """The previous implementation: sort every (index, score) pair"""
+    distances = sorted(list(enumerate(row)), reverse=True, key=lambda x: x[1])
+    return distances[1:top_n+1]
+
+
+def time_call(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_topk():
+    rng = np.random.default_rng(42)
+    
+    print(f"{'Items':>10} | {'sorted()':>12} | {'argpartition':>12} | {'Speedup':>8}")
+    print("-" * 52)
+    
+    for size in SIZES:
+        row = rng.random(size)
+        idx = size // 2
+        row[idx] = 1.0
+        repeat = 3 if size >= 1_000_000 else 5
+        
+        old = time_call(lambda: sorted_top_n(row, idx, TOP_N), repeat)
+        new = time_call(lambda: top_k(row, TOP_N, exclude=[idx]), repeat * 10)
+        
+        expected = [i for i, _ in sorted_top_n(row, idx, TOP_N)]
+        assert top_k(row, TOP_N, exclude=[idx])[0].tolist() == expected
+        
+        print(f"{size:>10,} | {old * 1000:>10.2f}ms | {new * 1000:>10.3f}ms | {old / new:>7.0f}x")
+
+
+if __name__ == "__main__":
+    bench_topk()
@@ -0,0 +1,40 @@
+import sys
+import argparse
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import MODEL_DTYPE, NEIGHBOR_K
+from src.recommender.builder import DATASETS, build_model
+
+
+def build_models(media_types, k, block_rows, col_block, workers, dtype, keep_versions):
+    for media_type in media_types:
+        start = time.time()
+        try:
+            path = build_model(
+                media_type, k, block_rows=block_rows, col_block=col_block,
+                workers=workers, dtype=dtype, keep_versions=keep_versions
+            )
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[WARNING] {media_type}: {e}")
+            continue
+        print(f"[OK] {media_type}: published {path} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build recommendation models from datasets/")
+    parser.add_argument('media_types', nargs='*', help=f"any of {', '.join(DATASETS)} (default: all)")
+    parser.add_argument('-k', type=int, default=NEIGHBOR_K, help="neighbours kept per item")
+    parser.add_argument('--block-rows', type=int, default=512, help="rows scored per task")
+    parser.add_argument('--col-block', type=int, default=8192, help="columns scored at once")
+    parser.add_argument('--workers', type=int, default=None, help="process pool size")
+    parser.add_argument('--dtype', choices=['float16', 'float32'], default=MODEL_DTYPE)
+    parser.add_argument('--keep-versions', type=int, default=3)
+    args = parser.parse_args()
+    unknown = set(args.media_types) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown media type(s): {', '.join(sorted(unknown))}")
+    build_models(args.media_types or list(DATASETS), args.k, args.block_rows,
+                 args.col_block, args.workers, args.dtype, args.keep_versions)
@@ -0,0 +1,46 @@
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import MODEL_DTYPE, NEIGHBOR_K
+from src.recommender.artifact import publish_artifact
+from src.recommender.graph import NeighborGraph
+from src.services.recommendation_service import MODEL_SOURCES, RecommendationService
+
+
+def build_neighbor_graphs(k: int = NEIGHBOR_K, keep_dense: bool = False,
+                          dtype: str = MODEL_DTYPE, block_rows: int = 1024):
+    """Replace each model's dense matrix with its top-k neighbour graph"""
+    service = RecommendationService()
+    service.preload(background=False)
+    
+    for media_type, model in service.models.items():
+        source = MODEL_SOURCES[media_type]
+        
+        if model.similarity is not None:
+            graph = NeighborGraph.from_similarity(model.similarity, k, block_rows, dtype)
+        elif model.embeddings is not None:
+            graph = NeighborGraph.from_embeddings(model.embeddings, k, block_rows, dtype)
+        else:
+            print(f"[INFO] {media_type}: already graph-only, skipping")
+            continue
+        
+        publish_artifact(
+            source['artifact'], [model.title(i) for i in range(len(model))],
+            similarity=model.similarity if keep_dense else None,
+            embeddings=model.embeddings if keep_dense else None,
+            graph=graph, index=model.index, dtype=dtype
+        )
+        print(f"[OK] {media_type}: {len(model)} {source['plural']}, k={graph.k} -> {source['artifact']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build sparse top-k neighbour graphs")
+    parser.add_argument('-k', type=int, default=NEIGHBOR_K, help="neighbours kept per item")
+    parser.add_argument('--keep-dense', action='store_true', help="also keep the dense matrix")
+    parser.add_argument('--dtype', choices=['float16', 'float32'], default=MODEL_DTYPE)
+    parser.add_argument('--block-rows', type=int, default=1024)
+    args = parser.parse_args()
+    build_neighbor_graphs(args.k, args.keep_dense, args.dtype, args.block_rows)
@@ -0,0 +1,34 @@
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import MODEL_DTYPE
+from src.recommender.artifact import load_legacy_pickle, publish_artifact
+from src.services.recommendation_service import MODEL_SOURCES
+
+
+def convert_models(dtype: str = MODEL_DTYPE):
+    """Convert pickled DataFrame + similarity models into mmap artifacts"""
+    for media_type, source in MODEL_SOURCES.items():
+        if not source['pickle'].exists():
+            print(f"[WARNING] {source['label']} model not found at: {source['pickle']}")
+            continue
+        
+        model = load_legacy_pickle(
+            source['pickle'], source['frame'], source['column'],
+            strip_spaces=source['strip_spaces']
+        )
+        publish_artifact(
+            source['artifact'], model.titles.tolist(),
+            similarity=model.similarity, index=model.index, dtype=dtype
+        )
+        print(f"[OK] {media_type}: {len(model)} {source['plural']} -> {source['artifact']} ({dtype})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert pickled models to the mmap format")
+    parser.add_argument('--dtype', choices=['float16', 'float32'], default=MODEL_DTYPE)
+    args = parser.parse_args()
+    convert_models(args.dtype)
@@ -0,0 +1,56 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import OUTBOX_BATCH_SIZE, NOTIFICATION_RETENTION_DAYS
+from src.database.manager import DatabaseManager
+
+
+def deliver_notifications(batch_size: int = OUTBOX_BATCH_SIZE, interval: float = 1.0,
+                          once: bool = False, retention_days: int = NOTIFICATION_RETENTION_DAYS,
+                          compact_every: float = 3600.0):
+    """Drain the notification outbox into user inboxes, then keep polling"""
+    db = DatabaseManager()
+    db.create_tables()
+    last_compaction = 0.0
+
+    try:
+        while True:
+            start = time.time()
+            delivered = 0
+            while True:
+                events = db.deliver_notifications(batch_size)
+                delivered += events
+                if events < batch_size:
+                    break
+            if delivered:
+                print(f"Delivered {delivered} events in {time.time() - start:.2f}s")
+
+            if time.time() - last_compaction >= compact_every:
+                events, notifications = db.compact_notifications(retention_days)
+                last_compaction = time.time()
+                if events:
+                    print(f"Compacted {events} events and {notifications} inbox entries")
+
+            if once:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        db.close_session()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Notification outbox delivery worker")
+    parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE, help="events per transaction")
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between polls")
+    parser.add_argument('--once', action='store_true', help="drain the outbox once and exit")
+    parser.add_argument('--retention-days', type=int, default=NOTIFICATION_RETENTION_DAYS)
+    parser.add_argument('--compact-every', type=float, default=3600.0, help="seconds between compactions")
+    args = parser.parse_args()
+    deliver_notifications(args.batch_size, args.interval, args.once,
+                          args.retention_days, args.compact_every)
@@ -0,0 +1,41 @@
+import sys
+import pickle
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import SONG_MODEL, MOVIE_MODEL, SERIES_MODEL
+from src.recommender.title_index import TitleIndex
+
+
+# model path -> (DataFrame key, title column, strip spaces)
+MODELS = {
+    MOVIE_MODEL: ('movies', 'title', False),
+    SONG_MODEL: ('songs', 'SongName', True),
+    SERIES_MODEL: ('shows', 'Series Title', False),
+}
+
+
+def index_models():
+    """Store a prebuilt TitleIndex inside each recommendation pickle"""
+    for path, (frame, column, strip_spaces) in MODELS.items():
+        if not path.exists():
+            print(f"[WARNING] Model not found at: {path}")
+            continue
+        
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        
+        index = TitleIndex.build(data[frame][column].tolist(), strip_spaces=strip_spaces)
+        data['title_index'] = index
+        
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+        
+        print(f"[OK] {path.name}: indexed {len(index)} titles")
+
+
+if __name__ == "__main__":
+    index_models()
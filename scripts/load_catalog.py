@@ -0,0 +1,99 @@
+import sys
+import time
+import argparse
+import unicodedata
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.manager import DatabaseManager, title_key
+from src.models.db_models import Media
+from src.recommender.builder import DATASETS, iter_rows
+
+
+TITLE_LENGTH = Media.__table__.c.title.type.length
+
+
+def clean_title(title):
+    """Display form of a catalog title: NFC, single spaces, column length"""
+    title = unicodedata.normalize('NFC', ' '.join((title or '').split()))
+    return title[:TITLE_LENGTH]
+
+
+def catalog_titles(path, column, stats):
+    """Stream cleaned, non-blank titles from a CSV"""
+    for row in iter_rows(path):
+        stats['read'] += 1
+        title = clean_title(row.get(column))
+        if not title:
+            stats['blank'] += 1
+            continue
+        yield title
+
+
+def new_titles(db, media_type, chunk, stats):
+    """Titles of a chunk not already in the database or earlier in the chunk,
+    compared by title_key() like the database lookup. Earlier chunks are
+    committed by then, so only the chunk's own keys are looked up and
+    memory stays bounded."""
+    existing = {title_key(title) for title in db.find_media_titles(media_type, chunk)}
+    fresh = []
+    for title in chunk:
+        key = title_key(title)
+        if key in existing:
+            stats['duplicate'] += 1
+            continue
+        existing.add(key)
+        fresh.append({'title': title, 'media_type': media_type})
+    return fresh
+
+
+def load_catalog(media_types, chunk_size=5000, csv_path=None, db=None):
+    """Upsert the titles of each media type's dataset CSV into media.
+
+    Each chunk is checked against the database before it is inserted, so a
+    refresh only inserts what is new, never drops or rewrites rows, and
+    never holds more than one chunk of titles in memory.
+    """
+    db = db or DatabaseManager()
+    db.create_tables()
+    totals = {}
+
+    for media_type in media_types:
+        spec = DATASETS[media_type]
+        path = Path(csv_path or spec['csv'])
+        if not path.exists():
+            print(f"[WARNING] {path} not found, skipping {media_type}")
+            continue
+
+        start = time.time()
+        stats = {'read': 0, 'blank': 0, 'duplicate': 0, 'inserted': 0}
+
+        chunk = []
+        for title in catalog_titles(path, spec['title'], stats):
+            chunk.append(title)
+            if len(chunk) >= chunk_size:
+                stats['inserted'] += db.upsert_media(new_titles(db, media_type, chunk, stats))
+                chunk = []
+        stats['inserted'] += db.upsert_media(new_titles(db, media_type, chunk, stats))
+
+        duration = time.time() - start
+        print(f"[OK] {media_type}: {stats['inserted']} inserted from {stats['read']} rows "
+              f"({stats['duplicate']} duplicate or already loaded, {stats['blank']} blank) "
+              f"in {duration:.2f}s, {stats['read'] / max(duration, 1e-9):,.0f} rows/s")
+        totals[media_type] = stats
+
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally load media titles from the datasets/ CSVs")
+    parser.add_argument('--type', choices=list(DATASETS), action='append',
+                        help="media type to load (repeatable; default: all)")
+    parser.add_argument('--csv', help="CSV to read instead of the configured dataset (needs one --type)")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="rows per executemany/transaction")
+    args = parser.parse_args()
+
+    if args.csv and len(args.type or []) != 1:
+        parser.error("--csv needs exactly one --type")
+    load_catalog(args.type or list(DATASETS), args.chunk_size, args.csv)
@@ -0,0 +1,115 @@
+import sys
+import time
+import json
+import random
+import asyncio
+import argparse
+import statistics
+from urllib.parse import quote
+
+# Read-only mix by default; --writes adds review POSTs
+READ_PATHS = [
+    '/health',
+    '/top-rated?media_type=movie&limit=5',
+    '/top-rated?media_type=song&limit=5',
+    '/search?title={title}&media_type=movie',
+    '/recommendations?media_type=movie&title={title}&top_n=5',
+]
+TITLES = ['Inception', 'The Matrix', 'Titanic', 'Avatar', 'Interstellar']
+WRITERS = [f"load{i}" for i in range(100)]
+
+
+async def request(reader, writer, host, method, path, body=None):
+    """One request on a keep-alive connection; returns the status code"""
+    payload = json.dumps(body).encode() if body is not None else b''
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def create_writers(host, port):
+    """Register the users that --writes reviews as; 409 means they already exist"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for username in WRITERS:
+            status = await request(reader, writer, host, 'POST', '/users', {'username': username})
+            if status not in (201, 409):
+                print(f"[ERROR] Creating load test user '{username}' returned {status}")
+                return False
+    finally:
+        writer.close()
+    return True
+
+
+async def client(host, port, deadline, writes, latencies, errors, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            title = quote(rng.choice(TITLES))
+            if writes and rng.random() < writes:
+                method, path = 'POST', '/reviews'
+                body = {'username': rng.choice(WRITERS), 'title': rng.choice(TITLES),
+                        'media_type': 'movie', 'rating': rng.randint(1, 5), 'review_text': 'load test'}
+            else:
+                method, path, body = 'GET', rng.choice(READ_PATHS).format(title=title), None
+
+            start = time.perf_counter()
+            status = await request(reader, writer, host, method, path, body)
+            latencies.append(time.perf_counter() - start)
+            if not 200 <= status < 300:
+                errors[status] = errors.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def load_test(host, port, connections, duration, writes):
+    if writes and not await create_writers(host, port):
+        return False
+
+    latencies, errors = [], {}
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(host, port, deadline, writes, latencies, errors, random.Random(i))
+        for i in range(connections)
+    ])
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        print("[ERROR] No requests completed")
+        return False
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"{connections} connections, {duration:.0f}s, write ratio {writes:.0%}")
+    print(f"Requests: {len(latencies):,} ({len(latencies) / elapsed:,.0f} req/s)")
+    print(f"Latency:  p50 {p50:.2f}ms | p99 {p99:.2f}ms | max {latencies[-1] * 1000:.2f}ms")
+    if errors:
+        print(f"[WARNING] Failed requests by status: {errors}")
+    return not errors
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep-alive load test against a running API (run.py serve)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds")
+    parser.add_argument('--writes', type=float, default=0.0, help="fraction of requests that POST a review")
+    args = parser.parse_args()
+    ok = asyncio.run(load_test(args.host, args.port, args.connections, args.duration, args.writes))
+    sys.exit(0 if ok else 1)
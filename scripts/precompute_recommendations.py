@@ -0,0 +1,76 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.manager import DatabaseManager
+from src.services.recommendation_service import MODEL_SOURCES, RecommendationService
+
+
+_service = None
+
+
+def _recommend_chunk(media_type: str, users: list, top_n: int) -> list[dict]:
+    """Worker: personalized recommendations for a chunk of (user_id, ratings)
+    pairs, exactly as served live by recommend_for_user"""
+    global _service
+    if _service is None:
+        _service = RecommendationService()
+    
+    model = _service.get_model(media_type)
+    version = model.version if model is not None else None
+    
+    rows = []
+    for user_id, ratings in users:
+        recommendations = _service.recommend_for_user(media_type, ratings, top_n)
+        # Highest-rated title, kept for reference
+        seed_title = max(ratings, key=ratings.get)
+        for rank, rec in enumerate(recommendations or [], 1):
+            rows.append({
+                'user_id': user_id,
+                'media_type': media_type,
+                'rank': rank,
+                'seed_title': seed_title,
+                'title': rec['title'],
+                'score': rec['score'],
+                'model_version': version
+            })
+    return rows
+
+
+def precompute_recommendations(top_n: int = 5, workers: int = None, chunk_size: int = 2000):
+    """Store every user's recommend_for_user results, so the CLI and API can
+    serve them without recomputing while the model version matches"""
+    db = DatabaseManager()
+    db.create_tables()
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for media_type in MODEL_SOURCES:
+            start = time.time()
+            futures, chunk, users = [], [], 0
+            for user in db.iter_user_ratings(media_type):
+                chunk.append(user)
+                users += 1
+                if len(chunk) >= chunk_size:
+                    futures.append(executor.submit(_recommend_chunk, media_type, chunk, top_n))
+                    chunk = []
+            if chunk:
+                futures.append(executor.submit(_recommend_chunk, media_type, chunk, top_n))
+            rows = [row for future in futures for row in future.result()]
+            
+            stored = db.replace_user_recommendations(media_type, rows)
+            print(f"{media_type}: {users} users, {stored} rows stored in {time.time() - start:.2f}s")
+    
+    db.close_session()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute recommendations for every user")
+    parser.add_argument('--top-n', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help="process pool size")
+    parser.add_argument('--chunk-size', type=int, default=2000, help="users per task")
+    args = parser.parse_args()
+    precompute_recommendations(args.top_n, args.workers, args.chunk_size)
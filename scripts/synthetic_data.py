@@ -0,0 +1,156 @@
+import sys
+import json
+import time
+import tempfile
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import insert
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.manager import DatabaseManager
+from src.models.db_models import Base, User, Media, Review, Favorite
+
+
+MEDIA_TYPES = ['movie', 'song', 'webshow']
+ADJECTIVES = ['Silent', 'Broken', 'Golden', 'Last', 'Hidden', 'Electric', 'Midnight', 'Wild',
+              'Lost', 'Crimson', 'Endless', 'Frozen', 'Burning', 'Secret', 'Distant', 'Lonely']
+NOUNS = ['River', 'Empire', 'Heart', 'City', 'Dream', 'Storm', 'Garden', 'Shadow',
+         'Kingdom', 'Road', 'Ocean', 'Machine', 'Summer', 'Letter', 'Mountain', 'Signal']
+TEXTS = ['Loved it.', 'Not for me.', 'Solid, would revisit.', 'Overrated.', 'A masterpiece.',
+         'Fine for a weekend.', 'The ending fell flat.', 'Better than expected.']
+
+# Fixed epoch, so the same seed always produces the same rows
+EPOCH = datetime(2026, 1, 1)
+SPAN_DAYS = 90
+CHUNK_SIZE = 50_000
+
+DEFAULT_DB = Path(tempfile.gettempdir()) / 'media_review_bench.db'
+
+
+def open_db(path):
+    """DatabaseManager bound to a database other than DB_URL"""
+    return DatabaseManager(f"sqlite:///{path}")
+
+
+def zipf_weights(n, exponent, rng):
+    """Probabilities where the i-th most popular of n items has weight 1 / i^exponent,
+    with popularity ranks shuffled over the items"""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return rng.permutation(weights / weights.sum())
+
+
+def media_titles(media_type, count):
+    return [
+        f"{ADJECTIVES[i % len(ADJECTIVES)]} {NOUNS[(i // len(ADJECTIVES)) % len(NOUNS)]} {media_type[0].upper()}{i}"
+        for i in range(count)
+    ]
+
+
+def _insert_chunks(session, table, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        session.execute(insert(table), rows[start:start + CHUNK_SIZE])
+
+
+def generate(path=DEFAULT_DB, users=10_000, media_per_type=20_000, reviews=200_000,
+             favorites_per_user=3.0, zipf=1.1, seed=0):
+    """Create a fresh database of synthetic users, media, reviews and favorites.
+
+    Media popularity and user activity are both Zipfian, each media item has
+    a hidden quality that its ratings scatter around, and timestamps cover
+    SPAN_DAYS in review_id order. The same arguments always produce the
+    same rows. Returns the generator parameters, stored next to the database.
+    """
+    params = {
+        'users': users, 'media_per_type': media_per_type, 'reviews': reviews,
+        'favorites_per_user': favorites_per_user, 'zipf': zipf, 'seed': seed
+    }
+    path = Path(path)
+    path.unlink(missing_ok=True)
+    rng = np.random.default_rng(seed)
+
+    db = open_db(path)
+    Base.metadata.create_all(db.engine)
+    media_count = media_per_type * len(MEDIA_TYPES)
+
+    with db.session_scope() as session:
+        _insert_chunks(session, User, [
+            {'user_id': i + 1, 'username': f"user{i}", 'created_at': EPOCH} for i in range(users)
+        ])
+        media_rows = []
+        for t, media_type in enumerate(MEDIA_TYPES):
+            for i, title in enumerate(media_titles(media_type, media_per_type)):
+                media_rows.append({'media_id': t * media_per_type + i + 1, 'title': title,
+                                   'media_type': media_type, 'created_at': EPOCH})
+        _insert_chunks(session, Media, media_rows)
+        del media_rows
+
+        media_p = zipf_weights(media_count, zipf, rng)
+        user_p = zipf_weights(users, zipf, rng)
+        quality = np.clip(rng.normal(3.5, 0.7, media_count), 1.0, 5.0)
+
+        # Reviews in chunks, so 1M+ rows never sit in memory as dicts at once
+        seconds = np.sort(rng.integers(0, SPAN_DAYS * 86400, reviews))
+        for start in range(0, reviews, CHUNK_SIZE):
+            n = min(CHUNK_SIZE, reviews - start)
+            media_ids = rng.choice(media_count, n, p=media_p)
+            user_ids = rng.choice(users, n, p=user_p)
+            ratings = np.clip(np.round((quality[media_ids] + rng.normal(0, 0.8, n)) * 2) / 2, 1.0, 5.0)
+            texts = rng.integers(0, len(TEXTS), n)
+            session.execute(insert(Review), [
+                {
+                    'review_id': start + i + 1,
+                    'media_id': int(media_ids[i]) + 1,
+                    'user_id': int(user_ids[i]) + 1,
+                    'rating': float(ratings[i]),
+                    'review_text': TEXTS[texts[i]],
+                    'created_at': EPOCH + timedelta(seconds=int(seconds[start + i])),
+                    'updated_at': EPOCH + timedelta(seconds=int(seconds[start + i])),
+                }
+                for i in range(n)
+            ])
+
+        # Favorites follow media popularity; (user, media) pairs are unique
+        counts = rng.poisson(favorites_per_user, users)
+        fav_users = np.repeat(np.arange(users), counts)
+        fav_media = rng.choice(media_count, len(fav_users), p=media_p)
+        pairs = np.unique(fav_users.astype(np.int64) * media_count + fav_media)
+        _insert_chunks(session, Favorite, [
+            {'user_id': int(p // media_count) + 1, 'media_id': int(p % media_count) + 1, 'created_at': EPOCH}
+            for p in pairs
+        ])
+        params['favorites'] = len(pairs)
+
+    db.rebuild_rating_rollups()
+    db.engine.dispose()
+    Path(f"{path}.json").write_text(json.dumps(params, indent=2))
+    return params
+
+
+def load_or_generate(path=DEFAULT_DB, **kwargs):
+    """Reuse the database at path if it was generated with the same arguments"""
+    meta = Path(f"{path}.json")
+    if Path(path).exists() and meta.exists():
+        params = json.loads(meta.read_text())
+        if all(params.get(k) == v for k, v in kwargs.items()):
+            return params
+    return generate(path, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic review database")
+    parser.add_argument('--db', default=str(DEFAULT_DB), help="SQLite file to (re)create")
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--media', type=int, default=20_000, help="titles per media type")
+    parser.add_argument('--reviews', type=int, default=200_000)
+    parser.add_argument('--favorites', type=float, default=3.0, help="mean favorites per user")
+    parser.add_argument('--zipf', type=float, default=1.1, help="popularity and activity skew")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    params = generate(args.db, args.users, args.media, args.reviews, args.favorites, args.zipf, args.seed)
+    print(f"[OK] Generated {args.db} in {time.perf_counter() - start:.1f}s: {params}")
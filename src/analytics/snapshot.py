@@ -0,0 +1,241 @@
+"""Columnar in-memory snapshot of reviews for ad-hoc analytics.
+
+Reviews are held as NumPy columns: int32 ids, float32 ratings (NaN for
+unrated reviews) and int64 Unix seconds. Media types are an array indexed
+by media_id, and titles and usernames are dicts keyed by id. Aggregations
+such as per-user averages, rating distributions or the most active
+reviewers are bincounts and masks over these columns, so they never run
+GROUP BYs against SQLite or compete with live writes.
+
+refresh() streams only the reviews past the review_id watermark and appends
+them to buffers that grow by doubling. It then publishes a new set of column
+views in a single assignment, so readers always see a consistent snapshot.
+Deleted or edited reviews are only picked up by refresh(full=True).
+"""
+import calendar
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+import numpy as np
+
+MEDIA_TYPES = ('movie', 'song', 'webshow')
+STARS = range(1, 6)
+
+REVIEW_COLUMNS = {
+    'review_id': np.int32,
+    'user_id': np.int32,
+    'media_id': np.int32,
+    'rating': np.float32,
+    'created_at': np.int64,
+}
+
+
+class Columns(NamedTuple):
+    review_id: np.ndarray
+    user_id: np.ndarray
+    media_id: np.ndarray
+    rating: np.ndarray
+    created_at: np.ndarray
+    media_type: np.ndarray  # MEDIA_TYPES index by media_id, -1 if unknown
+    titles: Dict[int, str]
+    usernames: Dict[int, str]
+
+
+def _grown(array: np.ndarray, size: int, fill=0) -> np.ndarray:
+    """array, or a copy with room for at least size entries"""
+    if size <= len(array):
+        return array
+    grown = np.full(max(size, 2 * len(array), 1024), fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _stars(ratings: np.ndarray) -> np.ndarray:
+    """Nearest whole star of each rating, as in DatabaseManager's rollups"""
+    return np.clip(np.floor(ratings + 0.5), 1, 5).astype(np.int64)
+
+
+class ReviewSnapshot:
+    def __init__(self):
+        self._refresh_lock = threading.Lock()
+        self.refreshed_at: Optional[float] = None
+        self._start()
+        self._publish()
+
+    def _start(self):
+        """Empty buffers; the published columns are left untouched"""
+        self._buffers = {name: np.empty(0, dtype) for name, dtype in REVIEW_COLUMNS.items()}
+        self._size = 0
+        self._media_type = np.empty(0, np.int8)
+        self._titles: Dict[int, str] = {}
+        self._usernames: Dict[int, str] = {}
+        self._last_media_id = 0
+        self._last_user_id = 0
+        self.watermark = 0
+
+    def _publish(self):
+        self.columns = Columns(
+            *(self._buffers[name][:self._size] for name in REVIEW_COLUMNS),
+            self._media_type, self._titles, self._usernames
+        )
+
+    def __len__(self) -> int:
+        return len(self.columns.review_id)
+
+    # Loading
+    def refresh(self, db, full: bool = False) -> int:
+        """Load reviews past the watermark (or everything, with full=True).
+        Returns the number of reviews added."""
+        with self._refresh_lock:
+            return self._refresh(db, full)
+
+    def refresh_if_stale(self, db, max_age: float) -> bool:
+        """Refresh when older than max_age seconds. While another thread is
+        refreshing, callers read the current snapshot instead of waiting
+        (except before the first load)."""
+        if self.refreshed_at is not None and time.time() - self.refreshed_at < max_age:
+            return False
+        if not self._refresh_lock.acquire(blocking=self.refreshed_at is None):
+            return False
+        try:
+            if self.refreshed_at is not None and time.time() - self.refreshed_at < max_age:
+                return False
+            self._refresh(db)
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self, db, full: bool = False) -> int:
+        if full:
+            self._start()
+        before = self._size
+
+        # Reviews first, so every media_id and user_id they use is loaded below
+        for rows in db.iter_review_columns(self.watermark):
+            self._append(rows)
+
+        media_ids, codes = [], []
+        for media_id, title, media_type, _ in db.iter_media(after_media_id=self._last_media_id):
+            self._titles[media_id] = title
+            media_ids.append(media_id)
+            codes.append(MEDIA_TYPES.index(media_type) if media_type in MEDIA_TYPES else -1)
+        if media_ids:
+            self._media_type = _grown(self._media_type, media_ids[-1] + 1, fill=-1)
+            self._media_type[media_ids] = codes
+            self._last_media_id = media_ids[-1]
+
+        for user_id, username in db.iter_users(self._last_user_id):
+            self._usernames[user_id] = username
+            self._last_user_id = user_id
+
+        self._publish()
+        self.refreshed_at = time.time()
+        return self._size - before
+
+    def _append(self, rows: List[tuple]):
+        end = self._size + len(rows)
+        values = list(zip(*rows))
+        values[4] = [seconds or 0 for seconds in values[4]]  # NULL created_at
+        for (name, dtype), column in zip(REVIEW_COLUMNS.items(), values):
+            buffer = self._buffers[name] = _grown(self._buffers[name], end)
+            buffer[self._size:end] = np.array(column, dtype=dtype)
+        self._size = end
+        self.watermark = int(rows[-1][0])
+
+    # Aggregations
+    def _mask(self, c: Columns, media_type: Optional[str] = None,
+              since: Optional[datetime] = None, rated: bool = False) -> np.ndarray:
+        mask = np.ones(len(c.review_id), dtype=bool)
+        if media_type:
+            mask &= c.media_type[c.media_id] == MEDIA_TYPES.index(media_type)
+        if since is not None:
+            mask &= c.created_at >= calendar.timegm(since.timetuple())
+        if rated:
+            mask &= ~np.isnan(c.rating)
+        return mask
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals, per-type review counts and averages, and the time range"""
+        c = self.columns
+        rated = ~np.isnan(c.rating)
+        types = {}
+        for code, media_type in enumerate(MEDIA_TYPES):
+            of_type = c.media_type[c.media_id] == code
+            ratings = c.rating[of_type & rated]
+            types[media_type] = {
+                'reviews': int(of_type.sum()),
+                'avg_rating': round(float(ratings.mean()), 3) if len(ratings) else None,
+            }
+        return {
+            'reviews': len(c.review_id),
+            'rated_reviews': int(rated.sum()),
+            'users': len(c.usernames),
+            'media': len(c.titles),
+            'by_type': types,
+            'first_review_at': int(c.created_at.min()) if len(c.created_at) else None,
+            'last_review_at': int(c.created_at.max()) if len(c.created_at) else None,
+            'watermark': self.watermark,
+            'refreshed_at': self.refreshed_at,
+        }
+
+    def user_averages(self, media_type: Optional[str] = None, min_reviews: int = 1,
+                      limit: int = 20) -> List[Dict[str, Any]]:
+        """Users with the highest average rating given, among those with at
+        least min_reviews rated reviews"""
+        c = self.columns
+        mask = self._mask(c, media_type, rated=True)
+        users, ratings = c.user_id[mask], c.rating[mask]
+        counts = np.bincount(users)
+        sums = np.bincount(users, weights=ratings)
+
+        eligible = np.flatnonzero(counts >= max(min_reviews, 1))
+        averages = sums[eligible] / counts[eligible]
+        order = np.lexsort((-counts[eligible], -averages))[:limit]
+        return [
+            {'username': c.usernames.get(int(u)), 'reviews': int(counts[u]), 'avg_rating': round(float(a), 3)}
+            for u, a in zip(eligible[order], averages[order])
+        ]
+
+    def rating_distribution(self, media_type: Optional[str] = None,
+                            since: Optional[datetime] = None) -> Dict[str, Dict[int, int]]:
+        """Star histogram per media type (or of one type)"""
+        c = self.columns
+        types = [media_type] if media_type else MEDIA_TYPES
+        distribution = {}
+        for name in types:
+            mask = self._mask(c, name, since, rated=True)
+            counts = np.bincount(_stars(c.rating[mask]), minlength=6)
+            distribution[name] = {star: int(counts[star]) for star in STARS}
+        return distribution
+
+    def most_active_reviewers(self, media_type: Optional[str] = None, since: Optional[datetime] = None,
+                              limit: int = 10) -> List[Dict[str, Any]]:
+        c = self.columns
+        mask = self._mask(c, media_type, since)
+        counts = np.bincount(c.user_id[mask])
+        if not len(counts):
+            return []
+
+        top = np.argpartition(-counts, min(limit, len(counts) - 1))[:limit]
+        top = top[np.lexsort((top, -counts[top]))]
+        return [
+            {'username': c.usernames.get(int(u)), 'reviews': int(counts[u])}
+            for u in top if counts[u] > 0
+        ]
+
+    def top_media(self, media_type: str, min_reviews: int = 3, limit: int = 10) -> List[Dict[str, Any]]:
+        """Highest average rating of a type, among media with enough ratings"""
+        c = self.columns
+        mask = self._mask(c, media_type, rated=True)
+        media, ratings = c.media_id[mask], c.rating[mask]
+        counts = np.bincount(media)
+        sums = np.bincount(media, weights=ratings)
+
+        eligible = np.flatnonzero(counts >= max(min_reviews, 1))
+        averages = sums[eligible] / counts[eligible]
+        order = np.lexsort((-counts[eligible], -averages))[:limit]
+        return [
+            {'title': c.titles.get(int(m)), 'reviews': int(counts[m]), 'avg_rating': round(float(a), 3)}
+            for m, a in zip(eligible[order], averages[order])
+        ]
@@ -0,0 +1,504 @@
+"""HTTP/JSON API over the review, user and recommendation services.
+
+A small HTTP/1.1 server on asyncio streams, so it needs no web framework.
+The event loop only parses requests and writes responses. Every service
+call runs in a fixed-size thread pool, because the services block on
+SQLite, Redis and NumPy. Each pool thread has its own DatabaseManager, and
+its session is closed after every request. Connections stay open between
+requests until idle for API_KEEPALIVE_TIMEOUT. A request that takes longer
+than API_REQUEST_TIMEOUT gets a 504.
+
+Routes:
+    GET    /health
+    POST   /users                                 {"username"}
+    GET    /users/{username}/reviews
+    GET    /users/{username}/favorites
+    POST   /users/{username}/favorites            {"title", "media_type"}
+    DELETE /users/{username}/favorites?title=&media_type=
+    GET    /users/{username}/notifications?limit=&before_id=
+    GET    /users/{username}/recommendations?media_type=
+    GET    /reviews?title=&media_type=
+    POST   /reviews                               {"username", "title", "media_type", "rating", "review_text"}
+    GET    /search?title=&media_type=
+    GET    /top-rated?media_type=&limit=
+    GET    /trending?media_type=&hours=&limit=
+    GET    /recommendations?media_type=&title=&top_n=&strategy=
+    GET    /analytics/{report}?media_type=&limit=&min_reviews=&days=
+    GET    /debug/profile?limit=
+    POST   /debug/profile                         {"enabled", "reset"}
+"""
+import asyncio
+import json
+import re
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+from config.settings import (
+    API_HOST, API_PORT, API_WORKERS, API_REQUEST_TIMEOUT, API_KEEPALIVE_TIMEOUT, API_MAX_BODY,
+    ANALYTICS_REFRESH_INTERVAL
+)
+from src.services.recommendation_service import STRATEGIES
+
+MEDIA_TYPES = ('movie', 'song', 'webshow')
+MAX_HEADERS = 100
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    def __init__(self, method: str, target: str, version: str,
+                 headers: Dict[str, str], body: bytes):
+        url = urlsplit(target)
+        self.method = method
+        self.path = unquote(url.path)
+        self.query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def json(self) -> Dict[str, Any]:
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400, "Body is not valid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        return data
+
+    def param(self, name: str, default: Any = None, cast: Callable = str) -> Any:
+        """Query parameter by name; required when no default is given"""
+        if name not in self.query:
+            if default is None:
+                raise HTTPError(400, f"Missing query parameter '{name}'")
+            return default
+        try:
+            return cast(self.query[name])
+        except ValueError:
+            raise HTTPError(400, f"Invalid value for '{name}'")
+
+
+def _require(data: Dict[str, Any], *names: str):
+    missing = [name for name in names if data.get(name) in (None, '')]
+    if missing:
+        raise HTTPError(400, f"Missing field(s): {', '.join(missing)}")
+
+
+def _media_type(value: str) -> str:
+    if value not in MEDIA_TYPES:
+        raise HTTPError(400, f"media_type must be one of {', '.join(MEDIA_TYPES)}")
+    return value
+
+
+def _review_dict(review) -> Dict[str, Any]:
+    return {
+        'review_id': review.review_id,
+        'username': review.user.username,
+        'title': review.media.title,
+        'media_type': review.media.media_type,
+        'rating': review.rating,
+        'review_text': review.review_text,
+        'created_at': review.created_at,
+    }
+
+
+def _media_dict(media) -> Dict[str, Any]:
+    return {'media_id': media.media_id, 'title': media.title, 'media_type': media.media_type}
+
+
+class ApiServer:
+    """Routes HTTP requests to the services on a bounded thread pool"""
+
+    def __init__(self, host: str = API_HOST, port: int = API_PORT, workers: int = API_WORKERS,
+                 request_timeout: float = API_REQUEST_TIMEOUT,
+                 keepalive_timeout: float = API_KEEPALIVE_TIMEOUT, max_body: int = API_MAX_BODY):
+        from src.analytics.snapshot import ReviewSnapshot
+        from src.database.manager import DatabaseManager
+        from src.patterns.observer import notification_subject
+        from src.recommender.collaborative import CollaborativeFilter
+        from src.services.recommendation_service import RecommendationService
+
+        self.host = host
+        self.port = port
+        self.request_timeout = request_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body = max_body
+        self.started_at = time.time()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        db = DatabaseManager()
+        db.create_tables()
+        # Followers are resolved from memory and get an observer, as in the CLI
+        notification_subject.load_favorites(db.iter_favorites())
+        self.recommendations = RecommendationService(preload=True, collaborative=CollaborativeFilter(db))
+        self._local = threading.local()
+        self.snapshot = ReviewSnapshot()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._routes: List[Tuple[str, re.Pattern, Callable]] = [
+            ('GET', re.compile(r'/health'), self.health),
+            ('POST', re.compile(r'/users'), self.create_user),
+            ('GET', re.compile(r'/users/(?P<username>[^/]+)/reviews'), self.user_reviews),
+            ('GET', re.compile(r'/users/(?P<username>[^/]+)/favorites'), self.favorites),
+            ('POST', re.compile(r'/users/(?P<username>[^/]+)/favorites'), self.add_favorite),
+            ('DELETE', re.compile(r'/users/(?P<username>[^/]+)/favorites'), self.remove_favorite),
+            ('GET', re.compile(r'/users/(?P<username>[^/]+)/notifications'), self.notifications),
+            ('GET', re.compile(r'/users/(?P<username>[^/]+)/recommendations'), self.user_recommendations),
+            ('GET', re.compile(r'/reviews'), self.media_reviews),
+            ('POST', re.compile(r'/reviews'), self.add_review),
+            ('GET', re.compile(r'/search'), self.search),
+            ('GET', re.compile(r'/top-rated'), self.top_rated),
+            ('GET', re.compile(r'/trending'), self.trending),
+            ('GET', re.compile(r'/recommendations'), self.recommend),
+            ('GET', re.compile(r'/analytics/(?P<report>[a-z-]+)'), self.analytics),
+            ('GET', re.compile(r'/debug/profile'), self.profile),
+            ('POST', re.compile(r'/debug/profile'), self.toggle_profile),
+        ]
+
+    # Per-thread services; DatabaseManager sessions must not be shared
+    def _services(self):
+        if not hasattr(self._local, 'db'):
+            from src.database.manager import DatabaseManager
+            from src.services.review_service import ReviewService
+            from src.services.user_service import UserService
+            self._local.db = DatabaseManager()
+            self._local.reviews = ReviewService(self._local.db)
+            self._local.users = UserService(self._local.db)
+        return self._local
+
+    def _call(self, handler: Callable, request: Request, params: Dict[str, str]):
+        """Run a handler on a pool thread"""
+        try:
+            return handler(request, **params)
+        finally:
+            if hasattr(self._local, 'db'):
+                self._local.db.close_session()
+
+    # Handlers: return a payload, or (status, payload)
+    def health(self, request: Request):
+        return {
+            'status': 'ok',
+            'uptime': round(time.time() - self.started_at, 1),
+            'models': self.recommendations.status(),
+        }
+
+    def create_user(self, request: Request):
+        data = request.json()
+        _require(data, 'username')
+        success, message = self._services().users.register_user(data['username'])
+        return (201 if success else 409), {'success': success, 'message': message}
+
+    def user_reviews(self, request: Request, username: str):
+        services = self._services()
+        if not services.db.get_user(username):
+            raise HTTPError(404, f"User '{username}' not found")
+        return {'reviews': [_review_dict(r) for r in services.db.get_reviews_by_user(username)]}
+
+    def favorites(self, request: Request, username: str):
+        services = self._services()
+        if not services.db.get_user(username):
+            raise HTTPError(404, f"User '{username}' not found")
+        return {'favorites': [_media_dict(m) for m in services.users.get_favorites(username)]}
+
+    def add_favorite(self, request: Request, username: str):
+        data = request.json()
+        _require(data, 'title', 'media_type')
+        success, message = self._services().users.add_to_favorites(
+            username, data['title'], _media_type(data['media_type'])
+        )
+        return (201 if success else 409), {'success': success, 'message': message}
+
+    def remove_favorite(self, request: Request, username: str):
+        success, message = self._services().users.remove_from_favorites(
+            username, request.param('title'), _media_type(request.param('media_type'))
+        )
+        return (200 if success else 404), {'success': success, 'message': message}
+
+    def notifications(self, request: Request, username: str):
+        db = self._services().db
+        if not db.get_user(username):
+            raise HTTPError(404, f"User '{username}' not found")
+        page = db.get_inbox(
+            username, limit=min(request.param('limit', 20, int), 100),
+            before_id=request.param('before_id', cast=int) if request.query.get('before_id') else None
+        )
+        return {
+            'unread': db.get_unread_count(username),
+            'notifications': page,
+            'next_before_id': page[-1]['notification_id'] if page else None,
+        }
+
+    def user_recommendations(self, request: Request, username: str):
+        db = self._services().db
+        media_type = _media_type(request.param('media_type'))
+        if not db.get_user(username):
+            raise HTTPError(404, f"User '{username}' not found")
+
+        ratings = db.get_user_ratings(username, media_type)
+        if not ratings:
+            return {'source': 'live', 'recommendations': []}
+
+        # Same rules as the CLI: precomputed recommend_for_user rows are used
+        # while the model version matches and none of them has been rated since
+        version = self.recommendations.model_version(media_type)
+        precomputed = db.get_user_recommendations(username, media_type)
+        if precomputed and all(rec.model_version == version and rec.title not in ratings
+                               for rec in precomputed):
+            return {
+                'source': 'precomputed',
+                'recommendations': [{'title': r.title, 'score': r.score} for r in precomputed],
+            }
+
+        recommendations = self.recommendations.recommend_for_user(media_type, ratings, top_n=5)
+        return {'source': 'live', 'recommendations': recommendations or []}
+
+    def media_reviews(self, request: Request):
+        reviews = self._services().db.get_reviews_by_media(
+            request.param('title'), _media_type(request.param('media_type'))
+        )
+        return {'reviews': [_review_dict(r) for r in reviews]}
+
+    def add_review(self, request: Request):
+        data = request.json()
+        _require(data, 'username', 'title', 'media_type', 'rating')
+        try:
+            rating = float(data['rating'])
+        except (TypeError, ValueError):
+            raise HTTPError(400, "rating must be a number")
+        if not 1.0 <= rating <= 5.0:
+            raise HTTPError(400, "rating must be between 1.0 and 5.0")
+
+        success, message = self._services().reviews.add_review_threaded(
+            data['username'], data['title'], _media_type(data['media_type']),
+            rating, data.get('review_text') or ''
+        )
+        return (201 if success else 404), {'success': success, 'message': message}
+
+    def search(self, request: Request):
+        results = self._services().db.search_by_title(
+            request.param('title'), _media_type(request.param('media_type'))
+        )
+        return {'results': [_media_dict(m) for m in results]}
+
+    def top_rated(self, request: Request):
+        media_type = _media_type(request.param('media_type'))
+        limit = min(request.param('limit', 5, int), 100)
+        return {'results': self._services().reviews.get_top_rated_cached(media_type, limit)}
+
+    def trending(self, request: Request):
+        media_type = _media_type(request.param('media_type'))
+        hours = request.param('hours', 24, int)
+        if not 1 <= hours <= 24 * 90:
+            raise HTTPError(400, "hours must be between 1 and 2160")
+        limit = min(request.param('limit', 10, int), 100)
+        return {'hours': hours, 'results': self._services().reviews.get_trending_cached(media_type, hours, limit)}
+
+    def recommend(self, request: Request):
+        media_type = _media_type(request.param('media_type'))
+        title = request.param('title')
+        strategy = request.param('strategy', 'content')
+        if strategy not in STRATEGIES:
+            raise HTTPError(400, f"strategy must be one of {', '.join(STRATEGIES)}")
+        recommendations = self.recommendations.recommend(
+            media_type, title, min(request.param('top_n', 5, int), 50), strategy=strategy
+        )
+        if recommendations is None:
+            return 404, {
+                'message': f"No recommendations for '{title}'",
+                'suggestions': self.recommendations.suggest_titles(media_type, title),
+            }
+        return {'title': title, 'recommendations': recommendations}
+
+    def analytics(self, request: Request, report: str):
+        from datetime import datetime, timedelta
+
+        snapshot = self.snapshot
+        snapshot.refresh_if_stale(self._services().db, ANALYTICS_REFRESH_INTERVAL)
+
+        media_type = request.query.get('media_type')
+        if media_type:
+            _media_type(media_type)
+        limit = min(request.param('limit', 10, int), 100)
+        min_reviews = request.param('min_reviews', 1, int)
+        days = request.param('days', 0.0, float)
+        since = datetime.utcnow() - timedelta(days=days) if days else None
+
+        if report == 'summary':
+            return snapshot.summary()
+        if report == 'user-averages':
+            return {'results': snapshot.user_averages(media_type, min_reviews, limit)}
+        if report == 'distribution':
+            return {'distribution': snapshot.rating_distribution(media_type, since)}
+        if report == 'active-reviewers':
+            return {'results': snapshot.most_active_reviewers(media_type, since, limit)}
+        if report == 'top-media':
+            return {'results': snapshot.top_media(_media_type(request.param('media_type')), min_reviews, limit)}
+        raise HTTPError(404, f"Unknown report '{report}'")
+
+    def profile(self, request: Request):
+        from src.database.profiling import profiler
+        return profiler.report(request.param('limit', 20, int))
+
+    def toggle_profile(self, request: Request):
+        from src.database.profiling import profiler
+        data = request.json()
+        if data.get('reset'):
+            profiler.reset()
+        if data.get('enabled') is True:
+            profiler.enable()
+        elif data.get('enabled') is False:
+            profiler.disable()
+        return {'enabled': profiler.enabled, 'since': profiler.since}
+
+    # HTTP plumbing
+    def _route(self, request: Request) -> Tuple[Callable, Dict[str, str]]:
+        allowed = False
+        for method, pattern, handler in self._routes:
+            match = pattern.fullmatch(request.path.rstrip('/') or '/')
+            if match:
+                if method == request.method:
+                    return handler, match.groupdict()
+                allowed = True
+        if allowed:
+            raise HTTPError(405, f"{request.method} not allowed on {request.path}")
+        raise HTTPError(404, f"No route for {request.path}")
+
+    async def _dispatch(self, request: Request) -> Tuple[int, Any]:
+        try:
+            handler, params = self._route(request)
+            if handler == self.health:
+                result = handler(request)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self.pool, self._call, handler, request, params),
+                    self.request_timeout
+                )
+        except HTTPError as e:
+            return e.status, {'error': e.message}
+        except asyncio.TimeoutError:
+            return 504, {'error': "Request timed out"}
+        except Exception as e:
+            print(f"[ERROR] {request.method} {request.path}: {e}")
+            return 500, {'error': "Internal server error"}
+        return result if isinstance(result, tuple) else (200, result)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        """Next request on the connection, or None once the client is done"""
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not line.strip():
+            return None
+
+        parts = line.decode('latin-1').split()
+        if len(parts) != 3 or not parts[2].startswith('HTTP/'):
+            raise HTTPError(400, "Malformed request line")
+
+        headers: Dict[str, str] = {}
+        for _ in range(MAX_HEADERS + 1):
+            header = await asyncio.wait_for(reader.readline(), self.request_timeout)
+            if header in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = header.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise HTTPError(431, "Too many headers")
+
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > self.max_body:
+            raise HTTPError(413, "Request body too large")
+        body = await asyncio.wait_for(reader.readexactly(length), self.request_timeout) if length else b''
+        return Request(parts[0].upper(), parts[1], parts[2], headers, body)
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        head = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if keep_alive:
+            head.append(f"Keep-Alive: timeout={int(self.keepalive_timeout)}")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    self._write_response(writer, e.status, {'error': e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                status, payload = await self._dispatch(request)
+                self._write_response(writer, status, payload, request.keep_alive)
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"[OK] API listening on http://{self.host}:{self.port}")
+
+    async def close(self):
+        from src.patterns.observer import notification_subject
+
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self.pool.shutdown(wait=True)
+        notification_subject.shutdown()
+
+
+async def serve(host: str = API_HOST, port: int = API_PORT, workers: int = API_WORKERS):
+    """Run the API until SIGINT/SIGTERM"""
+    server = ApiServer(host, port, workers)
+    await server.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        await stop.wait()
+    finally:
+        await server.close()
+        print("[OK] API stopped")
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
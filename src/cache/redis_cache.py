@@ -1,4 +1,3 @@
-import redis
 import json
 from typing import Any, Optional
 from config.settings import REDIS_HOST, REDIS_PORT, REDIS_DB, CACHE_TTL
@@ -6,14 +5,31 @@ from config.settings import REDIS_HOST, REDIS_PORT, REDIS_DB, CACHE_TTL
 
 class RedisCache:
     def __init__(self):
-        self.client = redis.Redis(
-            host=REDIS_HOST,
-            port=REDIS_PORT,
-            db=REDIS_DB,
-            decode_responses=True
-        )
-        self.available = self.client.ping()
-        print("✅ Redis cache connected" if self.available else "⚠️ Redis unavailable")
+        # Connected on first use, so importing this module stays cheap
+        self._client = None
+        self._available: Optional[bool] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import redis
+            self._client = redis.Redis(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                db=REDIS_DB,
+                decode_responses=True
+            )
+        return self._client
+
+    @property
+    def available(self) -> bool:
+        if self._available is None:
+            try:
+                self._available = bool(self.client.ping())
+            except Exception:
+                self._available = False
+            print("✅ Redis cache connected" if self._available else "⚠️ Redis unavailable")
+        return self._available
 
     def get(self, key: str) -> Optional[Any]:
         if not self.available:
@@ -0,0 +1,317 @@
+"""Scripted command line: python run.py <command> [options]
+
+Every command writes JSON to stdout, one object per line, and anything the
+services print goes to stderr. Batch input is read from stdin with --stdin
+(JSON lines or one JSON array; plain lines of titles for recommend).
+
+Modules are imported inside the command that needs them, so parsing
+arguments or printing help never pays for SQLAlchemy, Redis or NumPy.
+"""
+import argparse
+import contextlib
+import json
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO
+
+MEDIA_TYPES = ('movie', 'song', 'webshow')
+
+# Real stdout; command bodies run with stdout redirected to stderr
+_out: TextIO = sys.stdout
+
+
+def emit(obj: Any):
+    _out.write(json.dumps(obj, default=str) + '\n')
+    _out.flush()
+
+
+def read_json_records(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """Objects from a JSON array or from JSON lines, streaming the latter"""
+    first = ''
+    for first in iter(lambda: stream.read(1), ''):
+        if not first.isspace():
+            break
+    if first == '[':
+        yield from json.loads(first + stream.read())
+        return
+
+    pending = first
+    for line in stream:
+        line = (pending + line).strip()
+        pending = ''
+        if line:
+            yield json.loads(line)
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def _add_reviews(reviews: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Add reviews one by one, creating missing users; yields one result each"""
+    from src.database.manager import DatabaseManager
+    from src.services.review_service import ReviewService
+    from src.patterns.observer import notification_subject
+
+    db = DatabaseManager()
+    db.create_tables()
+    service = ReviewService(db)
+    try:
+        for review in reviews:
+            try:
+                username = review['username']
+                title = review['title']
+                media_type = review['media_type']
+                rating = float(review['rating'])
+                if media_type not in MEDIA_TYPES:
+                    raise ValueError(f"unknown media type '{media_type}'")
+                if not 1.0 <= rating <= 5.0:
+                    raise ValueError("rating must be between 1.0 and 5.0")
+
+                if not db.get_user(username):
+                    db.add_user(username)
+                success, message = service.add_review_threaded(
+                    username, title, media_type, rating, review.get('review_text') or ''
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                success, message = False, f"Invalid review: {e}"
+            yield {'success': success, 'message': message, 'title': review.get('title')}
+    finally:
+        notification_subject.shutdown()
+        db.close_session()
+
+
+def cmd_review_add(args) -> int:
+    if args.stdin:
+        reviews = read_json_records(sys.stdin)
+    else:
+        reviews = [{
+            'username': args.user, 'title': args.title, 'media_type': args.type,
+            'rating': args.rating, 'review_text': args.text
+        }]
+
+    failed = 0
+    for result in _add_reviews(reviews):
+        failed += not result['success']
+        emit(result)
+    return 1 if failed else 0
+
+
+def cmd_import(args) -> int:
+    if args.path == '-':
+        summary = _summarize(_add_reviews(read_json_records(sys.stdin)))
+    else:
+        with open(args.path, 'r', encoding='utf-8') as f:
+            summary = _summarize(_add_reviews(read_json_records(f)))
+    emit(summary)
+    return 1 if summary['failed'] else 0
+
+
+def _summarize(results: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = {'total': 0, 'success': 0, 'failed': 0, 'errors': []}
+    for result in results:
+        summary['total'] += 1
+        if result['success']:
+            summary['success'] += 1
+        else:
+            summary['failed'] += 1
+            summary['errors'].append(result)
+    return summary
+
+
+def cmd_top_rated(args) -> int:
+    from src.database.manager import DatabaseManager
+    from src.services.review_service import ReviewService
+
+    db = DatabaseManager()
+    try:
+        results = ReviewService(db).get_top_rated_cached(args.type, args.limit)
+    finally:
+        db.close_session()
+    emit({'media_type': args.type, 'results': results})
+    return 0
+
+
+def cmd_trending(args) -> int:
+    from src.database.manager import DatabaseManager
+    from src.services.review_service import ReviewService
+
+    db = DatabaseManager()
+    try:
+        results = ReviewService(db).get_trending_cached(args.type, args.hours, args.limit)
+    finally:
+        db.close_session()
+    emit({'media_type': args.type, 'hours': args.hours, 'results': results})
+    return 0
+
+
+def cmd_recommend(args) -> int:
+    from src.services.recommendation_service import RecommendationService
+
+    collaborative = None
+    if args.strategy != 'content':
+        from src.database.manager import DatabaseManager
+        from src.recommender.collaborative import CollaborativeFilter
+        collaborative = CollaborativeFilter(DatabaseManager())
+    service = RecommendationService(collaborative=collaborative, watch_interval=0)
+
+    titles = [line.strip() for line in sys.stdin if line.strip()] if args.stdin else [args.title]
+    missing = 0
+    for title in titles:
+        recommendations = service.recommend(args.type, title, args.top_n, strategy=args.strategy)
+        missing += recommendations is None
+        emit({'title': title, 'found': recommendations is not None,
+              'recommendations': recommendations or []})
+    return 1 if missing else 0
+
+
+def cmd_export(args) -> int:
+    from datetime import datetime
+    from src.database.export import export_table
+    from src.database.manager import DatabaseManager
+
+    try:
+        since = datetime.fromisoformat(args.since) if args.since else None
+        summary = export_table(
+            DatabaseManager(), args.table, args.output, args.format, stream=_out,
+            media_type=args.type, after_id=args.since_id, since=since,
+            watermark_path=args.watermark, batch_size=args.batch_size,
+            row_group_size=args.row_group_size
+        )
+    except (RuntimeError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    if args.output:
+        emit(summary)
+    return 0
+
+
+def cmd_analytics(args) -> int:
+    from datetime import datetime, timedelta
+    from src.analytics.snapshot import ReviewSnapshot
+    from src.database.manager import DatabaseManager
+
+    snapshot = ReviewSnapshot()
+    snapshot.refresh(DatabaseManager())
+    since = datetime.utcnow() - timedelta(days=args.days) if args.days else None
+
+    if args.report == 'summary':
+        result = snapshot.summary()
+    elif args.report == 'user-averages':
+        result = snapshot.user_averages(args.type, args.min_reviews, args.limit)
+    elif args.report == 'distribution':
+        result = snapshot.rating_distribution(args.type, since)
+    elif args.report == 'active-reviewers':
+        result = snapshot.most_active_reviewers(args.type, since, args.limit)
+    else:
+        if not args.type:
+            print("[ERROR] top-media needs --type")
+            return 1
+        result = snapshot.top_media(args.type, args.min_reviews, args.limit)
+    emit({'report': args.report, 'result': result})
+    return 0
+
+
+def cmd_serve(args) -> int:
+    import asyncio
+    from src.api.server import serve
+
+    options = {name: getattr(args, name) for name in ('host', 'port', 'workers')}
+    asyncio.run(serve(**{name: value for name, value in options.items() if value is not None}))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='run.py', description="Media Review System commands "
+                                     "(run without arguments for the interactive menu)")
+    parser.add_argument('--profile', action='store_true',
+                        help="print SQL and method timings to stderr when the command finishes")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    review = commands.add_parser('review', help="manage reviews")
+    review_commands = review.add_subparsers(dest='review_command', required=True)
+    add = review_commands.add_parser('add', help="add a review, or JSON reviews from stdin")
+    add.add_argument('--user')
+    add.add_argument('--title')
+    add.add_argument('--type', choices=MEDIA_TYPES)
+    add.add_argument('--rating', type=float)
+    add.add_argument('--text', default='')
+    add.add_argument('--stdin', action='store_true',
+                     help="read {username, title, media_type, rating, review_text} records")
+    add.set_defaults(handler=cmd_review_add,
+                     required=('user', 'title', 'type', 'rating'))
+
+    top = commands.add_parser('top-rated', help="highest rated media of a type")
+    top.add_argument('--type', choices=MEDIA_TYPES, required=True)
+    top.add_argument('--limit', type=int, default=5)
+    top.set_defaults(handler=cmd_top_rated)
+
+    trending = commands.add_parser('trending', help="most reviewed media of a recent window")
+    trending.add_argument('--type', choices=MEDIA_TYPES, required=True)
+    trending.add_argument('--hours', type=int, default=24, help="window length, e.g. 24 or 168")
+    trending.add_argument('--limit', type=int, default=10)
+    trending.set_defaults(handler=cmd_trending)
+
+    recommend = commands.add_parser('recommend', help="recommendations for a title, or titles from stdin")
+    recommend.add_argument('--type', choices=MEDIA_TYPES, required=True)
+    recommend.add_argument('--title')
+    recommend.add_argument('--top-n', type=int, default=5)
+    recommend.add_argument('--strategy', choices=('content', 'collaborative', 'hybrid'), default='content')
+    recommend.add_argument('--stdin', action='store_true', help="read one title per line")
+    recommend.set_defaults(handler=cmd_recommend, required=('title',))
+
+    imports = commands.add_parser('import', help="bulk import reviews from a JSON file ('-' for stdin)")
+    imports.add_argument('path')
+    imports.set_defaults(handler=cmd_import)
+
+    export = commands.add_parser('export', help="stream reviews or media as JSON lines, CSV or Parquet")
+    export.add_argument('--table', choices=('reviews', 'media'), default='reviews')
+    export.add_argument('--type', choices=MEDIA_TYPES)
+    export.add_argument('--output', help="file to write instead of stdout")
+    export.add_argument('--format', choices=('jsonl', 'csv', 'parquet'),
+                        help="default: from the --output extension, else jsonl (parquet needs pyarrow)")
+    export.add_argument('--since-id', type=int, default=0, help="only rows with a larger id")
+    export.add_argument('--since', help="only rows created after this ISO timestamp (UTC)")
+    export.add_argument('--watermark', help="JSON file holding the last exported id; read, then advanced")
+    export.add_argument('--batch-size', type=int, default=10000, help="rows fetched per round trip")
+    export.add_argument('--row-group-size', type=int, default=50000, help="rows per Parquet row group")
+    export.set_defaults(handler=cmd_export)
+
+    analytics = commands.add_parser('analytics', help="aggregate reviews from an in-memory columnar snapshot")
+    analytics.add_argument('report', choices=('summary', 'user-averages', 'distribution',
+                                              'active-reviewers', 'top-media'))
+    analytics.add_argument('--type', choices=MEDIA_TYPES)
+    analytics.add_argument('--limit', type=int, default=10)
+    analytics.add_argument('--min-reviews', type=int, default=1)
+    analytics.add_argument('--days', type=float, help="only reviews from the last N days (distribution, active-reviewers)")
+    analytics.set_defaults(handler=cmd_analytics)
+
+    server = commands.add_parser('serve', help="run the HTTP/JSON API")
+    server.add_argument('--host')
+    server.add_argument('--port', type=int)
+    server.add_argument('--workers', type=int, help="service thread pool size")
+    server.set_defaults(handler=cmd_serve)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    global _out
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if not getattr(args, 'stdin', False):
+        missing = [name for name in getattr(args, 'required', ()) if getattr(args, name) is None]
+        if missing:
+            parser.error(f"missing --{', --'.join(missing)} (or pass --stdin)")
+
+    _out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        if not args.profile:
+            return args.handler(args)
+
+        from src.database.profiling import profiler
+        profiler.enable()
+        try:
+            return args.handler(args)
+        finally:
+            profiler.disable()
+            print(json.dumps(profiler.report(), indent=2, default=str))
@@ -1,5 +1,8 @@
+import signal
 import threading
+from config.settings import RECOMMENDATION_PRELOAD
 from src.database.manager import DatabaseManager
+from src.patterns.observer import notification_subject
 from src.services.review_service import ReviewService
 from src.services.user_service import UserService
 from src.services.recommendation_service import RecommendationService
@@ -12,9 +15,13 @@ class MediaReviewCLI:
         self.review_service = ReviewService(self.db)
         self.user_service = UserService(self.db)
         
-        print("[OK] Loading recommendation models...")
-        self.recommendation_service = RecommendationService()
-        print("\n✓ Recommendation system ready\n")
+        # Models load on first recommendation (or in the background if enabled)
+        self.recommendation_service = RecommendationService(preload=RECOMMENDATION_PRELOAD)
+        # `kill -HUP <pid>` swaps in newly published models without a restart
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda *_: self.recommendation_service.reload_async())
+        
+        self._load_favorites_index()
         
     def print_header(self, text):
         print("\n" + "="*60)
@@ -30,13 +37,11 @@ class MediaReviewCLI:
         choice = input("\nEnter choice (1-3): ").strip()
         return {'1': 'movie', '2': 'song', '3': 'webshow'}.get(choice)
     
-    def _register_existing_users(self):
-        from src.patterns.observer import notification_subject
-        users = self.db.get_all_users()
-        for user in users:
-            notification_subject.register_observer(user.username)
-        if users:
-            print(f"✅ Registered {len(users)} users for notifications")
+    def _load_favorites_index(self):
+        notification_subject.load_favorites(self.db.iter_favorites())
+        favorites = notification_subject.favorites
+        if favorites.loaded and len(favorites):
+            print(f"✅ Indexed {len(favorites)} favorites for notifications")
             
     def main_menu(self):
         while True:
@@ -50,9 +55,10 @@ class MediaReviewCLI:
             print("  7. Get Recommendations")
             print("  8. Add to Favorites")
             print("  9. Remove from Favorites")
-            print("  10. Exit")
+            print("  10. Notifications")
+            print("  11. Exit")
 
-            choice = input("\n  Enter your choice (1-10): ").strip()
+            choice = input("\n  Enter your choice (1-11): ").strip()
             
             if choice == '1':
                 self.show_all_reviewers()
@@ -73,13 +79,18 @@ class MediaReviewCLI:
             elif choice == '9':
                 self.remove_from_favorites()
             elif choice == '10':
+                self.view_notifications()
+            elif choice == '11':
                 print("\n  Thank you for using Media Review System!")
                 self.db.close_session()
                 break
             else:
                 print("\n  [ERROR] Invalid choice!")
             
-            if choice != '10':
+            # Digests would otherwise print over a later prompt when their
+            # coalesce window ends, so deliver them with this action's output
+            notification_subject.flush(timeout=5.0)
+            if choice != '11':
                 input("\n  Press Enter to continue...")
 
     def show_all_reviewers(self):
@@ -231,18 +242,26 @@ class MediaReviewCLI:
             print("\n  [ERROR] Invalid media type!")
             return
         
-        highest_rated = self.db.get_highest_rated_by_user(username, media_type)
+        ratings = self.db.get_user_ratings(username, media_type)
         
-        if not highest_rated:
+        if not ratings:
             print(f"\n  [INFO] You haven't rated any {media_type}s yet!")
             return
         
-        print(f"\n  Your highest-rated {media_type}: {highest_rated.title} ({highest_rated.rating}/5)")
+        print(f"\n  Based on {len(ratings)} {media_type}(s) you rated or favorited")
         print(f"  Finding recommendations...\n")
         
-        recommendations = self.recommendation_service.recommend(
-            highest_rated.media_type, highest_rated.title, top_n=5
-        )
+        # The nightly job stores recommend_for_user results. Rows from an
+        # older model version, or naming a title rated since, are stale
+        precomputed = self.db.get_user_recommendations(username, media_type)
+        version = self.recommendation_service.model_version(media_type)
+        if precomputed and all(rec.model_version == version and rec.title not in ratings
+                               for rec in precomputed):
+            recommendations = [{'title': rec.title, 'score': rec.score} for rec in precomputed]
+        else:
+            recommendations = self.recommendation_service.recommend_for_user(
+                media_type, ratings, top_n=5
+            )
         
         if recommendations:
             print("  Recommendations:")
@@ -308,6 +327,40 @@ class MediaReviewCLI:
         except ValueError:
             print("\n  [ERROR] Please enter a valid number!")
 
+    def view_notifications(self):
+        self.print_header("NOTIFICATIONS")
+        
+        username = input("\n  Enter your username: ").strip()
+        if not username or not self.db.get_user(username):
+            print("\n  [ERROR] User not found!")
+            return
+        
+        # Pick up events no delivery worker has fanned out yet
+        while self.db.deliver_notifications():
+            pass
+        
+        before_id = None
+        while True:
+            page = self.db.get_inbox(username, limit=10, before_id=before_id)
+            if not page:
+                if before_id is None:
+                    print("\n  No notifications yet.")
+                break
+            
+            if before_id is None:
+                print(f"\n  Unread: {self.db.get_unread_count(username)}")
+                print("  " + "-"*60)
+                self.db.mark_inbox_read(username, page[0]['notification_id'])
+            for note in page:
+                marker = '*' if note['unread'] else ' '
+                rating = f"{note['rating']:.1f}/5" if note['rating'] is not None else "N/A"
+                print(f"  {marker} [{note['media_type']}] {note['title'][:35]:<35} "
+                      f"by {note['reviewer']} | {rating}")
+            
+            before_id = page[-1]['notification_id']
+            if len(page) < 10 or input("\n  Show more? (y/n): ").strip().lower() != 'y':
+                break
+
 
 def run_cli():
     cli = MediaReviewCLI()
@@ -0,0 +1,158 @@
+"""Streaming export of reviews and media to JSON lines, CSV or Parquet.
+
+Rows come from DatabaseManager.iter_reviews / iter_media, which read through
+a server-side cursor with yield_per. Each row is written as soon as it
+arrives, and Parquet is written one row group at a time, so memory does not
+grow with the table. Files are written under a temporary name and renamed
+when complete. The watermark file (last exported id and created_at) is only
+advanced after that rename, so an interrupted run is simply repeated.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, TextIO, Union
+
+ROW_GROUP_SIZE = 50000
+
+# Columns as yielded by the DatabaseManager iterators, with Parquet types
+TABLES = {
+    'reviews': {
+        'key': 'review_id',
+        'columns': {
+            'review_id': 'int64', 'username': 'string', 'title': 'string', 'media_type': 'string',
+            'rating': 'float64', 'review_text': 'string', 'created_at': 'timestamp', 'updated_at': 'timestamp',
+        },
+    },
+    'media': {
+        'key': 'media_id',
+        'columns': {'media_id': 'int64', 'title': 'string', 'media_type': 'string', 'created_at': 'timestamp'},
+    },
+}
+
+
+def format_for(path: Optional[str]) -> str:
+    """Export format implied by a file extension, JSON lines by default"""
+    suffix = Path(path).suffix.lstrip('.').lower() if path else ''
+    if suffix in ('csv', 'parquet'):
+        return suffix
+    return 'jsonl'
+
+
+def read_watermark(path: Union[str, Path]) -> Dict[str, Any]:
+    path = Path(path)
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def write_watermark(path: Union[str, Path], watermark: Dict[str, Any]):
+    tmp = f"{path}.tmp"
+    Path(tmp).write_text(json.dumps(watermark, indent=2, default=str))
+    os.replace(tmp, path)
+
+
+def _tracked(rows: Iterable, key: str, state: Dict[str, Any]):
+    """Pass rows through, counting them and remembering the last one"""
+    for row in rows:
+        state['count'] += 1
+        state['last_id'] = getattr(row, key)
+        state['last_created_at'] = row.created_at
+        yield row
+
+
+def write_jsonl(rows: Iterable, out: TextIO):
+    for row in rows:
+        out.write(json.dumps(dict(row._mapping), default=str) + '\n')
+
+
+def write_csv(rows: Iterable, out: TextIO, columns: Iterable[str]):
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    writer.writerows(rows)
+
+
+def write_parquet(rows: Iterable, path: Union[str, Path], columns: Dict[str, str],
+                  row_group_size: int = ROW_GROUP_SIZE):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    types = {'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string(), 'timestamp': pa.timestamp('us')}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns.items()])
+    names = list(columns)
+
+    with pq.ParquetWriter(str(path), schema) as writer:
+        batch = {name: [] for name in names}
+        size = 0
+        for row in rows:
+            for name, value in zip(names, row):
+                batch[name].append(value)
+            size += 1
+            if size >= row_group_size:
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                batch = {name: [] for name in names}
+                size = 0
+        if size:
+            writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+
+
+def export_table(db, table: str, output: Optional[str] = None, fmt: Optional[str] = None,
+                 stream: Optional[TextIO] = None, media_type: Optional[str] = None,
+                 after_id: int = 0, since: Optional[datetime] = None,
+                 watermark_path: Optional[str] = None, batch_size: int = 10000,
+                 row_group_size: int = ROW_GROUP_SIZE) -> Dict[str, Any]:
+    """Export one table to output (or stream for jsonl/csv).
+
+    With watermark_path, only rows after the stored last id are exported and
+    the watermark moves to the last row written. Returns a summary.
+    """
+    spec = TABLES[table]
+    fmt = fmt or format_for(output)
+    if fmt == 'parquet' and not output:
+        raise ValueError("Parquet export needs an output file")
+
+    if watermark_path:
+        watermark = read_watermark(watermark_path)
+        if watermark and watermark.get('table') != table:
+            raise ValueError(f"Watermark {watermark_path} belongs to '{watermark.get('table')}', not '{table}'")
+        after_id = max(after_id, watermark.get('last_id', 0))
+
+    iterate = db.iter_reviews if table == 'reviews' else db.iter_media
+    id_filter = 'after_review_id' if table == 'reviews' else 'after_media_id'
+    state = {'count': 0, 'last_id': None, 'last_created_at': None}
+    rows = _tracked(
+        iterate(media_type, batch_size=batch_size, since=since, **{id_filter: after_id}), spec['key'], state
+    )
+
+    target = f"{output}.tmp" if output else None
+    try:
+        if fmt == 'parquet':
+            write_parquet(rows, target, spec['columns'], row_group_size)
+        else:
+            out = open(target, 'w', encoding='utf-8', newline='') if target else stream
+            try:
+                if fmt == 'csv':
+                    write_csv(rows, out, spec['columns'])
+                else:
+                    write_jsonl(rows, out)
+            finally:
+                if target:
+                    out.close()
+        if target:
+            os.replace(target, output)
+    finally:
+        if target and os.path.exists(target):
+            os.unlink(target)
+
+    if watermark_path and state['count']:
+        write_watermark(watermark_path, {
+            'table': table, 'last_id': state['last_id'], 'last_created_at': state['last_created_at'],
+            'exported_at': datetime.utcnow()
+        })
+
+    return {
+        'table': table, 'format': fmt, 'exported': state['count'], 'path': output,
+        'after_id': after_id, 'last_id': state['last_id'] if state['count'] else after_id,
+    }
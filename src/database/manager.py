@@ -1,13 +1,56 @@
+import calendar
 from contextlib import contextmanager
-from sqlalchemy import create_engine, desc, func
+from itertools import groupby
+from datetime import datetime, timedelta
+from sqlalchemy import (
+    Integer, and_, case, cast, create_engine, delete, desc, func, insert, inspect, literal, select, union_all, update
+)
 from sqlalchemy.orm import sessionmaker, Session
-from src.models.db_models import Base, User, Media, Review, Favorite
-from config.settings import DB_URL
+from sqlalchemy.schema import CreateIndex
+from src.models.db_models import (
+    Base, User, Media, Review, Favorite, UserRecommendation,
+    NotificationOutbox, Notification, InboxCursor, MediaRatingHourly
+)
+from src.database.profiling import profiler
+from config.settings import DB_URL, NOTIFICATION_RETENTION_DAYS
 
+STARS = range(1, 6)
+ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')  # SQLite's lower()
+ROLLUP_COUNTERS = ['review_count', 'rating_count', 'rating_sum'] + [f'rating_{star}' for star in STARS]
 
+
+def hour_of(moment: datetime) -> int:
+    """Rollup bucket of a naive UTC datetime: hours since the Unix epoch"""
+    return calendar.timegm(moment.timetuple()) // 3600
+
+
+def title_key(title: str) -> str:
+    """Case-insensitive key of a title. Only ASCII letters are folded, as
+    SQLite's lower() does, so Python and the lower(title) index agree."""
+    return title.translate(ASCII_LOWER)
+
+
+def rating_star(rating: float) -> int:
+    """Histogram bin of a rating: the nearest whole star, halves rounding up"""
+    return min(5, max(1, int(rating + 0.5)))
+
+
+def rollup_row(media_id: int, created_at: datetime, rating: float, sign: int = 1) -> dict:
+    """Counter deltas for adding (sign=1) or removing (sign=-1) one review"""
+    row = {'media_id': media_id, 'hour': hour_of(created_at), 'review_count': sign,
+           'rating_count': 0, 'rating_sum': 0.0}
+    row.update({f'rating_{star}': 0 for star in STARS})
+    if rating is not None:
+        row['rating_count'] = sign
+        row['rating_sum'] = sign * rating
+        row[f'rating_{rating_star(rating)}'] = sign
+    return row
+
+
+@profiler.register
 class DatabaseManager:    
-    def __init__(self):
-        self.engine = create_engine(DB_URL, echo=False)
+    def __init__(self, db_url: str = DB_URL):
+        self.engine = create_engine(db_url, echo=False)
         self.SessionLocal = sessionmaker(bind=self.engine)
         self._session = None
         
@@ -34,8 +77,20 @@ class DatabaseManager:
             session.close()
     
     def create_tables(self):
+        had_rollups = inspect(self.engine).has_table(MediaRatingHourly.__tablename__)
         Base.metadata.create_all(self.engine)
+        # create_all skips indexes added to tables that already exist, and
+        # reflection cannot see expression indexes to check for them
+        with self.engine.begin() as conn:
+            for index in Media.__table__.indexes | Notification.__table__.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
         print("✅ Database tables created successfully")
+        
+        # Databases created before the rollups existed are backfilled once
+        if not had_rollups:
+            counted = self.rebuild_rating_rollups()
+            if counted:
+                print(f"✅ Backfilled rating rollups from {counted} reviews")
     
     def drop_tables(self):
         Base.metadata.drop_all(self.engine)
@@ -68,6 +123,9 @@ class DatabaseManager:
         if not user:
             return False, f"User '{username}' not found"
         
+        self._update_rollups(session, [
+            rollup_row(review.media_id, review.created_at, review.rating, sign=-1) for review in user.reviews
+        ])
         session.delete(user)
         session.commit()
         
@@ -82,9 +140,14 @@ class DatabaseManager:
         ).first()
         
         if not media:
-            media = Media(title=title, media_type=media_type)
-            session.add(media)
+            # Other connections (API worker threads) may add the same title
+            # at the same time; the unique constraint decides, and we re-read
+            session.execute(
+                self._insert_ignore(Media.__table__, ['title', 'media_type']),
+                {'title': title, 'media_type': media_type, 'created_at': datetime.utcnow()}
+            )
             session.commit()
+            media = session.query(Media).filter_by(title=title, media_type=media_type).one()
         
         return media
     
@@ -110,10 +173,18 @@ class DatabaseManager:
             media_id=media.media_id,
             user_id=user.user_id,
             rating=rating,
-            review_text=review_text
+            review_text=review_text,
+            created_at=datetime.utcnow()
+        )
+        # Committed together with the review, so no event is ever lost
+        review.outbox = NotificationOutbox(
+            media_id=media.media_id,
+            user_id=user.user_id,
+            rating=rating
         )
         
         session.add(review)
+        self._update_rollups(session, [rollup_row(media.media_id, review.created_at, rating)])
         session.commit()
         
         return True, f"Review added for '{title}'"
@@ -176,6 +247,7 @@ class DatabaseManager:
         if not review:
             return False, f"Review ID {review_id} not found"
         
+        self._update_rollups(session, [rollup_row(review.media_id, review.created_at, review.rating, sign=-1)])
         session.delete(review)
         session.commit()
         
@@ -237,6 +309,188 @@ class DatabaseManager:
         
         return None
     
+    def get_user_ratings(self, username: str, media_type: str,
+                         favorite_rating: float = 5.0) -> dict[str, float]:
+        """{title: rating} for everything a user rated or favorited.
+
+        Favorites count as favorite_rating unless the user rated them
+        higher; repeated reviews of a title keep the best rating.
+        """
+        session = self.get_session()
+        
+        reviewed = session.query(Media.title, func.max(Review.rating)).join(
+            Review, Media.media_id == Review.media_id
+        ).join(
+            User, Review.user_id == User.user_id
+        ).filter(
+            User.username == username,
+            Media.media_type == media_type,
+            Review.rating.isnot(None)
+        ).group_by(Media.media_id, Media.title).all()
+        
+        favorited = session.query(Media.title).join(
+            Favorite, Media.media_id == Favorite.media_id
+        ).join(
+            User, Favorite.user_id == User.user_id
+        ).filter(
+            User.username == username,
+            Media.media_type == media_type
+        ).all()
+        
+        ratings = dict(reviewed)
+        for (title,) in favorited:
+            ratings[title] = max(ratings.get(title, 0.0), favorite_rating)
+        return ratings
+    
+    def iter_user_ratings(self, media_type: str, favorite_rating: float = 5.0, batch_size: int = 10000):
+        """Stream (user_id, {title: rating}) for every user who rated or
+        favorited media of one type, in user_id order. Ratings follow the
+        same rules as get_user_ratings."""
+        session = self.SessionLocal()
+        try:
+            reviewed = select(
+                Review.user_id, Media.title, func.max(Review.rating).label('rating')
+            ).join(
+                Media, Media.media_id == Review.media_id
+            ).where(
+                Media.media_type == media_type,
+                Review.rating.isnot(None)
+            ).group_by(Review.user_id, Media.media_id, Media.title)
+            
+            favorited = select(
+                Favorite.user_id, Media.title, literal(favorite_rating).label('rating')
+            ).join(
+                Media, Media.media_id == Favorite.media_id
+            ).where(Media.media_type == media_type)
+            
+            rows = union_all(reviewed, favorited).subquery()
+            query = session.query(rows.c.user_id, rows.c.title, rows.c.rating).order_by(
+                rows.c.user_id
+            ).yield_per(batch_size)
+            
+            for user_id, group in groupby(query, key=lambda row: row.user_id):
+                ratings = {}
+                for _, title, rating in group:
+                    ratings[title] = max(ratings.get(title, 0.0), rating)
+                yield user_id, ratings
+        finally:
+            session.close()
+    
+    def iter_review_ratings(self, after_review_id: int = 0, batch_size: int = 10000):
+        """Stream rated reviews in review_id order without loading them all"""
+        session = self.SessionLocal()
+        try:
+            query = session.query(
+                Review.review_id,
+                Review.user_id,
+                Review.media_id,
+                Media.title,
+                Media.media_type,
+                Review.rating
+            ).join(
+                Media, Media.media_id == Review.media_id
+            ).filter(
+                Review.review_id > after_review_id,
+                Review.rating.isnot(None)
+            ).order_by(Review.review_id).yield_per(batch_size)
+            
+            yield from query
+        finally:
+            session.close()
+    
+    def iter_reviews(self, media_type: str = None, batch_size: int = 10000,
+                     after_review_id: int = 0, since: datetime = None):
+        """Stream reviews with their username and media, in review_id order.
+        
+        Rows come from a server-side cursor batch_size at a time, so memory
+        does not grow with the table. after_review_id / since resume an
+        incremental export from a watermark.
+        """
+        session = self.SessionLocal()
+        try:
+            query = session.query(
+                Review.review_id,
+                User.username,
+                Media.title,
+                Media.media_type,
+                Review.rating,
+                Review.review_text,
+                Review.created_at,
+                Review.updated_at
+            ).join(
+                User, User.user_id == Review.user_id
+            ).join(
+                Media, Media.media_id == Review.media_id
+            ).filter(
+                Review.review_id > after_review_id
+            )
+            if media_type:
+                query = query.filter(Media.media_type == media_type)
+            if since is not None:
+                query = query.filter(Review.created_at > since)
+            
+            yield from query.order_by(Review.review_id).execution_options(
+                stream_results=True
+            ).yield_per(batch_size)
+        finally:
+            session.close()
+    
+    def iter_media(self, media_type: str = None, batch_size: int = 10000,
+                   after_media_id: int = 0, since: datetime = None):
+        """Stream media rows in media_id order, like iter_reviews"""
+        session = self.SessionLocal()
+        try:
+            query = session.query(
+                Media.media_id,
+                Media.title,
+                Media.media_type,
+                Media.created_at
+            ).filter(
+                Media.media_id > after_media_id
+            )
+            if media_type:
+                query = query.filter(Media.media_type == media_type)
+            if since is not None:
+                query = query.filter(Media.created_at > since)
+            
+            yield from query.order_by(Media.media_id).execution_options(
+                stream_results=True
+            ).yield_per(batch_size)
+        finally:
+            session.close()
+    
+    def iter_review_columns(self, after_review_id: int = 0, batch_size: int = 50000):
+        """Stream (review_id, user_id, media_id, rating, created_at as Unix
+        seconds) in review_id order, one list of rows per batch"""
+        session = self.SessionLocal()
+        try:
+            result = session.execute(
+                select(
+                    Review.review_id,
+                    Review.user_id,
+                    Review.media_id,
+                    Review.rating,
+                    self._epoch_expression(Review.created_at)
+                ).where(
+                    Review.review_id > after_review_id
+                ).order_by(Review.review_id).execution_options(stream_results=True, yield_per=batch_size)
+            )
+            yield from result.partitions()
+        finally:
+            session.close()
+    
+    def iter_users(self, after_user_id: int = 0, batch_size: int = 10000):
+        """Stream (user_id, username) in user_id order"""
+        session = self.SessionLocal()
+        try:
+            query = session.query(User.user_id, User.username).filter(
+                User.user_id > after_user_id
+            ).order_by(User.user_id)
+            
+            yield from query.yield_per(batch_size)
+        finally:
+            session.close()
+    
     def get_user_review_count(self, username: str) -> int:
         session = self.get_session()
         return session.query(Review).join(User).filter(
@@ -257,19 +511,190 @@ class DatabaseManager:
         return session.query(Review).filter_by(media_id=media.media_id).count()
     
     def get_media_stats(self, media: Media) -> dict:
+        """Review counts, average, star distribution and percentiles of one
+        media item, summed from its hourly rollups"""
         session = self.get_session()
         
-        reviews = session.query(Review).filter_by(media_id=media.media_id).all()
+        totals = session.query(
+            *[func.sum(getattr(MediaRatingHourly, column)) for column in ROLLUP_COUNTERS]
+        ).filter(MediaRatingHourly.media_id == media.media_id).one()
         
-        total_reviews = len(reviews)
-        rated_reviews = [r for r in reviews if r.rating is not None]
+        total_reviews, rated_reviews, rating_sum = int(totals[0] or 0), int(totals[1] or 0), totals[2] or 0.0
+        distribution = {star: int(count or 0) for star, count in zip(STARS, totals[3:])}
         
         return {
             'total_reviews': total_reviews,
-            'rated_reviews': len(rated_reviews),
-            'avg_rating': sum(r.rating for r in rated_reviews) / len(rated_reviews) if rated_reviews else 0.0
+            'rated_reviews': rated_reviews,
+            'avg_rating': rating_sum / rated_reviews if rated_reviews else 0.0,
+            'distribution': distribution,
+            'percentiles': self._star_percentiles(distribution, rated_reviews)
         }
     
+    @staticmethod
+    def _star_percentiles(distribution: dict, rated: int) -> dict:
+        """p25/p50/p75/p90 to the nearest star, from the histogram"""
+        percentiles = {}
+        for q in (25, 50, 75, 90):
+            if not rated:
+                percentiles[f'p{q}'] = None
+                continue
+            cumulative = 0
+            for star in STARS:
+                cumulative += distribution[star]
+                if cumulative * 100 >= q * rated:
+                    percentiles[f'p{q}'] = star
+                    break
+        return percentiles
+    
+    # RATING ROLLUP METHODS
+    def _update_rollups(self, session: Session, rows: list[dict]):
+        """Add counter deltas to their (media_id, hour) rollup rows, creating
+        missing rows, inside the caller's transaction"""
+        if not rows:
+            return
+        
+        table = MediaRatingHourly.__table__
+        stmt = self._dialect_insert(table)
+        if stmt is None:
+            from sqlalchemy.dialects.mysql import insert as mysql_insert
+            stmt = mysql_insert(table)
+            stmt = stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in ROLLUP_COUNTERS})
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['media_id', 'hour'],
+                set_={c: table.c[c] + stmt.excluded[c] for c in ROLLUP_COUNTERS}
+            )
+        session.execute(stmt, rows)
+    
+    def _epoch_expression(self, column):
+        """Unix seconds of a naive UTC datetime column, computed in SQL"""
+        if self.engine.dialect.name == 'sqlite':
+            return cast(func.strftime('%s', column), Integer)
+        return cast(func.extract('epoch', column), Integer)
+    
+    def _hour_expression(self, column):
+        """SQL equivalent of hour_of() for a naive UTC datetime column"""
+        return self._epoch_expression(column) // 3600
+    
+    def rebuild_rating_rollups(self, since: datetime = None) -> int:
+        """Recompute rollups from reviews, for every hour or from since on.
+        
+        Runs as one transaction, so readers keep seeing the old rollups until
+        the rebuilt ones commit. Returns the number of reviews counted.
+        """
+        hour = self._hour_expression(Review.created_at).label('hour')
+        star_counts = []
+        for star in STARS:
+            # Same bins as rating_star(): [star - 0.5, star + 0.5), open-ended at 1 and 5
+            bounds = [Review.rating.isnot(None)]
+            if star > 1:
+                bounds.append(Review.rating >= star - 0.5)
+            if star < 5:
+                bounds.append(Review.rating < star + 0.5)
+            star_counts.append(func.sum(case((and_(*bounds), 1), else_=0)))
+        rollups = select(
+            Review.media_id,
+            hour,
+            func.count(Review.review_id),
+            func.count(Review.rating),
+            func.coalesce(func.sum(Review.rating), 0.0),
+            *star_counts
+        ).group_by(Review.media_id, hour)
+        
+        with self.session_scope() as session:
+            clear = delete(MediaRatingHourly)
+            counted = session.query(func.count(Review.review_id))
+            if since is not None:
+                clear = clear.where(MediaRatingHourly.hour >= hour_of(since))
+                since = datetime.utcfromtimestamp(hour_of(since) * 3600)
+                rollups = rollups.where(Review.created_at >= since)
+                counted = counted.filter(Review.created_at >= since)
+            
+            session.execute(clear)
+            session.execute(insert(MediaRatingHourly).from_select(['media_id', 'hour'] + ROLLUP_COUNTERS, rollups))
+            return counted.scalar() or 0
+    
+    def get_trending(self, media_type: str, hours: int = 24, limit: int = 10) -> list:
+        """Most reviewed media of the last `hours` hours (the current hour
+        included), from the rollups; ties go to the higher average rating"""
+        session = self.get_session()
+        
+        review_count = func.sum(MediaRatingHourly.review_count).label('review_count')
+        rating_count = func.sum(MediaRatingHourly.rating_count)
+        avg_rating = (func.sum(MediaRatingHourly.rating_sum) / func.nullif(rating_count, 0)).label('avg_rating')
+        
+        return session.query(
+            Media.title,
+            review_count,
+            avg_rating
+        ).join(
+            Media, Media.media_id == MediaRatingHourly.media_id
+        ).filter(
+            MediaRatingHourly.hour > hour_of(datetime.utcnow()) - hours,
+            Media.media_type == media_type
+        ).group_by(
+            Media.media_id,
+            Media.title
+        ).having(
+            review_count > 0
+        ).order_by(
+            desc('review_count'),
+            desc('avg_rating')
+        ).limit(limit).all()
+    
+    # CATALOG METHODS
+    def find_media_titles(self, media_type: str, titles: list[str]) -> list[str]:
+        """Existing titles of one media type with the same title_key() as any
+        of titles. Uses the lower(title) index, so each call only touches
+        matches. Other databases' lower() also folds non-ASCII letters, so
+        fully lowercased keys are sent too and the rows filtered here."""
+        wanted = {title_key(title) for title in titles}
+        keys = list(wanted | {title.lower() for title in titles})
+        if not keys:
+            return []
+        
+        with self.session_scope() as session:
+            rows = session.query(Media.title).filter(
+                Media.media_type == media_type,
+                func.lower(Media.title).in_(keys)
+            )
+            return [title for (title,) in rows if title_key(title) in wanted]
+    
+    def upsert_media(self, rows: list[dict]) -> int:
+        """Insert {title, media_type} rows with one executemany, skipping
+        titles that already exist. Each call is its own short transaction,
+        so readers and writers are never blocked for a whole catalog load.
+        Returns the number of rows inserted.
+        """
+        if not rows:
+            return 0
+        
+        now = datetime.utcnow()
+        with self.session_scope() as session:
+            result = session.execute(
+                self._insert_ignore(Media.__table__, ['title', 'media_type']),
+                [{'title': row['title'], 'media_type': row['media_type'], 'created_at': now} for row in rows]
+            )
+            return max(result.rowcount, 0)
+    
+    def _dialect_insert(self, table):
+        """INSERT supporting ON CONFLICT (SQLite, PostgreSQL), else None"""
+        dialect = self.engine.dialect.name
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            return None
+        return dialect_insert(table)
+    
+    def _insert_ignore(self, table, conflict_columns: list[str]):
+        """INSERT that silently skips rows violating a unique constraint"""
+        stmt = self._dialect_insert(table)
+        if stmt is None:
+            return insert(table).prefix_with('IGNORE')
+        return stmt.on_conflict_do_nothing(index_elements=conflict_columns)
+    
     # FAVORITE METHODS
     def add_favorite(self, username: str, title: str, media_type: str) -> tuple[bool, str]:
         session = self.get_session()
@@ -331,15 +756,214 @@ class DatabaseManager:
         
         return favorites
     
+    def iter_favorites(self, batch_size: int = 10000):
+        """Stream (media_id, title, media_type, user_id, username) for every
+        favorite, ordered by media_id then user_id"""
+        session = self.SessionLocal()
+        try:
+            query = session.query(
+                Favorite.media_id,
+                Media.title,
+                Media.media_type,
+                Favorite.user_id,
+                User.username
+            ).join(
+                Media, Media.media_id == Favorite.media_id
+            ).join(
+                User, User.user_id == Favorite.user_id
+            ).order_by(Favorite.media_id, Favorite.user_id).yield_per(batch_size)
+            
+            yield from query
+        finally:
+            session.close()
+    
     def get_users_who_favorited(self, title: str, media_type: str) -> list[str]:
+        # Own session: notification workers call this off the main thread
+        with self.session_scope() as session:
+            media = session.query(Media).filter_by(title=title, media_type=media_type).first()
+            if not media:
+                return []
+            
+            users = session.query(User.username).join(Favorite).filter(
+                Favorite.media_id == media.media_id
+            ).all()
+            
+            return [u.username for u in users]
+    
+    # PRECOMPUTED RECOMMENDATION METHODS
+    def replace_user_recommendations(self, media_type: str, rows: list[dict],
+                                     chunk_size: int = 5000) -> int:
+        """Swap in a fresh set of precomputed rows for one media type.
+
+        Runs as one transaction, so readers see either the old set or the
+        new one. Inserts use Core executemany in chunks.
+        """
+        with self.session_scope() as session:
+            session.execute(
+                delete(UserRecommendation).where(UserRecommendation.media_type == media_type)
+            )
+            for start in range(0, len(rows), chunk_size):
+                session.execute(insert(UserRecommendation), rows[start:start + chunk_size])
+        
+        return len(rows)
+    
+    def get_user_recommendations(self, username: str, media_type: str) -> list[UserRecommendation]:
         session = self.get_session()
         
-        media = session.query(Media).filter_by(title=title, media_type=media_type).first()
-        if not media:
-            return []
-        
-        users = session.query(User.username).join(Favorite).filter(
-            Favorite.media_id == media.media_id
-        ).all()
-        
-        return [u.username for u in users]
\ No newline at end of file
+        return session.query(UserRecommendation).join(User).filter(
+            User.username == username,
+            UserRecommendation.media_type == media_type
+        ).order_by(UserRecommendation.rank).all()
+    
+    # NOTIFICATION OUTBOX / INBOX METHODS
+    def deliver_notifications(self, batch_size: int = 1000) -> int:
+        """Fan the oldest pending outbox events out to followers' inboxes.
+
+        One INSERT ... SELECT writes every inbox row for the batch and one
+        UPDATE marks the events delivered, in a single transaction. Inbox
+        rows that already exist are skipped, so an event delivered twice
+        still notifies each follower once. Returns the number of events
+        delivered.
+        """
+        with self.session_scope() as session:
+            pending = session.execute(
+                select(NotificationOutbox.outbox_id).where(
+                    NotificationOutbox.delivered_at.is_(None)
+                ).order_by(NotificationOutbox.outbox_id).limit(batch_size).with_for_update(skip_locked=True)
+            ).scalars().all()
+            if not pending:
+                return 0
+            
+            followers = select(
+                Favorite.user_id,
+                NotificationOutbox.outbox_id,
+                NotificationOutbox.created_at
+            ).join(
+                Favorite, Favorite.media_id == NotificationOutbox.media_id
+            ).where(
+                NotificationOutbox.outbox_id.in_(pending),
+                Favorite.user_id != NotificationOutbox.user_id
+            ).order_by(NotificationOutbox.outbox_id, Favorite.user_id)
+            
+            session.execute(self._insert_ignore(Notification.__table__, ['outbox_id', 'user_id']).from_select(
+                ['user_id', 'outbox_id', 'created_at'], followers
+            ))
+            session.execute(
+                update(NotificationOutbox).where(
+                    NotificationOutbox.outbox_id.in_(pending)
+                ).values(delivered_at=datetime.utcnow())
+            )
+            return len(pending)
+    
+    def get_inbox(self, username: str, limit: int = 20, before_id: int = None,
+                  unread_only: bool = False) -> list[dict]:
+        """A page of a user's notifications, newest first.
+
+        Pages are keyed on notification_id (pass the last id of a page as
+        before_id for the next one), so every page is an index range scan.
+        """
+        with self.session_scope() as session:
+            user = session.query(User).filter_by(username=username).first()
+            if not user:
+                return []
+            
+            last_read = session.query(InboxCursor.last_read_id).filter_by(
+                user_id=user.user_id
+            ).scalar() or 0
+            
+            query = session.query(
+                Notification.notification_id,
+                Notification.created_at,
+                Media.title,
+                Media.media_type,
+                User.username.label('reviewer'),
+                NotificationOutbox.rating
+            ).join(
+                NotificationOutbox, NotificationOutbox.outbox_id == Notification.outbox_id
+            ).join(
+                Media, Media.media_id == NotificationOutbox.media_id
+            ).join(
+                User, User.user_id == NotificationOutbox.user_id
+            ).filter(
+                Notification.user_id == user.user_id
+            )
+            if before_id is not None:
+                query = query.filter(Notification.notification_id < before_id)
+            if unread_only:
+                query = query.filter(Notification.notification_id > last_read)
+            
+            rows = query.order_by(desc(Notification.notification_id)).limit(limit).all()
+            return [
+                {
+                    'notification_id': row.notification_id,
+                    'title': row.title,
+                    'media_type': row.media_type,
+                    'reviewer': row.reviewer,
+                    'rating': row.rating,
+                    'created_at': row.created_at,
+                    'unread': row.notification_id > last_read
+                }
+                for row in rows
+            ]
+    
+    def get_unread_count(self, username: str) -> int:
+        with self.session_scope() as session:
+            user = session.query(User).filter_by(username=username).first()
+            if not user:
+                return 0
+            
+            last_read = session.query(InboxCursor.last_read_id).filter_by(
+                user_id=user.user_id
+            ).scalar() or 0
+            
+            return session.query(func.count(Notification.notification_id)).filter(
+                Notification.user_id == user.user_id,
+                Notification.notification_id > last_read
+            ).scalar()
+    
+    def mark_inbox_read(self, username: str, up_to_id: int = None) -> tuple[bool, str]:
+        """Move a user's read cursor forward (to their newest notification by default)"""
+        with self.session_scope() as session:
+            user = session.query(User).filter_by(username=username).first()
+            if not user:
+                return False, f"User '{username}' not found"
+            
+            if up_to_id is None:
+                up_to_id = session.query(func.max(Notification.notification_id)).filter(
+                    Notification.user_id == user.user_id
+                ).scalar() or 0
+            
+            cursor = session.get(InboxCursor, user.user_id)
+            if cursor is None:
+                session.add(InboxCursor(user_id=user.user_id, last_read_id=up_to_id))
+            elif up_to_id > cursor.last_read_id:
+                cursor.last_read_id = up_to_id
+            
+            return True, "Notifications marked as read"
+    
+    def compact_notifications(self, retention_days: int = NOTIFICATION_RETENTION_DAYS,
+                              chunk_size: int = 10000) -> tuple[int, int]:
+        """Delete delivered events older than the retention window, with their
+        inbox rows, one chunk per transaction. Returns (events, notifications)."""
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        events_deleted = notifications_deleted = 0
+        
+        while True:
+            with self.session_scope() as session:
+                expired = session.execute(
+                    select(NotificationOutbox.outbox_id).where(
+                        NotificationOutbox.delivered_at.isnot(None),
+                        NotificationOutbox.created_at < cutoff
+                    ).order_by(NotificationOutbox.outbox_id).limit(chunk_size)
+                ).scalars().all()
+                if not expired:
+                    break
+                
+                notifications_deleted += session.execute(
+                    delete(Notification).where(Notification.outbox_id.in_(expired))
+                ).rowcount
+                events_deleted += session.execute(
+                    delete(NotificationOutbox).where(NotificationOutbox.outbox_id.in_(expired))
+                ).rowcount
+        
+        return events_deleted, notifications_deleted
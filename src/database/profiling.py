@@ -0,0 +1,242 @@
+"""SQL statement profiling, per-method timing and lock wait times.
+
+While enabled, the profiler listens to every engine's before/after_cursor_execute
+events and records per-statement counts and times. It keeps a slow-query log,
+with the query plan, of statements over SQL_SLOW_QUERY_MS. It also times the
+public methods of the classes registered with @profiler.register. Each method
+is charged, inclusively, with the statements issued while it runs.
+
+Listeners and method wrappers are only installed while profiling is on, so
+a disabled profiler costs nothing on the SQL path. A ProfiledLock only adds
+one attribute check.
+"""
+import functools
+import inspect
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from config.settings import SQL_PROFILE, SQL_SLOW_QUERY_MS, SQL_SLOW_LOG_SIZE, SQL_EXPLAIN_SLOW
+
+# Session plumbing and schema helpers are not worth timing
+SKIP_METHODS = {'get_session', 'close_session', 'session_scope', 'create_tables', 'drop_tables'}
+
+
+class ProfiledLock:
+    """threading.Lock that records acquisition wait time while profiling is on"""
+
+    def __init__(self, name: str, profiler: 'SQLProfiler'):
+        self.name = name
+        self._lock = threading.Lock()
+        self._profiler = profiler
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if not self._profiler.enabled:
+            return self._lock.acquire(blocking, timeout)
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        self._profiler._record_lock(self.name, time.perf_counter() - start)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SQLProfiler:
+    def __init__(self, slow_ms: float = SQL_SLOW_QUERY_MS, slow_log_size: int = SQL_SLOW_LOG_SIZE,
+                 explain: bool = SQL_EXPLAIN_SLOW):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.enabled = False
+        self._classes: List[type] = []
+        self._originals: Dict[tuple, Any] = {}
+        self._toggle_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self._slow_log_size = slow_log_size
+        self.reset()
+
+    def reset(self):
+        with self._stats_lock:
+            self.since = time.time()
+            self.statements: Dict[str, List[float]] = {}  # sql -> [count, total, max]
+            self.methods: Dict[str, List[float]] = {}     # label -> [calls, total, statements, sql time]
+            self.locks: Dict[str, List[float]] = {}       # name -> [acquisitions, total wait, max wait]
+            self.slow_queries = deque(maxlen=self._slow_log_size)
+
+    # Runtime toggle
+    def enable(self):
+        with self._toggle_lock:
+            if self.enabled:
+                return
+            event.listen(Engine, 'before_cursor_execute', self._before_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_execute)
+            for cls in self._classes:
+                self._instrument(cls)
+            self.enabled = True
+
+    def disable(self):
+        with self._toggle_lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+            event.remove(Engine, 'before_cursor_execute', self._before_execute)
+            event.remove(Engine, 'after_cursor_execute', self._after_execute)
+            for (cls, name), original in self._originals.items():
+                setattr(cls, name, original)
+            self._originals.clear()
+
+    def lock(self, name: str) -> ProfiledLock:
+        return ProfiledLock(name, self)
+
+    # Method timing
+    def register(self, cls: type) -> type:
+        """Class decorator: time the class's public methods while profiling"""
+        with self._toggle_lock:
+            self._classes.append(cls)
+            if self.enabled:
+                self._instrument(cls)
+        return cls
+
+    def _instrument(self, cls: type):
+        for name, value in list(vars(cls).items()):
+            if name.startswith('_') or name in SKIP_METHODS or not inspect.isfunction(value):
+                continue
+            # Generators would only be timed until their first yield
+            if inspect.isgeneratorfunction(inspect.unwrap(value)):
+                continue
+            self._originals[(cls, name)] = value
+            setattr(cls, name, self._wrap(f"{cls.__name__}.{name}", value))
+
+    def _wrap(self, label: str, fn):
+        @functools.wraps(fn)
+        def profiled(*args, **kwargs):
+            stack = self._stack()
+            stack.append(label)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                stack.pop()
+                with self._stats_lock:
+                    stats = self.methods.setdefault(label, [0, 0.0, 0, 0.0])
+                    stats[0] += 1
+                    stats[1] += elapsed
+        return profiled
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    # Engine events
+    # The start time lives on the statement's execution context, which is
+    # discarded with it, so statements that raise leave nothing behind
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._profiler_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, '_profiler_start', None)
+        if start is None:
+            return  # started before profiling was enabled
+        elapsed = time.perf_counter() - start
+        sql = ' '.join(statement.split())
+        stack = self._stack()
+
+        with self._stats_lock:
+            stats = self.statements.setdefault(sql, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            for label in set(stack):
+                method = self.methods.setdefault(label, [0, 0.0, 0, 0.0])
+                method[2] += 1
+                method[3] += elapsed
+
+        if elapsed * 1000 >= self.slow_ms:
+            plan = None
+            if self.explain and not executemany and sql.upper().startswith('SELECT'):
+                plan = self._explain(conn, cursor, statement, parameters)
+            entry = {
+                'at': time.time(),
+                'ms': round(elapsed * 1000, 2),
+                'method': stack[-1] if stack else None,
+                'statement': sql,
+                'parameters': repr(parameters)[:200],
+                'plan': plan,
+            }
+            with self._stats_lock:
+                self.slow_queries.append(entry)
+            print(f"[WARNING] Slow query ({entry['ms']}ms in {entry['method'] or 'unknown'}): {sql[:120]}")
+
+    @staticmethod
+    def _explain(conn, cursor, statement, parameters) -> Optional[List[str]]:
+        """Query plan on the same DBAPI connection; raw cursors fire no events"""
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        try:
+            raw = cursor.connection.cursor()
+            try:
+                raw.execute(prefix + statement, parameters)
+                return [' | '.join(str(col) for col in row) for row in raw.fetchall()]
+            finally:
+                raw.close()
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+
+    def _record_lock(self, name: str, wait: float):
+        with self._stats_lock:
+            stats = self.locks.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += wait
+            stats[2] = max(stats[2], wait)
+
+    # Reporting
+    def report(self, limit: int = 20) -> Dict[str, Any]:
+        """Top statements and methods by total time, lock waits and the slow log"""
+        with self._stats_lock:
+            statements = sorted(self.statements.items(), key=lambda x: x[1][1], reverse=True)[:limit]
+            methods = sorted(self.methods.items(), key=lambda x: x[1][1], reverse=True)[:limit]
+            locks = dict(self.locks)
+            slow = list(self.slow_queries)
+
+        return {
+            'enabled': self.enabled,
+            'since': self.since,
+            'slow_query_ms': self.slow_ms,
+            'statements': [
+                {'statement': sql, 'count': count, 'total_ms': round(total * 1000, 3),
+                 'mean_ms': round(total * 1000 / count, 3), 'max_ms': round(peak * 1000, 3)}
+                for sql, (count, total, peak) in statements
+            ],
+            'methods': [
+                {'method': label, 'calls': calls, 'total_ms': round(total * 1000, 3),
+                 'mean_ms': round(total * 1000 / calls, 3) if calls else None,
+                 'statements': queries, 'sql_ms': round(sql_time * 1000, 3)}
+                for label, (calls, total, queries, sql_time) in methods
+            ],
+            'locks': {
+                name: {'acquisitions': count, 'wait_ms': round(total * 1000, 3),
+                       'max_wait_ms': round(peak * 1000, 3)}
+                for name, (count, total, peak) in locks.items()
+            },
+            'slow_queries': slow,
+        }
+
+
+profiler = SQLProfiler()
+if SQL_PROFILE:
+    profiler.enable()
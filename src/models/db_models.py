@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, Text, Boolean, DateTime, ForeignKey, UniqueConstraint, Index, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -15,6 +15,9 @@ class User(Base):
     
     reviews = relationship('Review', back_populates='user', cascade='all, delete-orphan')
     favorites = relationship('Favorite', back_populates='user', cascade='all, delete-orphan')
+    recommendations = relationship('UserRecommendation', back_populates='user', cascade='all, delete-orphan')
+    notifications = relationship('Notification', back_populates='user', cascade='all, delete-orphan')
+    inbox_cursor = relationship('InboxCursor', back_populates='user', cascade='all, delete-orphan', uselist=False)
 
 
 class Media(Base):
@@ -30,6 +33,8 @@ class Media(Base):
     
     __table_args__ = (
         UniqueConstraint('title', 'media_type', name='unique_media'),
+        # Case-insensitive title lookups while loading catalogs
+        Index('ix_media_type_title_lower', 'media_type', func.lower(title)),
     )
 
 
@@ -46,6 +51,7 @@ class Review(Base):
     
     user = relationship('User', back_populates='reviews')
     media = relationship('Media', back_populates='reviews')
+    outbox = relationship('NotificationOutbox', back_populates='review', cascade='all, delete-orphan', uselist=False)
 
 
 class Favorite(Base):
@@ -61,4 +67,99 @@ class Favorite(Base):
     
     __table_args__ = (
         UniqueConstraint('user_id', 'media_id', name='unique_user_favorite'),
-    )
\ No newline at end of file
+    )
+
+
+class UserRecommendation(Base):
+    """Precomputed recommendations, refreshed by scripts/precompute_recommendations.py"""
+    __tablename__ = 'user_recommendations'
+    
+    recommendation_id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    media_type = Column(String(50), nullable=False)
+    rank = Column(Integer, nullable=False)
+    seed_title = Column(String(255), nullable=False)
+    title = Column(String(255), nullable=False)
+    score = Column(Integer, nullable=False)
+    model_version = Column(String(64), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    user = relationship('User', back_populates='recommendations')
+    
+    __table_args__ = (
+        Index('ix_user_recommendations_lookup', 'user_id', 'media_type', 'rank'),
+    )
+
+
+class NotificationOutbox(Base):
+    """Review events, written with the review and fanned out by delivery workers"""
+    __tablename__ = 'notification_outbox'
+    
+    outbox_id = Column(Integer, primary_key=True, autoincrement=True)
+    review_id = Column(Integer, ForeignKey('reviews.review_id'), nullable=False)
+    media_id = Column(Integer, ForeignKey('media.media_id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    rating = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+    
+    review = relationship('Review', back_populates='outbox')
+    notifications = relationship('Notification', back_populates='event', cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        Index('ix_notification_outbox_pending', 'delivered_at', 'outbox_id'),
+    )
+
+
+class Notification(Base):
+    """A follower's inbox entry for one outbox event"""
+    __tablename__ = 'notifications'
+    
+    notification_id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.user_id'), nullable=False)
+    outbox_id = Column(Integer, ForeignKey('notification_outbox.outbox_id'), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    user = relationship('User', back_populates='notifications')
+    event = relationship('NotificationOutbox', back_populates='notifications')
+    
+    __table_args__ = (
+        Index('ix_notifications_inbox', 'user_id', 'notification_id'),
+        # At most one inbox row per event and follower, so redelivery is a no-op
+        Index('ux_notifications_delivery', 'outbox_id', 'user_id', unique=True),
+    )
+
+
+class InboxCursor(Base):
+    """Highest notification_id a user has read"""
+    __tablename__ = 'inbox_cursors'
+    
+    user_id = Column(Integer, ForeignKey('users.user_id'), primary_key=True)
+    last_read_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    user = relationship('User', back_populates='inbox_cursor')
+
+
+class MediaRatingHourly(Base):
+    """Per-media review counts and rating histogram for one UTC hour.
+
+    Kept current by DatabaseManager on every review write; rebuilt from
+    reviews by scripts/backfill_rollups.py.
+    """
+    __tablename__ = 'media_rating_hourly'
+    
+    media_id = Column(Integer, ForeignKey('media.media_id'), primary_key=True)
+    hour = Column(Integer, primary_key=True)  # hours since the Unix epoch, UTC
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+    rating_1 = Column(Integer, nullable=False, default=0)  # ratings rounded to the nearest star
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index('ix_media_rating_hourly_hour', 'hour', 'media_id'),
+    )
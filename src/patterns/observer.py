@@ -1,5 +1,21 @@
 """Observer Pattern - Notification System for Favorite Media"""
-from typing import Dict, Set, Any
+import atexit
+import bisect
+import queue
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from config.settings import (
+    NOTIFY_WORKERS, NOTIFY_QUEUE_SIZE, NOTIFY_BATCH_SIZE, NOTIFY_OVERFLOW, NOTIFY_PUT_TIMEOUT,
+    NOTIFY_COALESCE_WINDOW
+)
+
+OVERFLOW_POLICIES = ('block', 'drop_newest', 'drop_oldest')
+
+# Queued once per worker to stop it
+_STOP = object()
 
 
 class Observer:
@@ -21,17 +37,187 @@ class UserObserver(Observer):
         # Don't notify if the reviewer is the subscriber themselves
         if data.get('username') != self.username:
             print(f"  [🔔 NOTIFICATION for {self.username}]")
-            print(f"  New review for your favorite '{data['title']}'")
-            print(f"  Reviewer: {data['username']} | Rating: {data['rating']:.1f}/5.0")
+            rating = f"{data['rating']:.1f}/5.0" if data.get('rating') is not None else "unrated"
+            if data.get('count', 1) > 1:
+                print(f"  {data['count']} new reviews for your favorite '{data['title']}'")
+                print(f"  Latest: {data['username']} | Average rating: {rating}")
+            else:
+                print(f"  New review for your favorite '{data['title']}'")
+                print(f"  Reviewer: {data['username']} | Rating: {rating}")
             print()
 
 
-class NotificationSubject:
-    """Subject that manages observers and sends notifications"""
+class Digest:
+    """Reviews of one media item buffered during a coalescing window.
+
+    Totals are kept per reviewer as well, so each follower's digest can
+    leave out their own reviews.
+    """
+    
+    def __init__(self, title: str, media_type: str):
+        self.title = title
+        self.media_type = media_type
+        self.resolve_users: Optional[Callable[[], Iterable[str]]] = None
+        # reviewer -> [reviews, rated reviews, rating total], least recent
+        # reviewer first; unrated reviews count but do not affect the average
+        self._reviewers: OrderedDict = OrderedDict()
+    
+    def add(self, data: Dict[str, Any]):
+        totals = self._reviewers.setdefault(data['username'], [0, 0, 0.0])
+        totals[0] += 1
+        if data.get('rating') is not None:
+            totals[1] += 1
+            totals[2] += data['rating']
+        self._reviewers.move_to_end(data['username'])
+    
+    def for_user(self, username: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(message, data) summarising everyone else's reviews, if any"""
+        others = [(name, totals) for name, totals in self._reviewers.items() if name != username]
+        if not others:
+            return None
+        count = sum(totals[0] for _, totals in others)
+        rated = sum(totals[1] for _, totals in others)
+        latest = others[-1][0]
+        message = (f"New review for '{self.title}' by {latest}" if count == 1
+                   else f"{count} new reviews for '{self.title}'")
+        return message, {
+            'title': self.title,
+            'media_type': self.media_type,
+            'count': count,
+            'rating': sum(totals[2] for _, totals in others) / rated if rated else None,
+            'username': latest,
+        }
+
+
+class FavoritesIndex:
+    """In-memory reverse index from media to the users who favorited it.
+
+    Each media_id maps to a sorted array('i') of user_ids, about 4 bytes
+    per favorite, so millions of favorites fit in tens of megabytes.
+    Titles and usernames are kept once per favorited media item and once
+    per follower, which lets review fan-out resolve followers without a
+    database round trip.
+    """
     
     def __init__(self):
+        self.loaded = False
+        self._followers: Dict[int, array] = {}
+        self._media_ids: Dict[Tuple[str, str], int] = {}
+        self._media_keys: Dict[int, Tuple[str, str]] = {}
+        self._usernames: Dict[int, str] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return sum(len(users) for users in self._followers.values())
+    
+    def load(self, rows: Iterable[Tuple[int, str, str, int, str]]):
+        """Replace the index with (media_id, title, media_type, user_id, username)
+        rows ordered by media_id, user_id"""
+        followers: Dict[int, array] = {}
+        media_ids: Dict[Tuple[str, str], int] = {}
+        media_keys: Dict[int, Tuple[str, str]] = {}
+        usernames: Dict[int, str] = {}
+        for media_id, title, media_type, user_id, username in rows:
+            users = followers.get(media_id)
+            if users is None:
+                users = followers[media_id] = array('i')
+                media_ids[(media_type, title)] = media_id
+                media_keys[media_id] = (media_type, title)
+            users.append(user_id)
+            usernames.setdefault(user_id, username)
+        
+        with self._lock:
+            self._followers, self._media_ids, self._usernames = followers, media_ids, usernames
+            self._media_keys = media_keys
+            self.loaded = True
+    
+    def usernames(self) -> List[str]:
+        return list(self._usernames.values())
+    
+    def add(self, media_id: int, title: str, media_type: str, user_id: int, username: str):
+        with self._lock:
+            users = self._followers.setdefault(media_id, array('i'))
+            self._media_ids[(media_type, title)] = media_id
+            self._media_keys[media_id] = (media_type, title)
+            self._usernames[user_id] = username
+            position = bisect.bisect_left(users, user_id)
+            if position == len(users) or users[position] != user_id:
+                users.insert(position, user_id)
+    
+    def remove(self, media_id: int, user_id: int):
+        with self._lock:
+            users = self._followers.get(media_id)
+            if users is None:
+                return
+            position = bisect.bisect_left(users, user_id)
+            if position < len(users) and users[position] == user_id:
+                del users[position]
+            if not users:
+                self._drop_media(media_id)
+    
+    def remove_user(self, user_id: int):
+        """Forget every favorite of a deleted user"""
+        with self._lock:
+            for media_id, users in list(self._followers.items()):
+                position = bisect.bisect_left(users, user_id)
+                if position < len(users) and users[position] == user_id:
+                    del users[position]
+                    if not users:
+                        self._drop_media(media_id)
+            self._usernames.pop(user_id, None)
+    
+    def _drop_media(self, media_id: int):
+        del self._followers[media_id]
+        self._media_ids.pop(self._media_keys.pop(media_id), None)
+    
+    def followers(self, title: str, media_type: str) -> List[str]:
+        """Usernames of everyone who favorited the media"""
+        with self._lock:
+            media_id = self._media_ids.get((media_type, title))
+            if media_id is None:
+                return []
+            return [self._usernames[user_id] for user_id in self._followers[media_id]]
+
+
+class NotificationSubject:
+    """Subject that manages observers and sends notifications.
+
+    notify_users() only enqueues an event on a bounded queue; a pool of
+    worker threads drains it in batches of up to batch_size and calls the
+    observers. When the queue is full, `overflow` decides what happens:
+    'block' waits up to put_timeout seconds before dropping the new event,
+    'drop_newest' drops it at once and 'drop_oldest' evicts the oldest
+    queued event to make room. With workers=0 delivery is synchronous.
+    
+    With a coalesce_window, reviews passed to notify_followers() are held
+    per media item for that many seconds and each follower then gets one
+    digest (review count, average rating, latest reviewer) instead of one
+    notification per review.
+    """
+    
+    def __init__(self, queue_size: int = NOTIFY_QUEUE_SIZE, workers: int = NOTIFY_WORKERS,
+                 batch_size: int = NOTIFY_BATCH_SIZE, overflow: str = NOTIFY_OVERFLOW,
+                 put_timeout: float = NOTIFY_PUT_TIMEOUT,
+                 coalesce_window: float = NOTIFY_COALESCE_WINDOW):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
         # Map username to observer: {username: UserObserver}
         self._observers: Dict[str, UserObserver] = {}
+        self.favorites = FavoritesIndex()
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.workers = workers
+        self.batch_size = max(1, batch_size)
+        self.overflow = overflow
+        self.put_timeout = put_timeout
+        self.coalesce_window = coalesce_window
+        self.stats = {'queued': 0, 'delivered': 0, 'dropped': 0, 'failed': 0, 'coalesced': 0}
+        self._digests: Dict[Tuple[str, str], Digest] = {}
+        self._digest_lock = threading.Lock()
+        self._digest_stop = threading.Event()
+        self._digest_thread: Optional[threading.Thread] = None
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
     
     def register_observer(self, username: str):
         """Register a user observer"""
@@ -43,12 +229,188 @@ class NotificationSubject:
         if username in self._observers:
             del self._observers[username]
     
-    def notify_users(self, usernames: list[str], message: str, data: Dict[str, Any]):
-        """Notify specific users about a review"""
-        for username in usernames:
-            if username in self._observers:
-                self._observers[username].update(message, data)
+    def load_favorites(self, rows: Iterable[Tuple[int, str, str, int, str]]):
+        """Build the favorites index and register an observer per follower"""
+        self.favorites.load(rows)
+        for username in self.favorites.usernames():
+            self.register_observer(username)
+    
+    def add_favorite(self, media_id: int, title: str, media_type: str, user_id: int, username: str):
+        if self.favorites.loaded:
+            self.favorites.add(media_id, title, media_type, user_id, username)
+            self.register_observer(username)
+    
+    def remove_favorite(self, media_id: int, user_id: int):
+        if self.favorites.loaded:
+            self.favorites.remove(media_id, user_id)
+    
+    def remove_user(self, user_id: int, username: str):
+        """Drop a deleted user's observer and favorites"""
+        self.remove_observer(username)
+        if self.favorites.loaded:
+            self.favorites.remove_user(user_id)
+    
+    def notify_users(self, usernames: Iterable[str], message: str, data: Dict[str, Any]) -> bool:
+        """Queue a notification for specific users; False if it was dropped"""
+        return self._enqueue((list(usernames), message, data))
+    
+    def notify_followers(self, resolve_users: Callable[[], Iterable[str]],
+                         message: str, data: Dict[str, Any]) -> bool:
+        """Like notify_users, but the recipients are looked up by a worker.
+
+        data must describe a review ('title', 'media_type', 'username',
+        'rating') when coalescing is on.
+        """
+        if self.coalesce_window <= 0 or self.workers <= 0:
+            return self._enqueue((resolve_users, message, data))
+        
+        self._start_workers()
+        key = (data['media_type'], data['title'])
+        with self._digest_lock:
+            digest = self._digests.get(key)
+            if digest is None:
+                digest = self._digests[key] = Digest(data['title'], data['media_type'])
+            else:
+                self._count('coalesced')
+            digest.resolve_users = resolve_users
+            digest.add(data)
+        return True
+    
+    def flush_digests(self):
+        """Queue a digest for every media item reviewed in this window"""
+        with self._digest_lock:
+            digests, self._digests = self._digests, {}
+        for digest in digests.values():
+            self._enqueue((digest.resolve_users, None, digest))
+    
+    def _coalesce(self):
+        while not self._digest_stop.wait(self.coalesce_window):
+            self.flush_digests()
+    
+    def _enqueue(self, event: tuple) -> bool:
+        if self.workers <= 0:
+            self._deliver([event])
+            return True
+        self._start_workers()
+        
+        try:
+            if self.overflow == 'block':
+                self._queue.put(event, timeout=self.put_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            if self.overflow != 'drop_oldest':
+                self._count('dropped')
+                return False
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                self._count('dropped')
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                self._count('dropped')
+                return False
+        
+        self._count('queued')
+        return True
+    
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def _start_workers(self):
+        if self._threads:
+            return
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'notify-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            if self.coalesce_window > 0:
+                self._digest_stop.clear()
+                self._digest_thread = threading.Thread(
+                    target=self._coalesce, name='notify-digest', daemon=True
+                )
+                self._digest_thread.start()
+            atexit.register(self.shutdown)
+    
+    def _work(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            events = [event for event in batch if event is not _STOP]
+            try:
+                self._deliver(events)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            
+            stops = len(batch) - len(events)
+            if stops:
+                # Each worker consumes exactly one stop marker
+                for _ in range(stops - 1):
+                    self._queue.put(_STOP)
+                return
+    
+    def _deliver(self, events: List[tuple]):
+        """Call the observers for a batch of events"""
+        observers = dict(self._observers)
+        for recipients, message, data in events:
+            try:
+                usernames = recipients() if callable(recipients) else recipients
+                for username in usernames:
+                    observer = observers.get(username)
+                    if observer is None:
+                        continue
+                    if isinstance(data, Digest):
+                        personal = data.for_user(username)
+                        if personal is None:
+                            continue
+                        observer.update(*personal)
+                    else:
+                        observer.update(message, data)
+                    self._count('delivered')
+            except Exception as e:
+                self._count('failed')
+                print(f"[ERROR] Delivering notification: {e}")
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Deliver pending digests and wait for the queue; False on timeout"""
+        self.flush_digests()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+    
+    def shutdown(self, timeout: Optional[float] = 5.0) -> bool:
+        """Flush pending digests and queued events, then stop the workers"""
+        self._digest_stop.set()
+        if self._digest_thread is not None:
+            self._digest_thread.join(timeout)
+            self._digest_thread = None
+        flushed = self.flush(timeout)
+        with self._start_lock:
+            threads, self._threads = self._threads, []
+            for _ in threads:
+                self._queue.put(_STOP)
+            for thread in threads:
+                thread.join(timeout)
+        return flushed
 
 
 # Global notification subject instance
-notification_subject = NotificationSubject()
\ No newline at end of file
+notification_subject = NotificationSubject()
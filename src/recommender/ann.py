@@ -0,0 +1,151 @@
+"""Approximate nearest-neighbour index for dense feature vectors"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from src.recommender.topk import top_k
+
+
+def default_bits(n: int) -> int:
+    """Hyperplanes per table for n items: about 8 items per bucket.
+
+    Fixed large bit counts leave small catalogs with mostly empty buckets,
+    so queries keep falling back to an exact scan.
+    """
+    return int(max(1, min(62, round(np.log2(max(n, 2))) - 3)))
+
+
+class LSHIndex:
+    """Random-hyperplane LSH for cosine similarity.
+
+    Each of n_tables hash tables buckets a vector by the signs of its
+    projections onto n_bits random hyperplanes. A query collects the items
+    sharing its bucket in every table (plus buckets one bit away when
+    probes=1), then re-ranks those candidates exactly.
+
+    More tables or probes raise recall; more bits make buckets smaller and
+    queries faster. build() sizes n_bits to the catalog unless told
+    otherwise (see default_bits). Vectors are expected to be L2-normalized.
+
+    Every query re-ranks its candidates for at least `depth` results and
+    then truncates, so the top 3 is always a prefix of the top 5.
+
+    Buckets built from the initial vectors are sorted arrays searched with
+    np.searchsorted; vectors added later go to per-table dicts, so adding
+    items never re-hashes the existing ones.
+    """
+
+    def __init__(self, dim: int, n_tables: int = 12, n_bits: int = 14,
+                 probes: int = 0, seed: int = 0, depth: int = 50):
+        if n_bits > 62:
+            raise ValueError("n_bits must be at most 62")
+        rng = np.random.default_rng(seed)
+        self.dim = dim
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.probes = probes
+        self.depth = depth
+        self._planes = rng.standard_normal((n_tables * n_bits, dim)).astype(np.float32)
+        self._weights = (1 << np.arange(n_bits, dtype=np.int64))
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self._sorted_codes: List[np.ndarray] = []
+        self._sorted_ids: List[np.ndarray] = []
+        self._added: List[Dict[int, List[int]]] = [{} for _ in range(n_tables)]
+
+    @classmethod
+    def build(cls, vectors, n_tables: int = 12, n_bits: Optional[int] = None,
+              probes: int = 0, seed: int = 0, depth: int = 50) -> 'LSHIndex':
+        """Index vectors; n_bits of None (or 0) means default_bits(len(vectors))"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        index = cls(vectors.shape[1], n_tables, n_bits or default_bits(len(vectors)), probes, seed, depth)
+        index._vectors = vectors.copy()
+        index._size = len(vectors)
+
+        codes = index._codes(vectors)
+        for table in range(n_tables):
+            order = np.argsort(codes[:, table], kind='stable')
+            index._sorted_codes.append(codes[order, table])
+            index._sorted_ids.append(order.astype(np.int64))
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._size]
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        """(n, n_tables) bucket codes"""
+        bits = (vectors @ self._planes.T > 0).reshape(len(vectors), self.n_tables, self.n_bits)
+        return bits.astype(np.int64) @ self._weights
+
+    def add(self, vectors) -> np.ndarray:
+        """Append vectors and return their positions"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start = self._size
+        end = start + len(vectors)
+
+        if end > len(self._vectors):
+            grown = np.zeros((max(end, 2 * len(self._vectors), 16), self.dim), dtype=np.float32)
+            grown[:start] = self._vectors[:start]
+            self._vectors = grown
+        self._vectors[start:end] = vectors
+
+        codes = self._codes(vectors)
+        for offset, row in enumerate(codes.tolist()):
+            for table, code in enumerate(row):
+                self._added[table].setdefault(code, []).append(start + offset)
+
+        self._size = end
+        return np.arange(start, end)
+
+    def _probe_codes(self, code: int) -> List[int]:
+        if self.probes <= 0:
+            return [code]
+        return [code] + [code ^ (1 << bit) for bit in range(self.n_bits)]
+
+    def candidates(self, vector: np.ndarray) -> np.ndarray:
+        """Positions sharing a probed bucket with vector in any table"""
+        codes = self._codes(np.asarray(vector, dtype=np.float32).reshape(1, -1))[0]
+        found = []
+        for table, code in enumerate(codes.tolist()):
+            probe = np.asarray(self._probe_codes(code), dtype=np.int64)
+            if self._sorted_codes:
+                sorted_codes = self._sorted_codes[table]
+                lo = np.searchsorted(sorted_codes, probe, side='left')
+                hi = np.searchsorted(sorted_codes, probe, side='right')
+                for a, b in zip(lo.tolist(), hi.tolist()):
+                    if b > a:
+                        found.append(self._sorted_ids[table][a:b])
+            added = self._added[table]
+            if added:
+                for p in probe.tolist():
+                    if p in added:
+                        found.append(np.asarray(added[p], dtype=np.int64))
+        if not found:
+            return np.zeros(0, dtype=np.int64)
+        return np.unique(np.concatenate(found))
+
+    def query(self, vector, k: int, exclude: Optional[Iterable[int]] = None,
+              exhaustive_below: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, scores) of the approximate top k by cosine similarity.
+
+        max(k, depth) results are ranked and the first k returned. If fewer
+        candidates than that (or exhaustive_below) are found the query falls
+        back to an exact scan, so results are never short.
+        """
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        excluded = [] if exclude is None else list(exclude)
+        wanted = max(k, self.depth)
+
+        candidates = self.candidates(vector)
+        if len(candidates) - len(excluded) < max(wanted, exhaustive_below):
+            scores = self.vectors @ vector
+            best, best_scores = top_k(scores, wanted, exclude=excluded)
+            return best[:k], best_scores[:k]
+
+        scores = self._vectors[candidates] @ vector
+        keep = ~np.isin(candidates, excluded)
+        candidates, scores = candidates[keep], scores[keep]
+        best, best_scores = top_k(scores, wanted)
+        return candidates[best[:k]], best_scores[:k]
@@ -0,0 +1,282 @@
+"""Compact, memory-mapped on-disk format for recommendation models.
+
+A model root (e.g. models/song) holds one directory per published version
+and a CURRENT file naming the active one. Each version directory contains:
+
+    manifest.json        format, version, build time, item count, arrays,
+                         and a SHA-256 checksum of every other file
+    titles_offsets.npy   int64 offsets into titles_data, length N + 1
+    titles_data.npy      UTF-8 bytes of every title, concatenated
+    title_index.pkl      prebuilt TitleIndex
+    title_trigrams.pkl   prebuilt TrigramIndex for fuzzy lookups, optional
+    similarity.npy       N x N matrix  (or embeddings.npy, N x D), optional
+    graph_indptr.npy     CSR top-K neighbour graph (graph_indices.npy and
+                         graph_scores.npy alongside), optional
+
+Arrays are loaded with np.load(mmap_mode='r'), so opening a model costs a
+few page-table entries and processes serving the same files share pages.
+"""
+import hashlib
+import json
+import pickle
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+from src.recommender.fuzzy import TrigramIndex
+from src.recommender.graph import NeighborGraph
+from src.recommender.model import RecommendationModel
+from src.recommender.title_index import TitleIndex
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+CURRENT = 'CURRENT'
+
+
+class StringTable:
+    """Read-only table of strings backed by an offsets array and a byte blob"""
+    
+    def __init__(self, offsets: np.ndarray, data: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+    
+    @classmethod
+    def from_strings(cls, strings: List[str]) -> 'StringTable':
+        encoded = [s.encode('utf-8') for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, position: int) -> str:
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.data[start:end].tobytes().decode('utf-8')
+    
+    def tolist(self) -> List[str]:
+        return [self[i] for i in range(len(self))]
+
+
+def save_artifact(path: Path, titles: List[str], similarity=None, embeddings=None,
+                  graph: Optional[NeighborGraph] = None, strip_spaces: bool = False,
+                  dtype: str = 'float16', index: Optional[TitleIndex] = None,
+                  version: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> Path:
+    """Write a model artifact into a temporary directory, then swap it in.
+
+    An existing artifact at path is renamed aside before the swap and only
+    removed after it, so path never holds a partly written artifact (it is
+    briefly missing between the two renames).
+    """
+    if similarity is not None and embeddings is not None:
+        raise ValueError("Pass at most one of similarity or embeddings")
+    if similarity is None and embeddings is None and graph is None:
+        raise ValueError("Pass a similarity matrix, embeddings or a neighbor graph")
+    
+    path = Path(path)
+    titles = ['' if not isinstance(t, str) else t for t in titles]
+    matrix_name = 'similarity' if similarity is not None else 'embeddings'
+    matrix = similarity if similarity is not None else embeddings
+    if matrix is None:
+        matrix_name = None
+    
+    tmp_path = path.with_name(path.name + '.tmp')
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+    
+    table = StringTable.from_strings(titles)
+    np.save(tmp_path / 'titles_offsets.npy', table.offsets)
+    np.save(tmp_path / 'titles_data.npy', table.data)
+    
+    if matrix is not None:
+        # Convert row blocks so a float64 source is never copied whole
+        out = np.lib.format.open_memmap(
+            tmp_path / f'{matrix_name}.npy', mode='w+', dtype=dtype, shape=matrix.shape
+        )
+        for start in range(0, matrix.shape[0], 1024):
+            out[start:start + 1024] = matrix[start:start + 1024]
+        out.flush()
+        del out
+    
+    if graph is not None:
+        np.save(tmp_path / 'graph_indptr.npy', np.asarray(graph.indptr, dtype=np.int64))
+        np.save(tmp_path / 'graph_indices.npy', np.asarray(graph.indices, dtype=np.int32))
+        np.save(tmp_path / 'graph_scores.npy', np.asarray(graph.scores, dtype=dtype))
+    
+    if index is None:
+        index = TitleIndex.build(titles, strip_spaces=strip_spaces)
+    with open(tmp_path / 'title_index.pkl', 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(tmp_path / 'title_trigrams.pkl', 'wb') as f:
+        pickle.dump(TrigramIndex.build(titles), f, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    built_at = datetime.now(timezone.utc)
+    manifest = {
+        'format': FORMAT_VERSION,
+        'version': version or new_version(built_at),
+        'built_at': built_at.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'count': len(titles),
+        'matrix': matrix_name,
+        'graph': {'k': graph.k} if graph is not None else None,
+        'dtype': str(np.dtype(dtype)),
+        'checksum': artifact_checksum(tmp_path),
+        **(metadata or {}),
+    }
+    with open(tmp_path / MANIFEST, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    old_path = path.with_name(path.name + '.old')
+    if old_path.exists():
+        shutil.rmtree(old_path)
+    if path.exists():
+        path.rename(old_path)
+    try:
+        tmp_path.rename(path)
+    except OSError:
+        if old_path.exists():
+            old_path.rename(path)
+        raise
+    if old_path.exists():
+        shutil.rmtree(old_path)
+    return path
+
+
+def artifact_checksum(path: Path) -> str:
+    """SHA-256 over the names and contents of an artifact's data files"""
+    digest = hashlib.sha256()
+    for file in sorted(p for p in Path(path).iterdir() if p.name != MANIFEST):
+        digest.update(file.name.encode('utf-8'))
+        with open(file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_artifact(path: Path) -> bool:
+    """Whether the artifact's files still match its manifest checksum.
+
+    Artifacts written before checksums were recorded always pass.
+    """
+    path = resolve_artifact(path)
+    if path is None:
+        return False
+    with open(path / MANIFEST) as f:
+        expected = json.load(f).get('checksum')
+    return expected is None or expected == artifact_checksum(path)
+
+
+def new_version(now: Optional[datetime] = None) -> str:
+    """Sortable version id derived from the build time"""
+    return (now or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%S%f')
+
+
+def publish_artifact(root: Path, titles: List[str], keep: int = 3, **kwargs) -> Path:
+    """Save a new version under root, make it CURRENT and prune old ones"""
+    root = Path(root)
+    version = new_version()
+    path = save_artifact(root / version, titles, version=version, **kwargs)
+    
+    tmp_current = root / (CURRENT + '.tmp')
+    tmp_current.write_text(version)
+    tmp_current.replace(root / CURRENT)
+    
+    versions = sorted(p for p in root.iterdir() if (p / MANIFEST).exists())
+    for old in versions[:-keep] if keep > 0 else []:
+        shutil.rmtree(old, ignore_errors=True)
+    
+    return path
+
+
+def resolve_artifact(path: Path) -> Optional[Path]:
+    """Directory of the artifact to load for a model root, if any.
+
+    A root is either a single artifact or a set of versions with CURRENT.
+    """
+    path = Path(path)
+    if (path / MANIFEST).exists():
+        return path
+    
+    current = path / CURRENT
+    if current.exists():
+        versioned = path / current.read_text().strip()
+        if (versioned / MANIFEST).exists():
+            return versioned
+    
+    return None
+
+
+def is_artifact(path: Path) -> bool:
+    return resolve_artifact(path) is not None
+
+
+def artifact_version(path: Path) -> Optional[str]:
+    """Version of the artifact load_artifact(path) would open, if any"""
+    path = resolve_artifact(path)
+    if path is None:
+        return None
+    with open(path / MANIFEST) as f:
+        return json.load(f).get('version')
+
+
+def legacy_version(path: Path) -> str:
+    """Pickles carry no manifest, so their version is their mtime"""
+    return f"legacy-{Path(path).stat().st_mtime_ns}"
+
+
+def load_artifact(path: Path) -> RecommendationModel:
+    """Open an artifact with every array memory-mapped read-only"""
+    path = resolve_artifact(path)
+    if path is None:
+        raise FileNotFoundError("No model artifact found")
+    
+    with open(path / MANIFEST) as f:
+        manifest = json.load(f)
+    
+    if manifest.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model format: {manifest.get('format')}")
+    
+    titles = StringTable(
+        np.load(path / 'titles_offsets.npy', mmap_mode='r'),
+        np.load(path / 'titles_data.npy', mmap_mode='r'),
+    )
+    with open(path / 'title_index.pkl', 'rb') as f:
+        index = pickle.load(f)
+    
+    arrays = {}
+    if manifest.get('matrix'):
+        arrays[manifest['matrix']] = np.load(path / f"{manifest['matrix']}.npy", mmap_mode='r')
+    if manifest.get('graph'):
+        arrays['graph'] = NeighborGraph(
+            np.load(path / 'graph_indptr.npy', mmap_mode='r'),
+            np.load(path / 'graph_indices.npy', mmap_mode='r'),
+            np.load(path / 'graph_scores.npy', mmap_mode='r'),
+            manifest['graph'].get('k'),
+        )
+    
+    model = RecommendationModel(titles, index, **arrays)
+    # Artifacts written before the trigram index existed build it on first use
+    if (path / 'title_trigrams.pkl').exists():
+        with open(path / 'title_trigrams.pkl', 'rb') as f:
+            model.trigrams = pickle.load(f)
+    model.version = manifest.get('version')
+    model.metadata = manifest
+    return model
+
+
+def load_legacy_pickle(path: Path, frame: str, column: str,
+                       strip_spaces: bool = False) -> RecommendationModel:
+    """Wrap a pickled {frame: DataFrame, 'similarity': matrix} model"""
+    with open(path, 'rb') as f:
+        data = pickle.load(f)
+    
+    titles = data[frame][column].to_numpy()
+    index = data.get('title_index')
+    if not isinstance(index, TitleIndex):
+        index = TitleIndex.build(titles.tolist(), strip_spaces=strip_spaces)
+    
+    model = RecommendationModel(titles, index, similarity=data['similarity'])
+    model.version = legacy_version(path)
+    return model
@@ -0,0 +1,292 @@
+"""Offline pipeline that builds recommendation artifacts from datasets/*.csv.
+
+Each dataset is streamed twice with the csv module, never loaded whole:
+
+1. a statistics pass (row count, feature means/stds or document frequencies)
+2. a vectorizing pass that writes L2-normalized float32 feature rows into a
+   memory-mapped .npy file in a scratch directory
+
+For graph-backed types, cosine similarity is then computed in row blocks
+across a process pool.
+Every worker scores its rows against the feature matrix one column chunk at
+a time and keeps a running top-K, so peak memory per worker is
+block_rows x col_block scores no matter how large the catalog is. Only the
+top-K neighbour graph is published, never the N x N matrix.
+"""
+import csv
+import json
+import re
+import sys
+import tempfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+import numpy as np
+from config.settings import (
+    SONGS_CSV, MOVIES_CSV, WEBSERIES_CSV,
+    SONG_ARTIFACT, MOVIE_ARTIFACT, SERIES_ARTIFACT, MODELS_DIR
+)
+from src.recommender.artifact import publish_artifact
+from src.recommender.graph import NeighborGraph
+
+
+# How each media type is built. Song rows are vectorized from numeric audio
+# features and served through an ANN index over those vectors, so they skip
+# the neighbour graph; movie and series rows use hashed TF-IDF over text
+# columns and a graph. Text columns missing from a CSV are skipped.
+DATASETS = {
+    'song': {
+        'csv': SONGS_CSV, 'artifact': SONG_ARTIFACT,
+        'title': 'SongName', 'kind': 'numeric', 'strip_spaces': True, 'graph': False,
+        'features': [
+            'Danceability', 'Energy', 'Loudness', 'Speechiness', 'Acousticness',
+            'Instrumentalness', 'Liveness', 'Valence', 'Tempo'
+        ]
+    },
+    'movie': {
+        'csv': MOVIES_CSV, 'artifact': MOVIE_ARTIFACT,
+        'title': 'title', 'kind': 'text', 'strip_spaces': False, 'graph': True,
+        'features': ['genres', 'keywords', 'overview', 'tagline']
+    },
+    'webshow': {
+        'csv': WEBSERIES_CSV, 'artifact': SERIES_ARTIFACT,
+        'title': 'Series Title', 'kind': 'text', 'strip_spaces': False, 'graph': True,
+        'features': ['Genre', 'Description', 'Streaming Platform']
+    },
+}
+
+TEXT_DIMENSIONS = 2 ** 11
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from has he her his in is it its of on or "
+    "she that the their they this to was were will with who when where".split()
+)
+
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+def iter_rows(path: Path) -> Iterator[Dict[str, str]]:
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def read_header(path: Path) -> List[str]:
+    with open(path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _numeric_features(path: Path, spec: dict, out_path: Path) -> Tuple[List[str], np.ndarray, dict]:
+    """Standardized, L2-normalized audio features, plus the scaling used"""
+    columns = spec['features']
+    titles: List[str] = []
+
+    # Pass 1: raw values to a scratch file, plus running sums for mean/std
+    raw_path = out_path.with_suffix('.raw')
+    total = np.zeros(len(columns))
+    total_sq = np.zeros(len(columns))
+    counts = np.zeros(len(columns))
+    with open(raw_path, 'wb') as raw:
+        for row in iter_rows(path):
+            values = np.array([_to_float(row.get(c)) for c in columns], dtype=np.float32)
+            present = ~np.isnan(values)
+            total[present] += values[present]
+            total_sq[present] += values[present].astype(np.float64) ** 2
+            counts += present
+            raw.write(values.tobytes())
+            titles.append(row.get(spec['title']) or '')
+
+    counts = np.maximum(counts, 1)
+    mean = total / counts
+    std = np.sqrt(np.maximum(total_sq / counts - mean ** 2, 0))
+    std[std == 0] = 1.0
+
+    # Pass 2: standardize block by block into the feature matrix
+    raw = np.memmap(raw_path, dtype=np.float32, mode='r', shape=(len(titles), len(columns)))
+    features = np.lib.format.open_memmap(
+        out_path, mode='w+', dtype=np.float32, shape=(len(titles), len(columns))
+    )
+    for start in range(0, len(titles), 65536):
+        block = (raw[start:start + 65536] - mean) / std
+        features[start:start + 65536] = _l2_normalize(np.nan_to_num(block))
+    features.flush()
+    del raw
+    raw_path.unlink()
+    return titles, features, {'feature_mean': mean.tolist(), 'feature_std': std.tolist()}
+
+
+def _tokens(value: str) -> List[str]:
+    """Words of a text field; JSON lists like TMDB genres yield whole names"""
+    value = value or ''
+    if value.startswith('[{'):
+        try:
+            return [
+                item['name'].lower().replace(' ', '')
+                for item in json.loads(value) if item.get('name')
+            ]
+        except (ValueError, AttributeError, TypeError):
+            pass
+    return [t for t in TOKEN_PATTERN.findall(value.lower()) if t not in STOP_WORDS]
+
+
+def _hashed_counts(row: Dict[str, str], columns: List[str]) -> Dict[int, int]:
+    counts: Dict[int, int] = {}
+    for column in columns:
+        for token in _tokens(row.get(column)):
+            bucket = zlib.crc32(token.encode('utf-8')) % TEXT_DIMENSIONS
+            counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+def _text_features(path: Path, spec: dict, out_path: Path) -> Tuple[List[str], np.ndarray, dict]:
+    """Hashed TF-IDF over the dataset's text columns"""
+    header = read_header(path)
+    columns = [c for c in spec['features'] if c in header]
+    if not columns:
+        raise ValueError(f"None of {spec['features']} found in {path.name}")
+
+    # Pass 1: document frequency per hash bucket
+    titles: List[str] = []
+    document_freq = np.zeros(TEXT_DIMENSIONS, dtype=np.int64)
+    for row in iter_rows(path):
+        buckets = list(_hashed_counts(row, columns))
+        document_freq[buckets] += 1
+        titles.append(row.get(spec['title']) or '')
+
+    idf = (np.log((1 + len(titles)) / (1 + document_freq)) + 1).astype(np.float32)
+
+    # Pass 2: sublinear tf * idf rows, written in chunks
+    features = np.lib.format.open_memmap(
+        out_path, mode='w+', dtype=np.float32, shape=(len(titles), TEXT_DIMENSIONS)
+    )
+    chunk = np.zeros((4096, TEXT_DIMENSIONS), dtype=np.float32)
+    start = 0
+    for position, row in enumerate(iter_rows(path)):
+        counts = _hashed_counts(row, columns)
+        if counts:
+            buckets = np.fromiter(counts.keys(), dtype=np.int64)
+            tf = np.fromiter(counts.values(), dtype=np.float32)
+            chunk[position - start, buckets] = (1 + np.log(tf)) * idf[buckets]
+        if position - start == len(chunk) - 1:
+            features[start:position + 1] = _l2_normalize(chunk)
+            chunk[:] = 0
+            start = position + 1
+    if start < len(titles):
+        features[start:] = _l2_normalize(chunk[:len(titles) - start])
+    features.flush()
+    return titles, features, {'text_columns': columns, 'dimensions': TEXT_DIMENSIONS}
+
+
+def _l2_normalize(block: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return block / norms
+
+
+def _block_neighbors(features_path: str, start: int, end: int, k: int,
+                     col_block: int) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Top-k cosine neighbours of rows start..end (runs in a worker)"""
+    features = np.load(features_path, mmap_mode='r')
+    n = features.shape[0]
+    rows = np.asarray(features[start:end], dtype=np.float32)
+    m = len(rows)
+    local = np.arange(m)
+
+    best_indices = np.empty((m, 0), dtype=np.int64)
+    best_scores = np.empty((m, 0), dtype=np.float32)
+
+    for col_start in range(0, n, col_block):
+        columns = np.asarray(features[col_start:col_start + col_block], dtype=np.float32)
+        scores = rows @ columns.T
+
+        # Never list an item as its own neighbour
+        diagonal = start + local - col_start
+        on_chunk = (diagonal >= 0) & (diagonal < len(columns))
+        scores[local[on_chunk], diagonal[on_chunk]] = -np.inf
+
+        candidate_indices = np.hstack([
+            best_indices,
+            np.broadcast_to(np.arange(col_start, col_start + len(columns)), scores.shape)
+        ])
+        candidate_scores = np.hstack([best_scores, scores])
+
+        if candidate_scores.shape[1] > k:
+            keep = np.argpartition(candidate_scores, -k, axis=1)[:, -k:]
+            candidate_indices = np.take_along_axis(candidate_indices, keep, axis=1)
+            candidate_scores = np.take_along_axis(candidate_scores, keep, axis=1)
+        best_indices, best_scores = candidate_indices, candidate_scores
+
+    order = np.lexsort((best_indices, -best_scores), axis=1)
+    return (
+        start,
+        np.take_along_axis(best_indices, order, axis=1),
+        np.take_along_axis(best_scores, order, axis=1),
+    )
+
+
+def neighbor_graph(features_path: Path, k: int, block_rows: int = 512,
+                   col_block: int = 8192, workers: int = None,
+                   dtype: str = 'float32') -> NeighborGraph:
+    """Blockwise, parallel top-k cosine graph over a saved feature matrix"""
+    n = np.load(features_path, mmap_mode='r').shape[0]
+    k = max(0, min(k, n - 1))
+    indices = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=dtype)
+
+    if k:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_block_neighbors, str(features_path), start,
+                                min(n, start + block_rows), k, col_block)
+                for start in range(0, n, block_rows)
+            ]
+            for future in futures:
+                start, block_indices, block_scores = future.result()
+                indices[start:start + len(block_indices)] = block_indices
+                scores[start:start + len(block_scores)] = block_scores
+
+    return NeighborGraph(np.arange(n + 1, dtype=np.int64) * k, indices.ravel(), scores.ravel(), k)
+
+
+def build_model(media_type: str, k: int, block_rows: int = 512, col_block: int = 8192,
+                workers: int = None, dtype: str = 'float16', keep_versions: int = 3,
+                keep_embeddings: bool = None) -> Path:
+    """Build and publish a new artifact version for one media type"""
+    spec = DATASETS[media_type]
+    path = Path(spec['csv'])
+    if not path.exists():
+        raise FileNotFoundError(f"Dataset not found: {path}")
+
+    # Audio features are only a handful of columns, so keep them for
+    # embedding-based queries; hashed text vectors are too wide to ship
+    if keep_embeddings is None:
+        keep_embeddings = spec['kind'] == 'numeric'
+
+    with tempfile.TemporaryDirectory(dir=MODELS_DIR, prefix='.build-') as scratch:
+        features_path = Path(scratch) / 'features.npy'
+        vectorize = _numeric_features if spec['kind'] == 'numeric' else _text_features
+        titles, features, feature_metadata = vectorize(path, spec, features_path)
+        del features
+
+        graph = None
+        if spec['graph']:
+            graph = neighbor_graph(features_path, k, block_rows, col_block, workers, dtype)
+
+        return publish_artifact(
+            spec['artifact'], titles, keep=keep_versions,
+            embeddings=np.load(features_path, mmap_mode='r') if keep_embeddings else None,
+            graph=graph, strip_spaces=spec['strip_spaces'], dtype=dtype,
+            metadata={
+                'source': path.name,
+                'features': spec['features'],
+                'kind': spec['kind'],
+                **feature_metadata,
+            }
+        )
@@ -0,0 +1,281 @@
+"""Item-item collaborative filtering over the reviews table"""
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from config.settings import CF_SHRINKAGE, CF_REFRESH_INTERVAL
+from src.recommender.topk import top_k
+
+
+class CollaborativeFilter:
+    """Item-item cosine similarity learned from who rated what.
+
+    The user x item ratings matrix R is read from the reviews table in one
+    streaming pass, and the item co-occurrence R^T R (dot products and
+    co-rater counts) is stored as CSR arrays by item. Reviews written
+    afterwards are folded in incrementally: refresh() reads only rows past
+    the last review_id seen, and each one updates a small delta on top of
+    the CSR base, which is compacted back into it every compact_every
+    updates. Deleted reviews drop out on the next rebuild().
+
+    Lookups check for new reviews at most every refresh_interval seconds.
+    New rows are read from the database before _lock is taken, so lookups
+    only wait while the rows are applied in memory, never on a query.
+
+    Similarity is cosine over raw ratings, shrunk towards 0 for item pairs
+    with few co-raters: dot / sqrt(|i|^2 |j|^2) * n / (n + shrinkage).
+    """
+
+    def __init__(self, db_manager, shrinkage: float = CF_SHRINKAGE, compact_every: int = 50000,
+                 refresh_interval: float = CF_REFRESH_INTERVAL):
+        self.db = db_manager
+        self.shrinkage = shrinkage
+        self.compact_every = compact_every
+        self.refresh_interval = refresh_interval
+        # _lock guards the in-memory model; _refresh_lock lets one thread at
+        # a time read new reviews from the database
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.RLock()
+        self._built = False
+        self._checked_at: Optional[float] = None
+        self._reset()
+
+    def _reset(self):
+        self.watermark = 0
+        self._ids: Dict[int, int] = {}
+        self._by_title: Dict[Tuple[str, str], int] = {}
+        self._titles: List[str] = []
+        self._types: List[str] = []
+        self._user_items: Dict[int, Dict[int, float]] = {}
+        self._norms = np.zeros(0)
+        self._indptr = np.zeros(1, dtype=np.int64)
+        self._cols = np.zeros(0, dtype=np.int32)
+        self._dots = np.zeros(0)
+        self._counts = np.zeros(0, dtype=np.int32)
+        self._delta: Dict[int, Dict[int, List[float]]] = {}
+        self._delta_size = 0
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def _item(self, media_id: int, title: str, media_type: str) -> int:
+        idx = self._ids.get(media_id)
+        if idx is None:
+            idx = self._ids[media_id] = len(self._titles)
+            self._titles.append(title)
+            self._types.append(media_type)
+            self._by_title[(media_type, title.lower())] = idx
+            if idx >= len(self._norms):
+                self._norms = np.concatenate([self._norms, np.zeros(max(16, len(self._norms)))])
+        return idx
+
+    def rebuild(self):
+        """Build from every rated review in one streaming pass"""
+        with self._refresh_lock, self._lock:
+            self._reset()
+            users, items, ratings = array('q'), array('i'), array('d')
+            for row in self.db.iter_review_ratings():
+                items.append(self._item(row.media_id, row.title, row.media_type))
+                users.append(row.user_id)
+                ratings.append(row.rating)
+                self.watermark = row.review_id
+
+            users = np.frombuffer(users, dtype=np.int64)
+            items = np.frombuffer(items, dtype=np.int32)
+            ratings = np.frombuffer(ratings, dtype=np.float64)
+            n_items = len(self._titles)
+
+            # A user's latest review of an item wins (rows arrive by review_id)
+            keys = users * max(n_items, 1) + items
+            _, last = np.unique(keys[::-1], return_index=True)
+            keep = np.sort(len(keys) - 1 - last)
+            users, items, ratings = users[keep], items[keep], ratings[keep]
+
+            order = np.lexsort((items, users))
+            users, items, ratings = users[order], items[order], ratings[order]
+
+            self._norms[:n_items] = np.bincount(items, weights=ratings ** 2, minlength=n_items)
+            for user_id, item, rating in zip(users.tolist(), items.tolist(), ratings.tolist()):
+                self._user_items.setdefault(user_id, {})[item] = rating
+
+            self._indptr, self._cols, self._dots, self._counts = _cooccurrence(
+                users, items, ratings, n_items
+            )
+            self._built = True
+            self._checked_at = time.monotonic()
+
+    def refresh(self):
+        """Apply reviews added since the last build or refresh"""
+        with self._refresh_lock:
+            if not self._built:
+                self.rebuild()
+                return
+            rows = list(self.db.iter_review_ratings(after_review_id=self.watermark))
+            with self._lock:
+                for row in rows:
+                    self.apply_review(row.user_id, row.media_id, row.title, row.media_type, row.rating)
+                    self.watermark = row.review_id
+            self._checked_at = time.monotonic()
+
+    def apply_review(self, user_id: int, media_id: int, title: str, media_type: str, rating: float):
+        """Fold one (user, item, rating) into the model without a rebuild"""
+        with self._lock:
+            i = self._item(media_id, title, media_type)
+            rated = self._user_items.setdefault(user_id, {})
+            old = rated.get(i)
+            if old == rating:
+                return
+
+            change = rating - (old or 0.0)
+            for j, other in rated.items():
+                if j == i:
+                    continue
+                for a, b in ((i, j), (j, i)):
+                    entry = self._delta.setdefault(a, {}).setdefault(b, [0.0, 0])
+                    entry[0] += change * other
+                    if old is None:
+                        entry[1] += 1
+                self._delta_size += 1
+
+            self._norms[i] += rating ** 2 - (old or 0.0) ** 2
+            rated[i] = rating
+
+            if self._delta_size >= self.compact_every:
+                self.compact()
+
+    def compact(self):
+        """Merge the incremental delta into the CSR base"""
+        with self._lock:
+            if not self._delta:
+                return
+            n_items = len(self._titles)
+            base_rows = np.repeat(np.arange(len(self._indptr) - 1), np.diff(self._indptr))
+            delta_rows, delta_cols, delta_dots, delta_counts = [], [], [], []
+            for a, row in self._delta.items():
+                for b, (dot, count) in row.items():
+                    delta_rows.append(a)
+                    delta_cols.append(b)
+                    delta_dots.append(dot)
+                    delta_counts.append(count)
+
+            keys = np.concatenate([
+                base_rows.astype(np.int64) * n_items + self._cols,
+                np.asarray(delta_rows, dtype=np.int64) * n_items + np.asarray(delta_cols, dtype=np.int64)
+            ])
+            dots = np.concatenate([self._dots, delta_dots])
+            counts = np.concatenate([self._counts, delta_counts])
+            self._indptr, self._cols, self._dots, self._counts = _to_csr(keys, dots, counts, n_items)
+            self._delta = {}
+            self._delta_size = 0
+
+    def _row(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(columns, similarities) of item i's co-rated items"""
+        if i < len(self._indptr) - 1:
+            start, end = self._indptr[i], self._indptr[i + 1]
+            cols, dots, counts = self._cols[start:end], self._dots[start:end], self._counts[start:end]
+        else:
+            cols, dots, counts = np.zeros(0, dtype=np.int32), np.zeros(0), np.zeros(0, dtype=np.int32)
+
+        delta = self._delta.get(i)
+        if delta:
+            cols = np.concatenate([cols, np.fromiter(delta.keys(), dtype=np.int32)])
+            dots = np.concatenate([dots, [d for d, _ in delta.values()]])
+            counts = np.concatenate([counts, [c for _, c in delta.values()]])
+            cols, inverse = np.unique(cols, return_inverse=True)
+            dots = np.bincount(inverse, weights=dots)
+            counts = np.bincount(inverse, weights=counts)
+
+        live = counts > 0
+        cols, dots, counts = cols[live], dots[live], counts[live]
+        denominator = np.sqrt(self._norms[i] * self._norms[cols])
+        denominator[denominator == 0] = 1.0
+        similarity = dots / denominator * counts / (counts + self.shrinkage)
+        return cols, similarity
+
+    def _is_fresh(self) -> bool:
+        return (self._checked_at is not None
+                and time.monotonic() - self._checked_at < self.refresh_interval)
+
+    def _ensure_current(self):
+        """Refresh when the last check is older than refresh_interval. While
+        another thread is refreshing, callers use the current model instead
+        of waiting (except before the first build)."""
+        if self._built and self._is_fresh():
+            return
+        if not self._refresh_lock.acquire(blocking=not self._built):
+            return
+        try:
+            if not (self._built and self._is_fresh()):
+                self.refresh()
+        finally:
+            self._refresh_lock.release()
+
+    def similar_titles(self, title: str, media_type: str, top_n: int = 5) -> List[Tuple[str, float]]:
+        """(title, similarity) of the items most co-rated with title"""
+        self._ensure_current()
+        with self._lock:
+            i = self._by_title.get((media_type, title.strip().lower()))
+            if i is None:
+                return []
+
+            cols, similarity = self._row(i)
+            same_type = np.array([self._types[c] == media_type for c in cols.tolist()], dtype=bool)
+            cols, similarity = cols[same_type], similarity[same_type]
+            best, scores = top_k(similarity, top_n)
+            return [(self._titles[cols[b]], float(s)) for b, s in zip(best.tolist(), scores.tolist())]
+
+
+def _cooccurrence(users: np.ndarray, items: np.ndarray, ratings: np.ndarray,
+                  n_items: int, max_pairs: int = 5_000_000):
+    """R^T R for ratings sorted by user, as CSR (indptr, cols, dots, counts).
+
+    Every user contributes all ordered pairs of the items they rated. Pairs
+    are expanded with np.repeat for a run of users at a time, so no more
+    than about max_pairs pairs exist in memory before aggregation.
+    """
+    if len(users) == 0:
+        return _to_csr(np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0), n_items)
+
+    boundaries = np.flatnonzero(np.diff(users)) + 1
+    starts = np.concatenate([[0], boundaries])
+    degrees = np.diff(np.concatenate([starts, [len(users)]]))
+    pair_totals = np.cumsum(degrees.astype(np.int64) ** 2)
+
+    keys, dots, counts = [], [], []
+    first = 0
+    while first < len(starts):
+        budget = (pair_totals[first - 1] if first else 0) + max_pairs
+        last = max(first + 1, int(np.searchsorted(pair_totals, budget, side='right')))
+        chunk_starts, chunk_degrees = starts[first:last], degrees[first:last]
+
+        # Entry e of a user with degree d pairs with the d entries of its user
+        entries = np.arange(chunk_starts[0], chunk_starts[-1] + chunk_degrees[-1])
+        entry_degree = np.repeat(chunk_degrees, chunk_degrees)
+        entry_start = np.repeat(chunk_starts, chunk_degrees)
+        left = np.repeat(entries, entry_degree)
+        offsets = np.arange(len(left)) - np.repeat(np.cumsum(entry_degree) - entry_degree, entry_degree)
+        right = np.repeat(entry_start, entry_degree) + offsets
+        distinct = left != right
+        left, right = left[distinct], right[distinct]
+
+        chunk_keys, inverse = np.unique(
+            items[left].astype(np.int64) * n_items + items[right], return_inverse=True
+        )
+        keys.append(chunk_keys)
+        dots.append(np.bincount(inverse, weights=ratings[left] * ratings[right]))
+        counts.append(np.bincount(inverse))
+        first = last
+
+    return _to_csr(np.concatenate(keys), np.concatenate(dots), np.concatenate(counts), n_items)
+
+
+def _to_csr(keys: np.ndarray, dots: np.ndarray, counts: np.ndarray, n_items: int):
+    """Sum duplicate (row * n_items + col) keys and lay them out as CSR"""
+    keys, inverse = np.unique(keys, return_inverse=True)
+    dots = np.bincount(inverse, weights=dots) if len(keys) else np.zeros(0)
+    counts = np.bincount(inverse, weights=counts).astype(np.int32) if len(keys) else np.zeros(0, dtype=np.int32)
+    rows = keys // max(n_items, 1)
+    indptr = np.zeros(n_items + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_items), out=indptr[1:])
+    return indptr, (keys % max(n_items, 1)).astype(np.int32), dots, counts
@@ -0,0 +1,80 @@
+"""Sparse top-K nearest-neighbour graph stored as CSR arrays"""
+from typing import Optional, Tuple
+import numpy as np
+from src.recommender.topk import top_k_rows
+
+
+class NeighborGraph:
+    """For every item, its K most similar items ordered best first.
+
+    Row i's neighbours are indices[indptr[i]:indptr[i + 1]] with matching
+    scores. Memory is O(N * K) instead of O(N^2), and a lookup is a slice.
+    
+    k, the largest number of neighbours kept for any item, is worked out
+    once here (an O(N) pass) unless the caller already knows it, so reading
+    it while serving costs nothing.
+    """
+    
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, scores: np.ndarray,
+                 k: Optional[int] = None):
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+        if k is None:
+            k = int(np.max(np.diff(indptr))) if len(indptr) > 1 else 0
+        self.k = k
+    
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+    
+    def neighbors(self, position: int) -> Tuple[np.ndarray, np.ndarray]:
+        start, end = self.indptr[position], self.indptr[position + 1]
+        return self.indices[start:end], self.scores[start:end]
+    
+    def dense_row(self, position: int, dtype=np.float32) -> np.ndarray:
+        """Row of the (implicit) similarity matrix; non-neighbours score 0"""
+        row = np.zeros(len(self), dtype=dtype)
+        indices, scores = self.neighbors(position)
+        row[indices] = scores
+        return row
+    
+    @classmethod
+    def from_similarity(cls, similarity, k: int, block_rows: int = 1024,
+                        dtype: str = 'float32') -> 'NeighborGraph':
+        """Keep the top k of every row of a (possibly memory-mapped) matrix.
+
+        Rows are processed in blocks so only block_rows x N values are held
+        in memory at a time.
+        """
+        def score_block(start, end):
+            return np.array(similarity[start:end], dtype=np.float32)
+        
+        return cls._build(similarity.shape[0], score_block, k, block_rows, dtype)
+    
+    @classmethod
+    def from_embeddings(cls, embeddings, k: int, block_rows: int = 1024,
+                        dtype: str = 'float32') -> 'NeighborGraph':
+        """Same as from_similarity, scoring blocks as embeddings @ embeddings.T"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        
+        def score_block(start, end):
+            return embeddings[start:end] @ embeddings.T
+        
+        return cls._build(embeddings.shape[0], score_block, k, block_rows, dtype)
+    
+    @classmethod
+    def _build(cls, n: int, score_block, k: int, block_rows: int, dtype: str) -> 'NeighborGraph':
+        k = max(0, min(k, n - 1))
+        indices = np.empty((n, k), dtype=np.int32)
+        scores = np.empty((n, k), dtype=dtype)
+        
+        for start in range(0, n if k else 0, block_rows):
+            end = min(n, start + block_rows)
+            block_indices, block_scores = top_k_rows(
+                score_block(start, end), k, exclude=np.arange(start, end)
+            )
+            indices[start:end] = block_indices
+            scores[start:end] = block_scores
+        
+        return cls(np.arange(n + 1, dtype=np.int64) * k, indices.ravel(), scores.ravel(), k)
+
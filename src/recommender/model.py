@@ -0,0 +1,202 @@
+"""In-memory view of a loaded recommendation model"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from src.recommender.ann import LSHIndex
+from src.recommender.fuzzy import TrigramIndex
+from src.recommender.graph import NeighborGraph
+from src.recommender.title_index import TitleIndex
+from src.recommender.topk import top_k, top_k_rows
+
+
+class RecommendationModel:
+    """Titles, title index and similarity source for one media type.
+
+    The similarity source is a dense N x N similarity matrix, an N x D
+    matrix of L2-normalized embeddings, a sparse top-K NeighborGraph, or a
+    graph backed by one of the matrices. Arrays may be memory-mapped, in
+    which case only the rows touched by a query are paged in.
+
+    Embedding models can also carry an LSHIndex (see attach_ann). Queries
+    then go through the index, and new items can be added without a rebuild.
+    
+    Titles that miss the exact index can be resolved with fuzzy_lookup,
+    which searches a TrigramIndex loaded from the artifact or built on
+    first use.
+    """
+    
+    def __init__(self, titles, index: TitleIndex, similarity=None, embeddings=None,
+                 graph: Optional[NeighborGraph] = None):
+        if similarity is None and embeddings is None and graph is None:
+            raise ValueError("A model needs a similarity matrix, embeddings or a neighbor graph")
+        self.titles = titles
+        self.index = index
+        self.similarity = similarity
+        self.embeddings = embeddings
+        self.graph = graph
+        self.version: Optional[str] = None
+        self.revision = 0  # bumped whenever items are added in place
+        self.metadata: Dict[str, Any] = {}
+        self.ann: Optional[LSHIndex] = None
+        self.trigrams: Optional[TrigramIndex] = None
+        self._added_titles: List[str] = []
+    
+    def __len__(self) -> int:
+        return len(self.titles) + len(self._added_titles)
+    
+    def title(self, position: int) -> str:
+        if position >= len(self.titles):
+            return self._added_titles[position - len(self.titles)]
+        return self.titles[position]
+    
+    def attach_ann(self, n_tables: int, n_bits: Optional[int], probes: int):
+        """Index the embeddings for approximate nearest-neighbour queries;
+        n_bits of None or 0 picks it from the catalog size"""
+        if self.embeddings is None:
+            raise ValueError("ANN queries need an embedding model")
+        self.ann = LSHIndex.build(self.embeddings, n_tables, n_bits, probes)
+    
+    def add_items(self, titles: List[str], vectors) -> List[int]:
+        """Append items to an ANN-backed model; returns their positions"""
+        if self.ann is None:
+            raise ValueError("Only ANN-backed models accept new items")
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(titles), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        positions = self.ann.add(vectors / norms).tolist()
+        for title, position in zip(titles, positions):
+            self._added_titles.append(title)
+            self.index.add(title, position)
+            if self.trigrams is not None:
+                self.trigrams.add(title, position)
+        self.revision += 1
+        return positions
+    
+    def _vectors(self) -> np.ndarray:
+        """Embeddings as float32, including items added through the ANN"""
+        if self.ann is not None:
+            return self.ann.vectors
+        return np.asarray(self.embeddings, dtype=np.float32)
+    
+    def lookup(self, title: str) -> Optional[int]:
+        return self.index.first(title)
+    
+    def fuzzy_lookup(self, title: str, limit: int = 5,
+                     min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """(position, score) of the titles closest to title, best first"""
+        if self.trigrams is None:
+            trigrams = TrigramIndex.build(self.titles)
+            for offset, added in enumerate(self._added_titles):
+                trigrams.add(added, len(self.titles) + offset)
+            self.trigrams = trigrams
+        return self.trigrams.search(title, self.title, limit=limit, min_score=min_score)
+    
+    def scores(self, position: int) -> np.ndarray:
+        """Similarity of every item to the item at position"""
+        if self.similarity is not None:
+            return np.asarray(self.similarity[position])
+        if self.embeddings is None:
+            return self.graph.dense_row(position)
+        vectors = self._vectors()
+        return vectors @ vectors[position]
+    
+    def similar(self, position: int, top_n: int,
+                exclude: Optional[Iterable[int]] = None) -> List[Tuple[int, float]]:
+        """(position, score) of the top_n items most similar to position"""
+        excluded = [position] if exclude is None else [position, *exclude]
+        
+        if self.ann is not None:
+            indices, scores = self.ann.query(self.ann.vectors[position], top_n, exclude=excluded)
+            return list(zip(indices.tolist(), scores.tolist()))
+        
+        if self.graph is not None:
+            indices, scores = self.graph.neighbors(position)
+            keep = ~np.isin(indices, excluded)
+            # The graph answers on its own unless exclusions ate into top_n
+            # and a full matrix is available to fall back on
+            if keep.sum() >= top_n or (self.similarity is None and self.embeddings is None):
+                indices, scores = indices[keep][:top_n], scores[keep][:top_n]
+                return list(zip(indices.tolist(), scores.tolist()))
+        
+        indices, scores = top_k(self.scores(position), top_n, exclude=excluded)
+        return list(zip(indices.tolist(), scores.tolist()))
+    
+    def similar_many(self, positions: Sequence[int], top_n: int,
+                     block_rows: int = 256) -> List[List[Tuple[int, float]]]:
+        """similar() for many query items at once.
+
+        Graph rows are gathered with one fancy index; matrix-backed models
+        score block_rows queries per matrix operation and run a row-wise
+        top-k over the block.
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        graph = self.graph
+        
+        if self.ann is not None:
+            return [self.similar(int(p), top_n) for p in positions]
+        
+        if graph is not None and (top_n <= graph.k or (self.similarity is None and self.embeddings is None)):
+            k = graph.k
+            if k and graph.indptr[-1] == len(graph) * k:
+                take = min(top_n, k)
+                indices = np.asarray(graph.indices).reshape(-1, k)[positions, :take]
+                scores = np.asarray(graph.scores).reshape(-1, k)[positions, :take]
+                return [list(zip(i.tolist(), s.tolist())) for i, s in zip(indices, scores)]
+            return [self.similar(int(p), top_n) for p in positions]
+        
+        if self.similarity is None:
+            embeddings = self._vectors()
+        
+        results = []
+        for start in range(0, len(positions), block_rows):
+            block_positions = positions[start:start + block_rows]
+            if self.similarity is not None:
+                block = self.similarity[block_positions]
+            else:
+                block = embeddings[block_positions] @ embeddings.T
+            indices, scores = top_k_rows(block, top_n, exclude=block_positions)
+            results.extend(list(zip(i.tolist(), s.tolist())) for i, s in zip(indices, scores))
+        return results
+    
+    def personalized(self, positions: Sequence[int], weights: Sequence[float], top_n: int,
+                     exclude: Optional[Iterable[int]] = None,
+                     block_rows: int = 256) -> List[Tuple[int, float]]:
+        """Top items by the weighted average of several items' similarity rows.
+
+        The seed items and anything in exclude are never returned. Graph
+        models scatter the seeds' neighbour lists into one score vector with
+        np.bincount; matrix models sum weighted rows block by block.
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        weights = np.asarray(weights, dtype=np.float32)
+        if len(positions) == 0 or weights.sum() == 0:
+            return []
+        
+        n = len(self)
+        graph = self.graph
+        if graph is not None and self.ann is None:
+            k = graph.k
+            if k and graph.indptr[-1] == n * k:
+                neighbors = np.asarray(graph.indices).reshape(-1, k)[positions]
+                contributions = np.asarray(graph.scores).reshape(-1, k)[positions]
+                contributions = contributions.astype(np.float32) * weights[:, None]
+            else:
+                rows = [graph.neighbors(p) for p in positions]
+                neighbors = np.concatenate([r[0] for r in rows])
+                contributions = np.concatenate([r[1] for r in rows]).astype(np.float32)
+                contributions *= np.repeat(weights, [len(r[0]) for r in rows])
+            scores = np.bincount(neighbors.ravel(), weights=contributions.ravel(), minlength=n)
+        elif self.similarity is not None:
+            scores = np.zeros(n, dtype=np.float64)
+            for start in range(0, len(positions), block_rows):
+                block = np.asarray(self.similarity[positions[start:start + block_rows]], dtype=np.float32)
+                scores += weights[start:start + block_rows] @ block
+        else:
+            embeddings = self._vectors()
+            scores = embeddings @ (weights @ embeddings[positions])
+        
+        scores = scores / weights.sum()
+        excluded = positions if exclude is None else np.concatenate(
+            [positions, np.fromiter(exclude, dtype=np.intp)]
+        )
+        indices, top_scores = top_k(scores, top_n, exclude=excluded)
+        return list(zip(indices.tolist(), top_scores.tolist()))
@@ -0,0 +1,56 @@
+"""Exact title lookup for recommendation models"""
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+def normalize_title(title: str, strip_spaces: bool = False) -> str:
+    """Normalize a title the same way at build time and at query time"""
+    normalized = title.strip().lower()
+    return normalized.replace(" ", "") if strip_spaces else normalized
+
+
+class TitleIndex:
+    """Hash map from normalized title to row position(s) in a model.
+
+    Built once when a model is loaded (or stored alongside it), so resolving
+    a title is a dict lookup instead of a string pass over every row.
+    Unique titles map to a single int; duplicates map to a tuple of rows.
+    """
+    
+    def __init__(self, rows: Dict[str, Union[int, Tuple[int, ...]]], strip_spaces: bool = False):
+        self._rows = rows
+        self.strip_spaces = strip_spaces
+    
+    @classmethod
+    def build(cls, titles: Iterable[str], strip_spaces: bool = False) -> 'TitleIndex':
+        index = cls({}, strip_spaces)
+        for position, title in enumerate(titles):
+            if isinstance(title, str):
+                index.add(title, position)
+        return index
+    
+    def add(self, title: str, position: int):
+        key = normalize_title(title, self.strip_spaces)
+        existing = self._rows.get(key)
+        if existing is None:
+            self._rows[key] = position
+        elif isinstance(existing, tuple):
+            self._rows[key] = existing + (position,)
+        else:
+            self._rows[key] = (existing, position)
+    
+    def lookup(self, title: str) -> List[int]:
+        """All row positions whose title matches, in catalog order"""
+        found = self._rows.get(normalize_title(title, self.strip_spaces))
+        if found is None:
+            return []
+        return list(found) if isinstance(found, tuple) else [found]
+    
+    def first(self, title: str) -> Optional[int]:
+        matches = self.lookup(title)
+        return matches[0] if matches else None
+    
+    def __contains__(self, title: str) -> bool:
+        return normalize_title(title, self.strip_spaces) in self._rows
+    
+    def __len__(self) -> int:
+        return len(self._rows)
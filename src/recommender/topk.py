@@ -0,0 +1,85 @@
+"""Vectorized top-k selection over similarity scores"""
+from typing import Iterable, Optional, Sequence, Tuple
+import numpy as np
+
+
+def top_k(scores, k: int, exclude: Optional[Iterable[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (indices, scores) of the k highest scores, best first.
+
+    Uses argpartition so only the k + len(exclude) candidates (and any
+    scores tied with the last of them) are sorted, instead of sorting the
+    whole row. Equal scores are ordered by index, matching a stable full
+    sort, and NaN scores rank below every number.
+    """
+    scores = np.asarray(scores).ravel()
+    n = scores.shape[0]
+    keys = _rank_keys(scores)
+
+    excluded = np.unique(np.asarray(
+        [] if exclude is None else list(exclude), dtype=np.intp
+    ))
+    excluded = excluded[(excluded >= 0) & (excluded < n)]
+
+    k = max(0, min(k, n - excluded.size))
+    if k == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=scores.dtype)
+
+    # Pull enough candidates that excluded rows can never push out a real result
+    wanted = min(n, k + excluded.size)
+    if wanted < n:
+        kth = keys[np.argpartition(keys, n - wanted)[n - wanted]]
+        # argpartition splits ties at the boundary arbitrarily, so keep them all
+        candidates = np.flatnonzero(keys >= kth)
+    else:
+        candidates = np.arange(n)
+
+    if excluded.size:
+        candidates = candidates[~np.isin(candidates, excluded)]
+
+    order = np.lexsort((candidates, -keys[candidates]))
+    candidates = candidates[order[:k]]
+    return candidates, scores[candidates]
+
+
+def top_k_rows(scores, k: int, exclude: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise top_k for a 2-D block of scores, best first.
+
+    exclude gives one column per row to skip (typically the query item
+    itself). Ties and NaN scores are ordered as in top_k. Returns
+    (indices, scores), both of shape (rows, k).
+    """
+    scores = np.array(scores, dtype=np.float32)
+    scores[np.isnan(scores)] = -np.inf
+    rows, n = scores.shape
+    skip = None if exclude is None else np.asarray(exclude, dtype=np.intp)
+    
+    k = max(0, min(k, n if skip is None else n - 1))
+    if k == 0:
+        return np.empty((rows, 0), dtype=np.intp), np.empty((rows, 0), dtype=np.float32)
+    
+    # One spare candidate per row stands in for the excluded column
+    wanted = k if skip is None else k + 1
+    if wanted < n:
+        candidates = np.argpartition(scores, n - wanted, axis=1)[:, n - wanted:]
+        # Rows with ties at the boundary fall back to a stable full sort
+        kth = np.take_along_axis(scores, candidates, axis=1).min(axis=1)
+        tied = (scores >= kth[:, None]).sum(axis=1) > wanted
+        if tied.any():
+            candidates[tied] = np.argsort(-scores[tied], axis=1, kind='stable')[:, :wanted]
+    else:
+        candidates = np.broadcast_to(np.arange(n), (rows, n))
+    
+    order = np.lexsort((candidates, -np.take_along_axis(scores, candidates, axis=1)), axis=1)
+    candidates = np.take_along_axis(candidates, order, axis=1)
+    if skip is not None:
+        keep = candidates != skip[:, None]
+        keep[keep.all(axis=1), -1] = False
+        candidates = candidates[keep].reshape(rows, -1)
+    candidates = candidates[:, :k]
+    return candidates, np.take_along_axis(scores, candidates, axis=1)
+
+def _rank_keys(scores: np.ndarray) -> np.ndarray:
+    """scores as float64 with NaN mapped to -inf, for ordering"""
+    keys = scores.astype(np.float64)
+    keys[np.isnan(keys)] = -np.inf
+    return keys
@@ -1,176 +1,456 @@
 """Recommendation service for all media types"""
-import pickle
-from pathlib import Path
-from typing import List, Dict, Optional
-from config.settings import SONG_MODEL, MOVIE_MODEL, SERIES_MODEL
+import threading
+from typing import TYPE_CHECKING, Any, List, Dict, Optional
+from config.settings import (
+    SONG_MODEL, MOVIE_MODEL, SERIES_MODEL,
+    SONG_ARTIFACT, MOVIE_ARTIFACT, SERIES_ARTIFACT, HYBRID_CONTENT_WEIGHT,
+    SONG_ANN, ANN_TABLES, ANN_BITS, ANN_PROBES, FUZZY_MIN_SCORE,
+    MODEL_WATCH_INTERVAL, RESULT_CACHE_SIZE, RESULT_CACHE_REDIS, RESULT_CACHE_REDIS_TTL
+)
+from src.cache.lru_cache import LRUCache
+from src.recommender.title_index import normalize_title
+
+if TYPE_CHECKING:
+    from src.recommender.collaborative import CollaborativeFilter
+    from src.recommender.model import RecommendationModel
+
+
+# Where each media type's model lives. 'frame'/'column' describe the legacy
+# pickle layout and are only used when no compact artifact exists. 'ann'
+# serves embedding models through an LSH index instead of a full scan.
+MODEL_SOURCES = {
+    'movie': {
+        'label': 'Movie', 'plural': 'movies',
+        'artifact': MOVIE_ARTIFACT, 'pickle': MOVIE_MODEL,
+        'frame': 'movies', 'column': 'title', 'strip_spaces': False, 'ann': False
+    },
+    'song': {
+        'label': 'Song', 'plural': 'songs',
+        'artifact': SONG_ARTIFACT, 'pickle': SONG_MODEL,
+        'frame': 'songs', 'column': 'SongName', 'strip_spaces': True, 'ann': SONG_ANN
+    },
+    'webshow': {
+        'label': 'Series', 'plural': 'series',
+        'artifact': SERIES_ARTIFACT, 'pickle': SERIES_MODEL,
+        'frame': 'shows', 'column': 'Series Title', 'strip_spaces': False, 'ann': False
+    },
+}
+
+
+# Model load states reported by RecommendationService.status()
+NOT_LOADED = 'not_loaded'
+LOADING = 'loading'
+READY = 'ready'
+MISSING = 'missing'
+FAILED = 'failed'
+
+# recommend() strategies: the content models, the collaborative filter, or a blend
+STRATEGIES = ('content', 'collaborative', 'hybrid')
 
 
 class RecommendationService:
-    """Unified recommendation service for movies, songs, and web series"""
+    """Unified recommendation service for movies, songs, and web series.
+
+    Models are loaded lazily on first use of their media type, so building
+    the service is free. Concurrent first callers for a type wait on one
+    shared load. preload() warms every model, optionally in the background.
+    An optional CollaborativeFilter enables the collaborative and hybrid
+    strategies of recommend().
+    
+    reload() (or the watcher started by watch()) opens a newly published
+    model version off the request path and then replaces the entry in
+    self.models in one assignment. Requests hold their own reference to the
+    model they started with, so in-flight ones finish on the old version.
+    
+    Content recommendations are cached by (model version, media type,
+    normalized title, top_n) in an LRU, and optionally in Redis. A new
+    model version or in-place item additions change the key, so cached
+    results never need expiring.
+    """
     
-    def __init__(self):
-        self.movie_model = None
-        self.song_model = None
-        self.series_model = None
+    def __init__(self, preload: bool = False,
+                 collaborative: Optional['CollaborativeFilter'] = None,
+                 watch_interval: float = MODEL_WATCH_INTERVAL,
+                 cache_size: int = RESULT_CACHE_SIZE, use_redis: bool = RESULT_CACHE_REDIS):
+        self.collaborative = collaborative
+        self.models: Dict[str, 'RecommendationModel'] = {}
+        self._states: Dict[str, str] = {media_type: NOT_LOADED for media_type in MODEL_SOURCES}
+        self._load_locks = {media_type: threading.Lock() for media_type in MODEL_SOURCES}
+        self._preload_thread: Optional[threading.Thread] = None
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        self._rejected: Dict[str, Optional[str]] = {}
+        self.results = LRUCache(cache_size)
+        self._redis = self._connect_redis() if use_redis else None
+        self._redis_hits = 0
         
-        self._load_movie_model()
-        self._load_song_model()
-        self._load_series_model()
+        if preload:
+            self.preload(background=True)
+        if watch_interval > 0:
+            self.watch(watch_interval)
     
-    def _load_movie_model(self):
-        try:
-            if MOVIE_MODEL.exists():
-                with open(MOVIE_MODEL, 'rb') as f:
-                    data = pickle.load(f)
-                self.movie_model = {
-                    'movies': data['movies'],
-                    'similarity': data['similarity']
-                }
-                print(f"[OK] Movie model loaded ({len(data['movies'])} movies)")
-            else:
-                print(f"[WARNING] Movie model not found at: {MOVIE_MODEL}")
-        except Exception as e:
-            print(f"[ERROR] Loading movie model: {e}")
+    def preload(self, background: bool = True) -> Optional[threading.Thread]:
+        """Load every model now, or in a daemon thread if background"""
+        def load_all():
+            for media_type in MODEL_SOURCES:
+                self.get_model(media_type)
+        
+        if not background:
+            load_all()
+            return None
+        
+        if self._preload_thread is None or not self._preload_thread.is_alive():
+            self._preload_thread = threading.Thread(
+                target=load_all, name='recommendation-preload', daemon=True
+            )
+            self._preload_thread.start()
+        return self._preload_thread
     
-    def _load_song_model(self):
-        try:
-            if SONG_MODEL.exists():
-                with open(SONG_MODEL, 'rb') as f:
-                    data = pickle.load(f)
-                self.song_model = {
-                    'songs': data['songs'],
-                    'similarity': data['similarity']
-                }
-                print(f"[OK] Song model loaded ({len(data['songs'])} songs)")
-            else:
-                print(f"[WARNING] Song model not found at: {SONG_MODEL}")
-        except Exception as e:
-            print(f"[ERROR] Loading song model: {e}")
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Load state of each model, with size and version once ready"""
+        report = {}
+        for media_type, state in self._states.items():
+            entry: Dict[str, Any] = {'state': state}
+            model = self.models.get(media_type)
+            if model is not None:
+                entry['items'] = len(model)
+                entry['version'] = model.version
+            report[media_type] = entry
+        return report
+    
+    def is_ready(self, media_type: str) -> bool:
+        return self._states.get(media_type) == READY
+    
+    def get_model(self, media_type: str) -> Optional['RecommendationModel']:
+        """The loaded model for media_type, loading it on first use"""
+        if self._states[media_type] in (NOT_LOADED, LOADING):
+            # A load in progress holds the lock, so this waits for it
+            with self._load_locks[media_type]:
+                # Another caller may have finished the load while we waited
+                if self._states[media_type] == NOT_LOADED:
+                    self._load_model(media_type)
+        return self.models.get(media_type)
     
-    def _load_series_model(self):
+    def _load_model(self, media_type: str):
+        source = MODEL_SOURCES[media_type]
+        self._states[media_type] = LOADING
         try:
-            if SERIES_MODEL.exists():
-                with open(SERIES_MODEL, 'rb') as f:
-                    data = pickle.load(f)
-                self.series_model = {
-                    'shows': data['shows'],
-                    'similarity': data['similarity']
-                }
-                print(f"[OK] Series model loaded ({len(data['shows'])} series)")
-            else:
-                print(f"[WARNING] Series model not found at: {SERIES_MODEL}")
+            model = self._read_model(media_type)
+            if model is None:
+                print(f"[WARNING] {source['label']} model not found at: {source['artifact']}")
+                self._states[media_type] = MISSING
+                return
+            
+            self.models[media_type] = model
+            self._states[media_type] = READY
+            print(f"[OK] {source['label']} model loaded ({len(model)} {source['plural']})")
         except Exception as e:
-            print(f"[ERROR] Loading series model: {e}")
+            self._states[media_type] = FAILED
+            print(f"[ERROR] Loading {source['label'].lower()} model: {e}")
     
-    def recommend(self, media_type: str, title: str, top_n: int = 5) -> Optional[List[Dict]]:
-        """Unified recommendation interface"""
-        if media_type == 'movie':
-            return self._recommend_movies(title, top_n)
-        elif media_type == 'song':
-            return self._recommend_songs(title, top_n)
-        elif media_type == 'webshow':
-            return self._recommend_series(title, top_n)
+    @staticmethod
+    def _read_model(media_type: str, verify: bool = False) -> Optional['RecommendationModel']:
+        """Open the current model for media_type, ready to serve"""
+        # Imported here so that creating the service doesn't pull in NumPy
+        from src.recommender.artifact import (
+            is_artifact, load_artifact, load_legacy_pickle, verify_artifact
+        )
+        
+        source = MODEL_SOURCES[media_type]
+        if is_artifact(source['artifact']):
+            if verify and not verify_artifact(source['artifact']):
+                raise ValueError("artifact checksum mismatch")
+            model = load_artifact(source['artifact'])
+        elif source['pickle'].exists():
+            model = load_legacy_pickle(
+                source['pickle'], source['frame'], source['column'],
+                strip_spaces=source['strip_spaces']
+            )
         else:
+            return None
+        
+        if source['ann'] and model.embeddings is not None:
+            model.attach_ann(ANN_TABLES, ANN_BITS, ANN_PROBES)
+        return model
+    
+    @staticmethod
+    def published_version(media_type: str) -> Optional[str]:
+        """Version of the model currently on disk for media_type"""
+        from src.recommender.artifact import artifact_version, is_artifact, legacy_version
+        
+        source = MODEL_SOURCES[media_type]
+        if is_artifact(source['artifact']):
+            return artifact_version(source['artifact'])
+        if source['pickle'].exists():
+            return legacy_version(source['pickle'])
+        return None
+    
+    def model_version(self, media_type: str) -> Optional[str]:
+        """Version being served, or the one that would load if none is yet"""
+        model = self.models.get(media_type)
+        if model is not None:
+            return model.version
+        return self.published_version(media_type)
+    
+    def reload(self, media_type: Optional[str] = None, force: bool = False) -> Dict[str, bool]:
+        """Swap in newly published model versions; returns what was swapped.
+
+        The new model is opened and checksum-verified while the old one
+        keeps serving. Types that were never loaded are skipped, since
+        their first use will load the latest version anyway.
+        """
+        swapped = {}
+        for kind in [media_type] if media_type else list(MODEL_SOURCES):
+            swapped[kind] = False
+            current = self.models.get(kind)
+            if current is None:
+                continue
+            
+            # The load lock only serialises reloads; READY readers never take it
+            with self._load_locks[kind]:
+                current = self.models[kind]
+                published = self.published_version(kind)
+                # A version that failed once is not retried until a newer one appears
+                if not force and published in (current.version, self._rejected.get(kind)):
+                    continue
+                
+                source = MODEL_SOURCES[kind]
+                try:
+                    model = self._read_model(kind, verify=True)
+                except Exception as e:
+                    self._rejected[kind] = published
+                    print(f"[ERROR] Reloading {source['label'].lower()} model {published}: {e}")
+                    continue
+                if model is None:
+                    print(f"[WARNING] {source['label']} model disappeared; keeping {current.version}")
+                    continue
+                
+                self.models[kind] = model
+                swapped[kind] = True
+                print(f"[OK] {source['label']} model {current.version} -> {model.version}")
+        return swapped
+    
+    def reload_async(self, media_type: Optional[str] = None) -> threading.Thread:
+        """reload() in a daemon thread"""
+        thread = threading.Thread(
+            target=self.reload, args=(media_type,), name='recommendation-reload', daemon=True
+        )
+        thread.start()
+        return thread
+    
+    def watch(self, interval: float = 5.0) -> threading.Thread:
+        """Poll for newly published versions every interval seconds"""
+        def poll():
+            while not self._watch_stop.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"[ERROR] Model watcher: {e}")
+        
+        if self._watch_thread is None or not self._watch_thread.is_alive():
+            self._watch_stop.clear()
+            self._watch_thread = threading.Thread(target=poll, name='recommendation-watch', daemon=True)
+            self._watch_thread.start()
+        return self._watch_thread
+    
+    def stop_watching(self):
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
+    
+    def recommend(self, media_type: str, title: str, top_n: int = 5,
+                  strategy: str = 'content') -> Optional[List[Dict]]:
+        """Unified recommendation interface"""
+        if media_type not in MODEL_SOURCES:
             print(f"[ERROR] Invalid media type: {media_type}")
             return None
+        
+        if strategy not in STRATEGIES:
+            print(f"[ERROR] Invalid strategy: {strategy}")
+            return None
+        
+        if strategy != 'content' and self.collaborative is None:
+            print("[ERROR] Collaborative filtering not configured")
+            return None
+        
+        if strategy == 'collaborative':
+            return self._recommend_collaborative(media_type, title, top_n)
+        if strategy == 'hybrid':
+            return self._recommend_hybrid(media_type, title, top_n)
+        return self._recommend_content(media_type, title, top_n)
     
-    def _recommend_movies(self, title: str, top_n: int = 5) -> Optional[List[Dict]]:
-        if not self.movie_model:
-            print("[ERROR] Movie model not available")
+    def _recommend_content(self, media_type: str, title: str, top_n: int) -> Optional[List[Dict]]:
+        label = MODEL_SOURCES[media_type]['label']
+        model = self.get_model(media_type)
+        if model is None:
+            print(f"[ERROR] {label} model not available")
             return None
         
-        movies = self.movie_model['movies']
-        similarity = self.movie_model['similarity']
+        key = self._result_key(model, media_type, title, top_n)
+        cached = self._cached_result(key)
+        if cached is not None:
+            return cached
+        
+        idx = model.lookup(title)
+        if idx is None:
+            matches = model.fuzzy_lookup(title, limit=1, min_score=FUZZY_MIN_SCORE)
+            if not matches:
+                print(f"[ERROR] {label} '{title}' not found in recommendation database")
+                return None
+            idx = matches[0][0]
+            print(f"[INFO] Using closest {label.lower()} match '{model.title(idx)}' for '{title}'")
         
+        results = self._format(model, model.similar(idx, top_n))
+        self.results.set(key, results)
+        if self._redis is not None:
+            self._redis.set(key, results, ttl=RESULT_CACHE_REDIS_TTL)
+        return [dict(rec) for rec in results]
+    
+    @staticmethod
+    def _result_key(model: 'RecommendationModel', media_type: str, title: str, top_n: int) -> str:
+        normalized = normalize_title(title, MODEL_SOURCES[media_type]['strip_spaces'])
+        return f"recommend:{model.version}.{model.revision}:{media_type}:{normalized}:{top_n}"
+    
+    def _cached_result(self, key: str) -> Optional[List[Dict]]:
+        """A copy of the cached results for key, checking the LRU then Redis"""
+        results = self.results.get(key)
+        if results is None and self._redis is not None:
+            results = self._redis.get(key)
+            if results is not None:
+                self._redis_hits += 1
+                self.results.set(key, results)
+        return None if results is None else [dict(rec) for rec in results]
+    
+    @staticmethod
+    def _connect_redis():
         try:
-            idx = movies[movies['title'].str.lower() == title.lower()].index[0]
-            movie_title = movies.iloc[idx]['title']
-            
-            distances = sorted(
-                list(enumerate(similarity[idx])),
-                reverse=True,
-                key=lambda x: x[1]
-            )
-            
-            results = []
-            for similar_idx, score in distances[1:top_n+1]:
-                rec_title = movies.iloc[similar_idx]['title']
-                results.append({
-                    'title': rec_title,
-                    'score': int(score * 100)
-                })
-            
-            return results
-            
-        except IndexError:
-            print(f"[ERROR] Movie '{title}' not found in recommendation database")
+            from src.cache.redis_cache import cache
+        except Exception as e:
+            print(f"[WARNING] Redis result cache unavailable: {e}")
             return None
+        return cache if cache.available else None
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Result cache counters; redis_hits are LRU misses served by Redis"""
+        stats = self.results.stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['redis_hits'] = self._redis_hits
+        stats['overall_hit_rate'] = (stats['hits'] + self._redis_hits) / lookups if lookups else 0.0
+        return stats
     
-    def _recommend_songs(self, input_name: str, top_n: int = 5) -> Optional[List[Dict]]:
-        if not self.song_model:
-            print("[ERROR] Song model not available")
+    def suggest_titles(self, media_type: str, title: str, limit: int = 5) -> List[Dict]:
+        """Known titles closest to a possibly misspelled one"""
+        model = self.get_model(media_type) if media_type in MODEL_SOURCES else None
+        if model is None:
+            return []
+        
+        # Catalogs repeat some titles, so over-fetch and keep the first of each
+        suggestions: Dict[str, int] = {}
+        for position, score in model.fuzzy_lookup(title, limit=limit * 4):
+            suggestions.setdefault(model.title(position), int(score * 100))
+        return [{'title': t, 'score': score} for t, score in list(suggestions.items())[:limit]]
+    
+    def _recommend_collaborative(self, media_type: str, title: str, top_n: int) -> Optional[List[Dict]]:
+        similar = self.collaborative.similar_titles(title, media_type, top_n)
+        if not similar:
+            label = MODEL_SOURCES[media_type]['label']
+            print(f"[ERROR] {label} '{title}' has no co-rated items yet")
             return None
         
-        songs = self.song_model['songs']
-        similarity = self.song_model['similarity']
+        return [{'title': rec_title, 'score': int(score * 100)} for rec_title, score in similar]
+    
+    def _recommend_hybrid(self, media_type: str, title: str, top_n: int) -> Optional[List[Dict]]:
+        """Blend content and collaborative scores over both candidate pools"""
+        pool = top_n * 4
+        content = self._recommend_content(media_type, title, pool) or []
+        collaborative = self.collaborative.similar_titles(title, media_type, pool)
+        if not content and not collaborative:
+            return None
         
-        input_clean = input_name.lower().replace(" ", "")
+        blended: Dict[str, float] = {}
+        for rec in content:
+            blended[rec['title']] = HYBRID_CONTENT_WEIGHT * rec['score'] / 100
+        for rec_title, score in collaborative:
+            blended[rec_title] = blended.get(rec_title, 0.0) + (1 - HYBRID_CONTENT_WEIGHT) * score
         
-        song_matches = songs[
-            songs['SongName'].str.lower().str.replace(" ", "") == input_clean
-        ]
+        ranked = sorted(blended.items(), key=lambda item: item[1], reverse=True)[:top_n]
+        return [{'title': rec_title, 'score': int(score * 100)} for rec_title, score in ranked]
+    
+    def recommend_many(self, media_type: str, titles: List[str],
+                       top_n: int = 5) -> Optional[List[Optional[List[Dict]]]]:
+        """Recommendations for many seed titles in one vectorized pass.
+
+        Returns one entry per title, in order; unknown titles get None.
+        """
+        if media_type not in MODEL_SOURCES:
+            print(f"[ERROR] Invalid media type: {media_type}")
+            return None
         
-        if song_matches.empty:
-            print(f"[ERROR] Song '{input_name}' not found in recommendation database")
+        model = self.get_model(media_type)
+        if model is None:
+            print(f"[ERROR] {MODEL_SOURCES[media_type]['label']} model not available")
             return None
         
-        idx = song_matches.index[0]
+        positions = [model.lookup(title) for title in titles]
+        found = iter(model.similar_many([p for p in positions if p is not None], top_n))
+        return [
+            None if position is None else self._format(model, next(found))
+            for position in positions
+        ]
+    
+    def recommend_for_user(self, media_type: str, ratings: Dict[str, float],
+                           top_n: int = 5) -> Optional[List[Dict]]:
+        """Personalized recommendations from a user's whole rating history.
+
+        ratings maps title -> rating (see DatabaseManager.get_user_ratings).
+        Similarity rows of every known title are combined, weighted by
+        rating, and titles the user already rated are never returned.
+        """
+        if media_type not in MODEL_SOURCES:
+            print(f"[ERROR] Invalid media type: {media_type}")
+            return None
         
-        distances = sorted(
-            list(enumerate(similarity[idx])),
-            reverse=True,
-            key=lambda x: x[1]
-        )
+        model = self.get_model(media_type)
+        if model is None:
+            print(f"[ERROR] {MODEL_SOURCES[media_type]['label']} model not available")
+            return None
         
-        results = []
-        for similar_idx, score in distances[1:top_n+1]:
-            rec_song = songs.iloc[similar_idx]['SongName']
-            results.append({
-                'title': rec_song,
-                'score': int(score * 100)
-            })
+        # Seed with the first row of each title, but hide every duplicate
+        matches = [(model.index.lookup(title), rating) for title, rating in ratings.items()]
+        matches = [(rows, rating) for rows, rating in matches if rows]
+        if not matches:
+            return None
         
-        return results
+        positions = [rows[0] for rows, _ in matches]
+        weights = [rating for _, rating in matches]
+        already_rated = [row for rows, _ in matches for row in rows[1:]]
+        return self._format(
+            model, model.personalized(positions, weights, top_n, exclude=already_rated)
+        )
     
-    def _recommend_series(self, title: str, top_n: int = 5) -> Optional[List[Dict]]:
-        if not self.series_model:
-            print("[ERROR] Series model not available")
-            return None
+    def add_items(self, media_type: str, items: List[Dict]) -> Optional[List[int]]:
+        """Add catalog items to an ANN-backed model without rebuilding it.
+
+        Each item is {'title': ..., <feature column>: value, ...} with the raw
+        feature columns the model was built from (see the manifest).
+        """
+        import numpy as np
         
-        shows = self.series_model['shows']
-        similarity = self.series_model['similarity']
+        model = self.get_model(media_type)
+        if model is None or model.ann is None:
+            print(f"[ERROR] {media_type} model does not accept new items")
+            return None
         
-        try:
-            idx = shows[
-                shows['Series Title'].str.lower() == title.lower()
-            ].index[0]
-            
-            distances = sorted(
-                list(enumerate(similarity[idx])),
-                reverse=True,
-                key=lambda x: x[1]
-            )
-            
-            results = []
-            for similar_idx, score in distances[1:top_n+1]:
-                rec_title = shows.iloc[similar_idx]['Series Title']
-                results.append({
-                    'title': rec_title,
-                    'score': int(score * 100)
-                })
-            
-            return results
-            
-        except IndexError:
-            print(f"[ERROR] Series '{title}' not found in recommendation database")
-            return None
\ No newline at end of file
+        columns = model.metadata['features']
+        mean = np.asarray(model.metadata['feature_mean'])
+        std = np.asarray(model.metadata['feature_std'])
+        raw = np.array([[float(item[c]) for c in columns] for item in items])
+        return model.add_items([item['title'] for item in items], (raw - mean) / std)
+    
+    @staticmethod
+    def _format(model: 'RecommendationModel', similar) -> List[Dict]:
+        return [
+            {'title': model.title(similar_idx), 'score': int(score * 100)}
+            for similar_idx, score in similar
+        ]
@@ -1,17 +1,19 @@
 import json
-import threading
 from typing import Dict, Any
 from src.database.manager import DatabaseManager
+from src.database.profiling import profiler
 from src.cache.redis_cache import cache
 from src.patterns.observer import notification_subject
 from concurrent.futures import ThreadPoolExecutor
+from config.settings import TRENDING_CACHE_TTL
 
 
+@profiler.register
 class ReviewService:
     
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
-        self._lock = threading.Lock()
+        self._lock = profiler.lock('ReviewService._lock')
     
     def add_review_threaded(self, username: str, title: str, media_type: str, 
                        rating: float, review_text: str = '') -> tuple[bool, str]:
@@ -24,26 +26,30 @@ class ReviewService:
         if success:
             # Clear cache
             cache.clear_pattern(f"top_rated:{media_type}:*")
+            cache.clear_pattern(f"trending:{media_type}:*")
             cache.delete(f"reviews:all")
             
-            # Notify users who have this media in favorites
-            users_to_notify = self.db.get_users_who_favorited(title, media_type)
-            
-            if users_to_notify:
-                print()  # Add blank line before notifications
-                notification_subject.notify_users(
-                    users_to_notify,
-                    f"New review for '{title}' by {username}",
-                    {
-                        'title': title,
-                        'media_type': media_type,
-                        'rating': rating,
-                        'username': username
-                    }
-                )
+            # Notify users who have this media in favorites. Followers are
+            # looked up and notified by the dispatch workers, not here
+            notification_subject.notify_followers(
+                lambda: self._followers(title, media_type),
+                f"New review for '{title}' by {username}",
+                {
+                    'title': title,
+                    'media_type': media_type,
+                    'rating': rating,
+                    'username': username
+                }
+            )
         
         return success, message
     
+    def _followers(self, title: str, media_type: str) -> list[str]:
+        """Who favorited the media, from the in-memory index once it is loaded"""
+        if notification_subject.favorites.loaded:
+            return notification_subject.favorites.followers(title, media_type)
+        return self.db.get_users_who_favorited(title, media_type)
+    
     def get_top_rated_cached(self, media_type: str, limit: int = 5):
         """Get top rated media with caching"""
         cache_key = f"top_rated:{media_type}:{limit}"
@@ -68,6 +74,27 @@ class ReviewService:
         cache.set(cache_key, data)
         return data
     
+    def get_trending_cached(self, media_type: str, hours: int = 24, limit: int = 10):
+        """Most reviewed media of the last `hours` hours, with caching"""
+        cache_key = f"trending:{media_type}:{hours}:{limit}"
+        
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
+        
+        data = [
+            {
+                'title': x.title,
+                'review_count': int(x.review_count),
+                'avg_rating': round(float(x.avg_rating), 2) if x.avg_rating is not None else None
+            }
+            for x in self.db.get_trending(media_type, hours, limit)
+        ]
+        
+        # Windows also move with the clock, so entries expire quickly
+        cache.set(cache_key, data, ttl=TRENDING_CACHE_TTL)
+        return data
+    
     def bulk_import_reviews(self, json_path: str) -> dict:
         """Import reviews in bulk using multithreading"""
         results = {'total': 0, 'success': 0, 'failed': 0}
@@ -79,8 +106,10 @@ class ReviewService:
         
         def process(review):
             try:
-                if not self.db.get_user(review['username']):
-                    self.db.add_user(review['username'])
+                # The DatabaseManager session is shared; only one thread may use it
+                with self._lock:
+                    if not self.db.get_user(review['username']):
+                        self.db.add_user(review['username'])
                 
                 return self.add_review_threaded(
                     review['username'],
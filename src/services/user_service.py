@@ -1,8 +1,10 @@
 """User Service - Simplified"""
 from src.database.manager import DatabaseManager
+from src.database.profiling import profiler
 from src.patterns.observer import notification_subject
 
 
+@profiler.register
 class UserService:
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
@@ -13,11 +15,33 @@ class UserService:
             notification_subject.register_observer(username)
         return success, message
     
+    def delete_user(self, username: str) -> tuple[bool, str]:
+        user = self.db.get_user(username)
+        user_id = user.user_id if user else None
+        success, message = self.db.delete_user(username)
+        if success:
+            notification_subject.remove_user(user_id, username)
+        return success, message
+    
     def add_to_favorites(self, username: str, title: str, media_type: str) -> tuple[bool, str]:
-        return self.db.add_favorite(username, title, media_type)
+        success, message = self.db.add_favorite(username, title, media_type)
+        # Keep the in-memory favorites index in step, once it has been loaded
+        if success and notification_subject.favorites.loaded:
+            user_id, media_id = self._ids(username, title, media_type)
+            notification_subject.add_favorite(media_id, title, media_type, user_id, username)
+        return success, message
     
     def remove_from_favorites(self, username: str, title: str, media_type: str) -> tuple[bool, str]:
-        return self.db.remove_favorite(username, title, media_type)
+        success, message = self.db.remove_favorite(username, title, media_type)
+        if success and notification_subject.favorites.loaded:
+            user_id, media_id = self._ids(username, title, media_type)
+            notification_subject.remove_favorite(media_id, user_id)
+        return success, message
+    
+    def _ids(self, username: str, title: str, media_type: str) -> tuple[int, int]:
+        user = self.db.get_user(username)
+        media = self.db.get_media_by_title(title, media_type)
+        return user.user_id, media.media_id
     
     def get_favorites(self, username: str) -> list:
         return self.db.get_user_favorites(username)
\ No newline at end of file
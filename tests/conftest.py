@@ -0,0 +1,12 @@
+import pytest
+from src.database.manager import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A DatabaseManager on a fresh SQLite file, never the tracked database"""
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+    manager.create_tables()
+    yield manager
+    manager.close_session()
+    manager.engine.dispose()
@@ -0,0 +1,43 @@
+"""LSH bucket sizing and stable result prefixes"""
+import numpy as np
+import pytest
+from src.recommender.ann import LSHIndex, default_bits
+
+
+def unit_vectors(n: int, dim: int = 9, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.mark.parametrize('n, bits', [(0, 1), (1, 1), (16, 1), (64, 3), (1000, 7), (1024, 7), (10 ** 6, 17)])
+def test_default_bits(n, bits):
+    assert default_bits(n) == bits
+
+
+@pytest.mark.parametrize('n', [500, 5000, 50000])
+def test_default_buckets_hold_a_few_items(n):
+    index = LSHIndex.build(unit_vectors(n), n_tables=4)
+    assert 4 <= n / 2 ** index.n_bits <= 16
+    for codes in index._sorted_codes:
+        # Low-dimensional vectors cannot reach every sign pattern, so
+        # occupied buckets run somewhat fuller than n / 2 ** n_bits
+        assert 4 <= n / len(np.unique(codes)) <= 32
+    # Queries find candidates without scanning most of the catalog
+    found = [len(index.candidates(v)) for v in unit_vectors(50, seed=1)]
+    assert 0 < np.mean(found) < n / 4
+
+
+@pytest.mark.parametrize('exhaustive_below', [0, 10 ** 6])
+def test_smaller_k_is_a_prefix(exhaustive_below):
+    vectors = unit_vectors(3000)
+    # About 24 candidates per query, so without depth small k would rank
+    # them while k=50 falls back to an exact scan
+    index = LSHIndex.build(vectors, n_tables=4)
+    for q in range(0, 3000, 150):
+        results = [
+            index.query(vectors[q], k, exclude=[q], exhaustive_below=exhaustive_below)[0].tolist()
+            for k in (1, 3, 5, 10, 50)
+        ]
+        assert all(q not in result for result in results)
+        for shorter, longer in zip(results, results[1:]):
+            assert longer[:len(shorter)] == shorter
@@ -0,0 +1,80 @@
+"""Incremental CollaborativeFilter updates must match a rebuild from the reviews table"""
+import random
+import pytest
+from src.models.db_models import Review
+from src.recommender.collaborative import CollaborativeFilter
+
+USERS = [f"user{i}" for i in range(6)]
+TITLES = [f"Movie {i}" for i in range(8)]
+
+
+def add_reviews(db, count: int, seed: int):
+    rng = random.Random(seed)
+    for _ in range(count):
+        db.add_review(rng.choice(USERS), rng.choice(TITLES), 'movie', float(rng.randint(1, 5)))
+
+
+def similarities(cf: CollaborativeFilter) -> dict:
+    return {
+        (title, other): score
+        for title in TITLES
+        for other, score in cf.similar_titles(title, 'movie', top_n=len(TITLES))
+    }
+
+
+def assert_same_model(incremental: CollaborativeFilter, db):
+    rebuilt = CollaborativeFilter(db, refresh_interval=3600)
+    rebuilt.rebuild()
+    expected = similarities(rebuilt)
+    assert expected
+    assert similarities(incremental) == pytest.approx(expected)
+
+
+@pytest.fixture
+def seeded_db(db):
+    for username in USERS:
+        db.add_user(username)
+    add_reviews(db, 20, seed=1)
+    return db
+
+
+@pytest.mark.parametrize('compact_every', [1, 7, 50000])
+def test_refresh_matches_rebuild(seeded_db, compact_every):
+    cf = CollaborativeFilter(seeded_db, compact_every=compact_every, refresh_interval=3600)
+    cf.rebuild()
+
+    # Plenty of (user, title) repeats, so many of these are re-ratings
+    for seed in range(2, 6):
+        add_reviews(seeded_db, 15, seed=seed)
+        cf.refresh()
+        assert_same_model(cf, seeded_db)
+
+
+def test_rerating_replaces_the_previous_rating(seeded_db):
+    cf = CollaborativeFilter(seeded_db, refresh_interval=3600)
+    cf.rebuild()
+
+    for rating in (1.0, 5.0, 3.0):
+        seeded_db.add_review(USERS[0], TITLES[0], 'movie', rating)
+        seeded_db.add_review(USERS[0], TITLES[1], 'movie', 6.0 - rating)
+        cf.refresh()
+        assert_same_model(cf, seeded_db)
+
+
+def test_deletes_drop_out_on_rebuild(seeded_db):
+    cf = CollaborativeFilter(seeded_db, refresh_interval=3600)
+    cf.rebuild()
+    add_reviews(seeded_db, 15, seed=2)
+    cf.refresh()
+
+    session = seeded_db.get_session()
+    for review in session.query(Review).order_by(Review.review_id).all()[::3]:
+        seeded_db.delete_review(review.review_id)
+    seeded_db.delete_user(USERS[1])
+
+    cf.rebuild()
+    assert_same_model(cf, seeded_db)
+
+    add_reviews(seeded_db, 15, seed=3)
+    cf.refresh()
+    assert_same_model(cf, seeded_db)
@@ -0,0 +1,46 @@
+"""Re-running the catalog loader on the same CSV must not insert anything"""
+import csv
+from scripts.load_catalog import load_catalog
+from src.models.db_models import Media
+
+TITLES = ['Ärger', 'ärger', 'ÄRGER', 'Amélie', 'AMÉLIE', 'Heat', 'heat', '  Heat  ', 'Straße', 'STRASSE', '', 'Alien']
+
+
+def write_csv(path, titles):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'overview'])
+        writer.writerows([title, ''] for title in titles)
+
+
+def stored_titles(db) -> list:
+    with db.session_scope() as session:
+        return sorted(title for (title,) in session.query(Media.title).filter_by(media_type='movie'))
+
+
+def test_rerun_inserts_nothing(db, tmp_path):
+    path = tmp_path / 'movies.csv'
+    write_csv(path, TITLES)
+
+    first = load_catalog(['movie'], chunk_size=3, csv_path=path, db=db)['movie']
+    titles = stored_titles(db)
+    # Titles equal up to ASCII case are one title; other letters are kept apart
+    assert titles == sorted(['Ärger', 'ärger', 'Amélie', 'AMÉLIE', 'Heat', 'Straße', 'STRASSE', 'Alien'])
+    assert first['inserted'] == len(titles)
+    assert first['blank'] == 1
+
+    for chunk_size in (1, 3, 100):
+        again = load_catalog(['movie'], chunk_size=chunk_size, csv_path=path, db=db)['movie']
+        assert again['inserted'] == 0
+        assert again['duplicate'] == len(TITLES) - 1
+        assert stored_titles(db) == titles
+
+
+def test_only_new_titles_are_added(db, tmp_path):
+    path = tmp_path / 'movies.csv'
+    write_csv(path, TITLES)
+    load_catalog(['movie'], csv_path=path, db=db)
+
+    write_csv(path, ['ärger', 'HEAT', 'Brazil', 'brazil'])
+    assert load_catalog(['movie'], csv_path=path, db=db)['movie']['inserted'] == 1
+    assert 'Brazil' in stored_titles(db)
@@ -0,0 +1,105 @@
+"""Outbox delivery, inbox cursors and compaction"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import update
+from src.models.db_models import Notification, NotificationOutbox
+
+FOLLOWERS = ['ana', 'ben', 'cai']
+
+
+@pytest.fixture
+def followed_db(db):
+    for username in FOLLOWERS + ['rex']:
+        db.add_user(username)
+    for username in FOLLOWERS:
+        db.add_favorite(username, 'Dune', 'book')
+    db.add_favorite('ana', 'Emma', 'book')
+    return db
+
+
+def inbox_rows(db) -> list:
+    with db.session_scope() as session:
+        return sorted(session.query(Notification.outbox_id, Notification.user_id).all())
+
+
+def test_every_follower_but_the_reviewer_is_notified(followed_db):
+    followed_db.add_review('rex', 'Dune', 'book', 4.0)
+    followed_db.add_review('ana', 'Dune', 'book', 5.0)
+    followed_db.add_review('rex', 'Emma', 'book', 3.0)
+
+    assert followed_db.deliver_notifications() == 3
+    assert followed_db.deliver_notifications() == 0
+
+    inbox = {username: followed_db.get_inbox(username) for username in FOLLOWERS + ['rex']}
+    assert [(n['title'], n['reviewer']) for n in inbox['ana']] == [('Emma', 'rex'), ('Dune', 'rex')]
+    assert [(n['title'], n['reviewer']) for n in inbox['ben']] == [('Dune', 'ana'), ('Dune', 'rex')]
+    assert [(n['title'], n['reviewer']) for n in inbox['cai']] == [('Dune', 'ana'), ('Dune', 'rex')]
+    assert inbox['rex'] == []
+
+
+def test_events_survive_until_delivered(followed_db):
+    for rating in (1.0, 2.0, 3.0):
+        followed_db.add_review('rex', 'Dune', 'book', rating)
+
+    # Batches pick up the oldest pending events first, so none is skipped
+    assert followed_db.deliver_notifications(batch_size=2) == 2
+    assert followed_db.deliver_notifications(batch_size=2) == 1
+    assert [n['rating'] for n in followed_db.get_inbox('ben')] == [3.0, 2.0, 1.0]
+
+
+def test_redelivery_is_idempotent(followed_db):
+    followed_db.add_review('rex', 'Dune', 'book', 4.0)
+    followed_db.add_review('rex', 'Emma', 'book', 2.0)
+    followed_db.deliver_notifications()
+    delivered = inbox_rows(followed_db)
+
+    # As if the worker crashed after writing the inbox rows and retried
+    with followed_db.session_scope() as session:
+        session.execute(update(NotificationOutbox).values(delivered_at=None))
+    assert followed_db.deliver_notifications() == 2
+
+    assert inbox_rows(followed_db) == delivered
+    assert followed_db.get_unread_count('ana') == 2
+
+
+def test_cursor_and_unread_counts(followed_db):
+    for rating in (1.0, 2.0, 3.0, 4.0):
+        followed_db.add_review('rex', 'Dune', 'book', rating)
+    followed_db.deliver_notifications()
+    ids = [n['notification_id'] for n in followed_db.get_inbox('ben')]
+    assert followed_db.get_unread_count('ben') == 4
+
+    followed_db.mark_inbox_read('ben', up_to_id=ids[2])
+    assert followed_db.get_unread_count('ben') == 2
+    assert [n['notification_id'] for n in followed_db.get_inbox('ben', unread_only=True)] == ids[:2]
+    assert [n['unread'] for n in followed_db.get_inbox('ben')] == [True, True, False, False]
+
+    # The cursor never moves backwards
+    followed_db.mark_inbox_read('ben', up_to_id=ids[3])
+    assert followed_db.get_unread_count('ben') == 2
+
+    followed_db.mark_inbox_read('ben')
+    assert followed_db.get_unread_count('ben') == 0
+    assert followed_db.get_unread_count('cai') == 4
+
+    first_page = followed_db.get_inbox('ben', limit=3)
+    second_page = followed_db.get_inbox('ben', limit=3, before_id=first_page[-1]['notification_id'])
+    assert [n['notification_id'] for n in first_page + second_page] == ids
+
+
+def test_compaction_removes_only_old_delivered_events(followed_db):
+    followed_db.add_review('rex', 'Dune', 'book', 1.0)
+    followed_db.deliver_notifications()
+    followed_db.add_review('rex', 'Dune', 'book', 2.0)
+    followed_db.add_review('rex', 'Dune', 'book', 3.0)
+    followed_db.deliver_notifications(batch_size=1)
+
+    # Age every event; the last one is still pending
+    with followed_db.session_scope() as session:
+        session.execute(update(NotificationOutbox).values(created_at=datetime.utcnow() - timedelta(days=60)))
+
+    assert followed_db.compact_notifications(retention_days=30, chunk_size=1) == (2, 6)
+    assert followed_db.get_inbox('ben') == []
+
+    assert followed_db.deliver_notifications() == 1
+    assert [n['rating'] for n in followed_db.get_inbox('ben')] == [3.0]
@@ -0,0 +1,78 @@
+"""Rating rollups kept up by writes must match a rebuild from the reviews table"""
+import random
+from datetime import datetime, timedelta
+import pytest
+from src.database.manager import ROLLUP_COUNTERS
+from src.models.db_models import Media, MediaRatingHourly, Review
+
+USERS = [f"user{i}" for i in range(5)]
+TITLES = [f"Series {i}" for i in range(6)]
+
+
+def rollups(db) -> dict:
+    """Non-empty rollup rows; removals leave zeroed rows a rebuild omits"""
+    with db.session_scope() as session:
+        return {
+            (row.media_id, row.hour): tuple(getattr(row, c) for c in ROLLUP_COUNTERS)
+            for row in session.query(MediaRatingHourly)
+            if row.review_count
+        }
+
+
+def assert_matches_rebuild(db):
+    incremental = rollups(db)
+    db.rebuild_rating_rollups()
+    rebuilt = rollups(db)
+    assert rebuilt
+    assert incremental.keys() == rebuilt.keys()
+    for key, counters in rebuilt.items():
+        assert incremental[key] == pytest.approx(counters)
+
+
+@pytest.fixture
+def reviewed_db(db):
+    rng = random.Random(7)
+    for username in USERS:
+        db.add_user(username)
+    # Repeats of a (user, title) pair are re-ratings, each its own review
+    for _ in range(40):
+        db.add_review(rng.choice(USERS), rng.choice(TITLES), 'series', rng.choice([1.0, 2.5, 3.0, 4.5, 5.0]))
+    return db
+
+
+def test_add_review_matches_rebuild(reviewed_db):
+    assert_matches_rebuild(reviewed_db)
+
+
+def test_deletes_match_rebuild(reviewed_db):
+    session = reviewed_db.get_session()
+    for review in session.query(Review).order_by(Review.review_id).all()[::4]:
+        reviewed_db.delete_review(review.review_id)
+    reviewed_db.delete_user(USERS[2])
+    assert_matches_rebuild(reviewed_db)
+
+
+def test_trending_ranks_like_raw_reviews(reviewed_db):
+    session = reviewed_db.get_session()
+    # Reviews outside the window must not count
+    stale = session.query(Review).order_by(Review.review_id).all()[:10]
+    for review in stale:
+        review.created_at = datetime.utcnow() - timedelta(hours=30)
+    session.commit()
+    reviewed_db.rebuild_rating_rollups()
+
+    cutoff = datetime.utcnow() - timedelta(hours=23)
+    ratings = {}
+    for title, rating in session.query(Media.title, Review.rating).join(Review).filter(
+        Media.media_type == 'series',
+        Review.created_at >= cutoff.replace(minute=0, second=0, microsecond=0)
+    ):
+        ratings.setdefault(title, []).append(rating)
+    expected = sorted(
+        ((title, len(values), sum(values) / len(values)) for title, values in ratings.items()),
+        key=lambda row: (-row[1], -row[2])
+    )
+
+    trending = reviewed_db.get_trending('series', hours=24, limit=len(TITLES))
+    assert [(row.title, row.review_count) for row in trending] == [(title, count) for title, count, _ in expected]
+    assert [row.avg_rating for row in trending] == pytest.approx([avg for _, _, avg in expected])
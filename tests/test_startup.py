@@ -0,0 +1,44 @@
+"""Cold start of the scripted CLI (src.cli.commands) must stay cheap.
+
+Each check runs in a fresh interpreter, so modules imported by pytest or
+other tests cannot hide an eager import.
+"""
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+# Modules the scripted CLI must not import before a command needs them
+HEAVY_MODULES = ('sqlalchemy', 'redis', 'numpy', 'pandas', 'src.database.manager')
+BUDGET_MS = 50.0
+RUNS = 5
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def import_time_ms() -> float:
+    """Cumulative import time of src.cli.commands, from -X importtime"""
+    stderr = run_python('-X', 'importtime', '-c', 'import src.cli.commands').stderr
+    for line in reversed(stderr.splitlines()):
+        if line.rstrip().endswith('src.cli.commands'):
+            return int(line.split('|')[1]) / 1000
+    raise AssertionError("src.cli.commands missing from -X importtime output")
+
+
+def test_heavy_modules_load_lazily():
+    probe = (
+        "import sys, src.cli.commands as c; c.build_parser(); "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    loaded = run_python('-c', probe).stdout.strip()
+    assert not loaded, f"imported eagerly by src.cli.commands: {loaded}"
+
+
+def test_import_time_within_budget():
+    run_python('-c', 'import src.cli.commands')  # compile .pyc files first
+    median = statistics.median(import_time_ms() for _ in range(RUNS))
+    assert median <= BUDGET_MS, f"import of src.cli.commands took {median:.1f}ms (budget {BUDGET_MS:.0f}ms)"
@@ -0,0 +1,55 @@
+"""top_k and top_k_rows must agree with a stable full argsort"""
+import numpy as np
+import pytest
+from src.recommender.topk import top_k, top_k_rows
+
+RNG = np.random.default_rng(3)
+SCORES = {
+    'distinct': RNG.permutation(20).astype(np.float64),
+    'ties': RNG.integers(0, 3, 20).astype(np.float64),
+    'all equal': np.ones(20),
+    'nan': np.where(RNG.random(20) < 0.3, np.nan, RNG.random(20)),
+    'all nan': np.full(20, np.nan),
+    'inf': np.array([np.inf, -np.inf, 0.5, np.nan, -np.inf, 1.0, np.inf, 0.0] * 2),
+}
+
+
+def reference(scores: np.ndarray, k: int, exclude=()) -> list:
+    keys = np.where(np.isnan(scores), -np.inf, scores)
+    order = np.argsort(-keys, kind='stable')
+    return [i for i in order.tolist() if i not in set(exclude)][:max(k, 0)]
+
+
+@pytest.mark.parametrize('k', [0, -1, 1, 5, 19, 20, 25])
+@pytest.mark.parametrize('name', list(SCORES))
+def test_top_k_matches_full_sort(name, k):
+    scores = SCORES[name]
+    indices, values = top_k(scores, k)
+    assert indices.tolist() == reference(scores, k)
+    np.testing.assert_array_equal(values, scores[indices])
+
+
+@pytest.mark.parametrize('exclude', [[0], [3, 7, 7, 11], [-1, 25], list(range(20))])
+@pytest.mark.parametrize('name', ['ties', 'nan'])
+def test_top_k_exclude(name, exclude):
+    scores = SCORES[name]
+    for k in (1, 4, 20):
+        assert top_k(scores, k, exclude=exclude)[0].tolist() == reference(scores, k, exclude)
+
+
+@pytest.mark.parametrize('k', [0, 1, 5, 15, 16, 30])
+@pytest.mark.parametrize('name', list(SCORES))
+def test_top_k_rows_matches_full_sort(name, k):
+    block = np.stack([RNG.permutation(SCORES[name][:16]) for _ in range(6)]).astype(np.float32)
+    exclude = RNG.integers(0, 16, len(block))
+
+    indices, values = top_k_rows(block, k)
+    assert indices.shape == (len(block), min(k, 16))
+    for row, expected in zip(block, indices.tolist()):
+        assert expected == reference(row, k)
+    np.testing.assert_array_equal(values, np.take_along_axis(np.where(np.isnan(block), -np.inf, block), indices, axis=1))
+
+    indices, values = top_k_rows(block, k, exclude=exclude)
+    assert indices.shape == (len(block), min(k, 15))
+    for row, skip, expected in zip(block, exclude.tolist(), indices.tolist()):
+        assert expected == reference(row, min(k, 15), [skip])